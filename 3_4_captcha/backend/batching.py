@@ -0,0 +1,115 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+# Micro-batching dynamique pour l'inférence de l'API.
+# Chaque requête /predict dépose son image (tenseur [1, 1, H, W]) dans une file
+# et attend un future. Une tâche de fond regroupe les images en attente jusqu'à
+# `max_batch_size` images, ou jusqu'à ce que la plus ancienne ait attendu
+# `max_wait_ms`, puis lance UNE passe forward sur le batch dans un thread
+# dédié (la boucle asyncio reste libre pour recevoir les requêtes suivantes)
+# et résout le future de chaque requête avec son résultat.
+# Pendant qu'un batch tourne, les requêtes suivantes s'accumulent et partent
+# ensemble au batch d'après : plus il y a de charge, plus les batchs sont gros.
+
+
+class BatchScheduler:
+    """
+    File d'inférence regroupant les requêtes concurrentes en batchs.
+
+    :param run_batch: fonction (tenseur [B, ...]) -> liste de B résultats,
+        appelée dans le thread d'inférence
+    :param max_batch_size: nombre maximum d'images par passe forward
+    :param max_wait_ms: attente maximale d'une image avant de lancer un batch incomplet
+    """
+
+    def __init__(self, run_batch, max_batch_size=32, max_wait_ms=5.0):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending = []  # (tenseur, future, heure d'arrivée)
+        self._task = None
+        self._executor = None
+
+    def start(self):
+        # A appeler depuis la boucle asyncio du serveur (lifespan de l'app)
+        self._has_pending = asyncio.Event()
+        self._full = asyncio.Event()
+        # Un seul thread : une passe forward à la fois, torch parallélise déjà le calcul
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for _, future, _ in self._pending:
+            if not future.done():
+                future.cancel()
+        self._pending = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def submit(self, tensor):
+        """Résultat de `run_batch` pour une image ([1, ...]), calculé dans un batch."""
+        if self._task is None:
+            raise RuntimeError("BatchScheduler non démarré (start)")
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((tensor, future, time.perf_counter()))
+        self._has_pending.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._full.set()
+        return await future
+
+    async def run(self, tensors):
+        """Résultats de `run_batch` pour un batch déjà formé ([B, ...]), dans le thread d'inférence."""
+        if self._executor is None:
+            raise RuntimeError("BatchScheduler non démarré (start)")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.run_batch, tensors)
+
+    async def _loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._has_pending.wait()
+            # Attente du remplissage du batch, bornée par l'âge de la plus ancienne image
+            timeout = self._pending[0][2] + self.max_wait - time.perf_counter()
+            if len(self._pending) < self.max_batch_size and timeout > 0:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            if not self._pending:
+                self._has_pending.clear()
+            if len(self._pending) < self.max_batch_size:
+                self._full.clear()
+            # Requêtes abandonnées par le client entre-temps
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+
+            try:
+                tensors = torch.cat([tensor for tensor, _, _ in batch])
+                results = await loop.run_in_executor(self._executor, self.run_batch, tensors)
+            except asyncio.CancelledError:
+                for _, future, _ in batch:
+                    future.cancel()
+                raise
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
@@ -7,20 +7,51 @@ from torchvision import transforms
 from PIL import Image
 import io
 import os
+import json
+import itertools
+import tarfile
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
 import pandas as pd
 import random
 import string
 import base64
+from contextlib import asynccontextmanager
 from captcha.image import ImageCaptcha 
+from starlette.concurrency import run_in_threadpool
 
 # Import relatif supposant l'exécution via 'uvicorn backend.main:app'
 try:
     from .architecture import CRNN
+    from .batching import BatchScheduler
 except ImportError:
     # Fallback pour exécution directe ou debug
     from architecture import CRNN
+    from batching import BatchScheduler
 
-app = FastAPI()
+# Micro-batching de /predict : jusqu'à 32 images par passe forward, 5 ms d'attente max
+MAX_BATCH_SIZE = 32
+MAX_WAIT_MS = 5.0
+
+# /predict-batch : images décodées et prédites par blocs (mémoire bornée)
+BULK_CHUNK_SIZE = 64
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".webp")
+# Erreurs de lecture d'une archive corrompue : une ligne d'erreur, pas une réponse coupée
+ZIP_ERRORS = (zipfile.BadZipFile, zlib.error, EOFError, OSError, RuntimeError, NotImplementedError)
+TAR_ERRORS = (tarfile.TarError, zlib.error, EOFError, OSError)
+decode_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="decode")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    scheduler.start()
+    yield
+    await scheduler.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -88,6 +119,18 @@ def decode_prediction(preds):
         decoded_texts.append(text)
     return decoded_texts
 
+def predict_batch(img_tensors):
+    # img_tensors: [Batch, 1, H, W] sur CPU -> une prédiction par image
+    with torch.no_grad():
+        output = model(img_tensors.to(device))
+    return decode_prediction(output)
+
+scheduler = BatchScheduler(predict_batch, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS)
+
+def load_image_tensor(image_data):
+    image = Image.open(io.BytesIO(image_data)).convert("L")
+    return transform(image).unsqueeze(0)
+
 @app.get("/test-batch")
 def test_batch(n: int = 5):
     if not os.path.exists(VAL_CSV):
@@ -151,15 +194,110 @@ async def predict(file: UploadFile = File(...)):
     image_data = await file.read()
     print(f"Received file: {file.filename}, Size: {len(image_data)} bytes")
     print(f"First 10 bytes: {image_data[:10]}")
-    image = Image.open(io.BytesIO(image_data)).convert("L")
-    img_tensor = transform(image).unsqueeze(0).to(device)
-    
-    with torch.no_grad():
-        output = model(img_tensor)
-    
-    text = decode_prediction(output)[0]
+    # Décodage hors de la boucle asyncio, puis inférence groupée avec les requêtes concurrentes
+    img_tensor = await run_in_threadpool(load_image_tensor, image_data)
+    text = await scheduler.submit(img_tensor)
     return {"prediction": text}
 
+def iter_zip(upload):
+    try:
+        archive = zipfile.ZipFile(upload.file)
+    except ZIP_ERRORS as e:
+        yield upload.filename, None, f"Archive zip illisible : {e}"
+        return
+    with archive:
+        for info in archive.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            try:
+                image_data, error = archive.read(info), None
+            except ZIP_ERRORS as e:
+                image_data, error = None, str(e)
+            yield info.filename, image_data, error
+
+def iter_tar(upload):
+    # None si ce n'est pas un tar : l'upload est alors lu comme une image
+    try:
+        # Mode flux "r|*" : lecture séquentielle, tar compressé ou non
+        archive = tarfile.open(fileobj=upload.file, mode="r|*")
+    except TAR_ERRORS:
+        return None
+
+    def entries():
+        with archive:
+            try:
+                for member in archive:
+                    if not (member.isfile() and member.name.lower().endswith(IMAGE_EXTENSIONS)):
+                        continue
+                    try:
+                        image_data, error = archive.extractfile(member).read(), None
+                    except TAR_ERRORS as e:
+                        image_data, error = None, str(e)
+                    yield member.name, image_data, error
+            except TAR_ERRORS as e:
+                # Archive tronquée / corrompue après les membres déjà lus
+                yield upload.filename, None, f"Archive tar corrompue : {e}"
+
+    return entries()
+
+def iter_uploads(files):
+    # (nom, octets, erreur) de chaque image : fichiers envoyés, ou contenu des archives
+    # zip / tar, lus au fur et à mesure (les uploads sont déjà sur disque au-delà de 1 Mo)
+    for upload in files:
+        f = upload.file
+        f.seek(0)
+        if zipfile.is_zipfile(f):
+            f.seek(0)
+            yield from iter_zip(upload)
+            continue
+        f.seek(0)
+        entries = iter_tar(upload)
+        if entries is not None:
+            yield from entries
+            continue
+        f.seek(0)
+        yield upload.filename, f.read(), None
+
+def decode_entry(entry):
+    name, image_data, error = entry
+    if error is not None:
+        return name, None, error
+    try:
+        return name, load_image_tensor(image_data), None
+    except Exception as e:
+        return name, None, str(e)
+
+def decode_chunk(entries):
+    # Bloc suivant de BULK_CHUNK_SIZE images, décodées en parallèle
+    chunk = list(itertools.islice(entries, BULK_CHUNK_SIZE))
+    return list(decode_pool.map(decode_entry, chunk))
+
+@app.post("/predict-batch")
+async def predict_batch_endpoint(files: List[UploadFile] = File(...)):
+    """
+    Prédiction de nombreuses images en un appel : plusieurs fichiers et/ou
+    archives zip / tar. Réponse en NDJSON, une ligne par image, envoyée au fur
+    et à mesure des blocs de BULK_CHUNK_SIZE images.
+    """
+    async def results():
+        entries = iter_uploads(files)
+        while True:
+            chunk = await run_in_threadpool(decode_chunk, entries)
+            if not chunk:
+                break
+            tensors = [tensor for _, tensor, error in chunk if error is None]
+            # Dans le thread d'inférence de /predict : une passe forward à la fois
+            texts = iter(await scheduler.run(torch.cat(tensors)) if tensors else [])
+            lines = []
+            for name, _, error in chunk:
+                if error is None:
+                    lines.append({"filename": name, "prediction": next(texts)})
+                else:
+                    lines.append({"filename": name, "error": error})
+            yield "".join(json.dumps(line) + "\n" for line in lines)
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 @app.get("/test-sample")
 def get_test_sample():
     if not os.path.exists(VAL_CSV):
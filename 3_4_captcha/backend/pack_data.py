@@ -0,0 +1,89 @@
+import os
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from train_model import (
+    DATA_ROOT,
+    IMAGES_DIR,
+    TRAIN_CSV,
+    VAL_CSV,
+    PACKED_DIR,
+    IMG_HEIGHT,
+    IMG_WIDTH,
+    CHAR2IDX,
+    packed_paths,
+)
+
+# Empaquetage d'un dataset fixe (generate_data.py) pour PackedCaptchaDataset :
+# - <prefix>_images.npy : uint8 [N, IMG_HEIGHT, IMG_WIDTH], niveaux de gris,
+#   déjà redimensionnées comme le transform de l'entraînement ;
+# - <prefix>_labels.npy : labels encodés (CHAR2IDX) mis bout à bout ;
+# - <prefix>_offsets.npy : début de chaque label, N + 1 valeurs.
+# Le décodage des PNG est fait une seule fois ici, plus à chaque époque.
+#
+# Usage (depuis backend/) :
+#     python pack_data.py                    # data/train.csv + data/val.csv -> data/packed/
+#     python pack_data.py --workers 8
+
+CHUNK_SIZE = 4096  # images décodées par vague (mémoire bornée)
+
+
+def load_image(path):
+    # Même prétraitement que CaptchaDataset + transforms.Resize, avant ToTensor
+    try:
+        image = Image.open(path).convert("L")
+    except Exception as e:
+        print(f"Erreur chargement image {path}: {e}")
+        image = Image.new("L", (IMG_WIDTH, IMG_HEIGHT))
+    if image.size != (IMG_WIDTH, IMG_HEIGHT):
+        image = image.resize((IMG_WIDTH, IMG_HEIGHT), Image.BILINEAR)
+    return np.asarray(image, dtype=np.uint8)
+
+
+def pack_dataset(csv_file, images_dir, out_prefix, num_workers=None):
+    data = pd.read_csv(csv_file)
+    paths = packed_paths(out_prefix)
+    os.makedirs(os.path.dirname(out_prefix) or ".", exist_ok=True)
+
+    # Labels : une seule suite d'indices + offsets
+    encoded = [[CHAR2IDX[c] for c in str(label) if c in CHAR2IDX] for label in data["Label"]]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    labels = np.fromiter((i for e in encoded for i in e), dtype=np.uint8, count=offsets[-1])
+    np.save(paths["labels"], labels)
+    np.save(paths["offsets"], offsets)
+
+    # Images : écrites directement dans le .npy final (memmap), par vagues
+    images = np.lib.format.open_memmap(
+        paths["images"], mode="w+", dtype=np.uint8, shape=(len(data), IMG_HEIGHT, IMG_WIDTH)
+    )
+    files = [os.path.join(images_dir, name) for name in data["filename"]]
+    with ThreadPoolExecutor(max_workers=num_workers or os.cpu_count() or 1) as pool:
+        for start in range(0, len(files), CHUNK_SIZE):
+            chunk = files[start:start + CHUNK_SIZE]
+            for i, pixels in enumerate(pool.map(load_image, chunk)):
+                images[start + i] = pixels
+    images.flush()
+    del images
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Empaquetage du dataset de captchas pour l'entraînement")
+    parser.add_argument("--out", default=PACKED_DIR, help="dossier de sortie (défaut : data/packed)")
+    parser.add_argument("--workers", type=int, default=None, help="threads de décodage (défaut : nombre de coeurs)")
+    args = parser.parse_args()
+
+    if not os.path.exists(TRAIN_CSV):
+        parser.error(f"{TRAIN_CSV} introuvable : lancer d'abord generate_data.py (data dans {DATA_ROOT})")
+
+    for name, csv_file in (("train", TRAIN_CSV), ("val", VAL_CSV)):
+        start_time = time.time()
+        paths = pack_dataset(csv_file, IMAGES_DIR, os.path.join(args.out, name), args.workers)
+        size = sum(os.path.getsize(p) for p in paths.values()) / 2**20
+        print(f"{name}: {paths['images']} ({size:.0f} Mo) en {time.time() - start_time:.1f}s")
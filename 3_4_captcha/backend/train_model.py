@@ -2,7 +2,7 @@ import os
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import Dataset, DataLoader
+from torch.utils.data import Dataset, DataLoader, IterableDataset, get_worker_info
 from torchvision import transforms
 from PIL import Image
 import pandas as pd
@@ -40,6 +40,7 @@ else:
 IMAGES_DIR = os.path.join(DATA_ROOT, "images")
 TRAIN_CSV = os.path.join(DATA_ROOT, "train.csv")
 VAL_CSV = os.path.join(DATA_ROOT, "val.csv")
+PACKED_DIR = os.path.join(DATA_ROOT, "packed")  # sortie de pack_data.py
 """
 MODEL_SAVE_PATH = (
     "model.pth" if os.path.exists("model.pth") else "backend/model.pth"
@@ -63,12 +64,29 @@ EPOCHS = 20
 NUM_IMAGES = 10000
 ALPHABET = string.ascii_uppercase + string.digits
 
+# Source des données d'entraînement :
+# - "stream" : captchas rendus à la volée dans les workers du DataLoader
+#   (CaptchaStreamDataset), nouveaux à chaque époque, sans disque ;
+# - "packed" : dataset fixe pré-empaqueté par pack_data.py (PackedCaptchaDataset) ;
+# - "png" : ancien mode, NUM_IMAGES PNG régénérés à chaque époque (generate_data + CSV).
+DATA_MODE = "stream"
+NUM_WORKERS = os.cpu_count() or 1
+VAL_RATIO = 0.1
+TRAIN_SEED = 0
+VAL_SEED = 12345  # mêmes captchas de validation à chaque époque
+
 # Mapping caractères <-> index
 # CTC Blank est souvent 0. Donc A=1, B=2, ...
 CHAR2IDX = {char: idx + 1 for idx, char in enumerate(ALPHABET)}
 IDX2CHAR = {idx + 1: char for idx, char in enumerate(ALPHABET)}
 
 
+def encode_label(label_str):
+    return torch.tensor(
+        [CHAR2IDX[c] for c in label_str if c in CHAR2IDX], dtype=torch.long
+    )
+
+
 class CaptchaDataset(Dataset):
     def __init__(self, csv_file, root_dir, transform=None):
         self.data = pd.read_csv(csv_file)
@@ -96,12 +114,113 @@ class CaptchaDataset(Dataset):
             image = self.transform(image)
 
         # Encodage du label
-        label = torch.tensor(
-            [CHAR2IDX[c] for c in label_str if c in CHAR2IDX], dtype=torch.long
-        )
+        label = encode_label(label_str)
         return image, label
 
 
+class CaptchaStreamDataset(IterableDataset):
+    """
+    Captchas générés à la volée, sans passer par le disque.
+
+    Chaque worker du DataLoader crée son propre ImageCaptcha et rend sa part
+    des `num_samples` images avec `generate_image`, directement en mémoire.
+    Les échantillons sont répartis entre workers par blocs de `chunk_size`
+    (= batch_size : chaque batch vient d'un seul worker, et le DataLoader
+    en produit exactement len(dataset) / batch_size).
+    Avec un `seed`, le contenu ne dépend que de (seed, époque, worker) :
+    même seed et même nombre de workers = mêmes captchas. `set_epoch` change
+    les captchas d'une époque à l'autre.
+    """
+
+    def __init__(self, num_samples, transform=None, seed=None, chunk_size=BATCH_SIZE):
+        self.num_samples = num_samples
+        self.transform = transform
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def __len__(self):
+        return self.num_samples
+
+    def __iter__(self):
+        worker = get_worker_info()
+        worker_id, num_workers = (0, 1) if worker is None else (worker.id, worker.num_workers)
+        if self.seed is not None:
+            generate_data.seed_captcha(self.seed + 10_000 * self.epoch + worker_id)
+        captcha = generate_data.make_captcha()
+
+        # Le worker k rend les blocs k, k + num_workers, ...
+        step = self.chunk_size * num_workers
+        for start in range(worker_id * self.chunk_size, self.num_samples, step):
+            for _ in range(min(self.chunk_size, self.num_samples - start)):
+                label_str = generate_data.generate_random_length_text()
+                image = captcha.generate_image(label_str).convert("L")
+                if self.transform:
+                    image = self.transform(image)
+                yield image, encode_label(label_str)
+
+
+def packed_paths(prefix):
+    # Fichiers d'un split empaqueté (ex: data/packed/train)
+    return {
+        "images": f"{prefix}_images.npy",  # uint8 [N, IMG_HEIGHT, IMG_WIDTH]
+        "labels": f"{prefix}_labels.npy",  # uint8, labels encodés (CHAR2IDX) mis bout à bout
+        "offsets": f"{prefix}_offsets.npy",  # int64 [N + 1], label i = labels[offsets[i]:offsets[i + 1]]
+    }
+
+
+class PackedCaptchaDataset(Dataset):
+    """
+    Dataset empaqueté par pack_data.py : images déjà en niveaux de gris et à la
+    taille du modèle, dans un seul fichier .npy ouvert en memory-map.
+
+    `__getitem__` lit une tranche du fichier (sans copie ni décodage PNG) et
+    applique la normalisation de l'entraînement ([-1, 1]). `__getitems__`
+    (utilisé par le DataLoader) lit et normalise un batch entier d'un coup.
+    """
+
+    def __init__(self, prefix):
+        self.paths = packed_paths(prefix)
+        self.labels = np.load(self.paths["labels"])
+        self.offsets = np.load(self.paths["offsets"])
+        # Ouvert dans chaque worker : un memmap picklé serait copié en entier
+        self.images = None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _open(self):
+        if self.images is None:
+            self.images = np.load(self.paths["images"], mmap_mode="r")
+        return self.images
+
+    def _label(self, idx):
+        return torch.from_numpy(
+            self.labels[self.offsets[idx]:self.offsets[idx + 1]].astype(np.int64)
+        )
+
+    @staticmethod
+    def _normalize(pixels):
+        # Même calcul que ToTensor + Normalize((0.5,), (0.5,))
+        return (torch.from_numpy(pixels).float().div_(255.0) - 0.5) / 0.5
+
+    def __getitem__(self, idx):
+        image = self._normalize(np.array(self._open()[idx]))  # copie hors du memmap (lecture seule)
+        return image.unsqueeze(0), self._label(idx)
+
+    def __getitems__(self, indices):
+        # Lecture triée (accès disque séquentiel), puis remise dans l'ordre demandé
+        indices = np.asarray(indices)
+        order = np.argsort(indices)
+        pixels = np.empty((len(indices), IMG_HEIGHT, IMG_WIDTH), dtype=np.uint8)
+        pixels[order] = self._open()[indices[order]]
+        images = self._normalize(pixels).unsqueeze(1)
+        return [(images[i], self._label(idx)) for i, idx in enumerate(indices)]
+
+
 def collate_fn(batch):
     images, labels = zip(*batch)
     images = torch.stack(images, 0)  # [Batch, 1, H, W]
@@ -230,34 +349,78 @@ def main():
 
     print(f"Début de l'entraînement pour {EPOCHS} époques.")
 
-    for epoch in range(EPOCHS):
-        start_time = time.time()
-
-        # --- GENERATION NOUVELLE DATA ---
-        print(f"--- Epoch {epoch+1}: Génération de nouvelles données... ---")
-        generate_data.generate_dataset(
-            force=True, root_dir=DATA_ROOT, num_images=NUM_IMAGES
+    if DATA_MODE == "stream":
+        num_val = int(NUM_IMAGES * VAL_RATIO)
+        train_dataset = CaptchaStreamDataset(
+            NUM_IMAGES - num_val, transform=transform, seed=TRAIN_SEED
         )
-
-        # Rechargement des datasets
-        train_dataset = CaptchaDataset(
-            TRAIN_CSV, IMAGES_DIR, transform=transform
+        val_dataset = CaptchaStreamDataset(
+            num_val, transform=transform, seed=VAL_SEED
         )
-        val_dataset = CaptchaDataset(VAL_CSV, IMAGES_DIR, transform=transform)
-
+        # Les captchas sont rendus dans les workers pendant l'entraînement
+        train_loader = DataLoader(
+            train_dataset,
+            batch_size=BATCH_SIZE,
+            collate_fn=collate_fn,
+            num_workers=NUM_WORKERS,
+        )
+        val_loader = DataLoader(
+            val_dataset,
+            batch_size=BATCH_SIZE,
+            collate_fn=collate_fn,
+            num_workers=NUM_WORKERS,
+        )
+    elif DATA_MODE == "packed":
+        # Dataset fixe : python pack_data.py après generate_data.py
+        train_dataset = PackedCaptchaDataset(os.path.join(PACKED_DIR, "train"))
+        val_dataset = PackedCaptchaDataset(os.path.join(PACKED_DIR, "val"))
         train_loader = DataLoader(
             train_dataset,
             batch_size=BATCH_SIZE,
             shuffle=True,
             collate_fn=collate_fn,
+            num_workers=NUM_WORKERS,
         )
         val_loader = DataLoader(
             val_dataset,
             batch_size=BATCH_SIZE,
             shuffle=False,
             collate_fn=collate_fn,
+            num_workers=NUM_WORKERS,
         )
-        # --------------------------------
+
+    for epoch in range(EPOCHS):
+        start_time = time.time()
+
+        if DATA_MODE == "stream":
+            # Nouveaux captchas d'entraînement, validation inchangée
+            train_dataset.set_epoch(epoch)
+        elif DATA_MODE == "png":
+            # --- GENERATION NOUVELLE DATA ---
+            print(f"--- Epoch {epoch+1}: Génération de nouvelles données... ---")
+            generate_data.generate_dataset(
+                force=True, root_dir=DATA_ROOT, num_images=NUM_IMAGES
+            )
+
+            # Rechargement des datasets
+            train_dataset = CaptchaDataset(
+                TRAIN_CSV, IMAGES_DIR, transform=transform
+            )
+            val_dataset = CaptchaDataset(VAL_CSV, IMAGES_DIR, transform=transform)
+
+            train_loader = DataLoader(
+                train_dataset,
+                batch_size=BATCH_SIZE,
+                shuffle=True,
+                collate_fn=collate_fn,
+            )
+            val_loader = DataLoader(
+                val_dataset,
+                batch_size=BATCH_SIZE,
+                shuffle=False,
+                collate_fn=collate_fn,
+            )
+            # --------------------------------
 
         train_loss = train_epoch(
             model, train_loader, criterion, optimizer, device
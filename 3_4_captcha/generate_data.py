@@ -1,8 +1,13 @@
+import argparse
 import os
 import random
 import string
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
+import captcha.image as captcha_image
 from captcha.image import ImageCaptcha
 
 # Configuration
@@ -13,21 +18,51 @@ ALPHABET = string.ascii_uppercase + string.digits
 WIDTH = 400
 HEIGHT = 80
 NUM_IMAGES = 10000
+# Images par shard (un sous-dossier + un CSV) en génération parallèle : petit devant
+# NUM_IMAGES pour que tous les workers aient du travail, fixe pour que le résultat
+# ne dépende pas du nombre de workers
+SHARD_SIZE = 1000
 
 # Captchas object Configuration
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 FONTS_DIR = os.path.join(SCRIPT_DIR, "fonts")
 
-captcha: ImageCaptcha = ImageCaptcha(
-    width=WIDTH,
-    height=HEIGHT,
-    fonts=[
-        os.path.join(FONTS_DIR, "NotoSans-Regular.ttf"),
-        os.path.join(FONTS_DIR, "AdwaitaSans-Regular.ttf"),
-        os.path.join(FONTS_DIR, "Hack-Regular.ttf"),
-    ],
-    font_sizes=(40, 50, 60),  # NOQA: Type hint was done wrong
-)
+
+def make_captcha() -> ImageCaptcha:
+    # Un générateur par processus (les polices sont chargées à la création)
+    return ImageCaptcha(
+        width=WIDTH,
+        height=HEIGHT,
+        fonts=[
+            os.path.join(FONTS_DIR, "NotoSans-Regular.ttf"),
+            os.path.join(FONTS_DIR, "AdwaitaSans-Regular.ttf"),
+            os.path.join(FONTS_DIR, "Hack-Regular.ttf"),
+        ],
+        font_sizes=(40, 50, 60),  # NOQA: Type hint was done wrong
+    )
+
+
+captcha: ImageCaptcha = make_captcha()
+
+
+class _SeededSecrets(random.Random):
+    # Les fonctions de `secrets` utilisées par captcha.image, mais reproductibles
+    def randbelow(self, n):
+        return self.randrange(n)
+
+    def randbits(self, k):
+        return self.getrandbits(k)
+
+
+def seed_captcha(seed):
+    """
+    Rend la génération reproductible dans le processus courant : les textes
+    (module random) et les images (couleurs, bruit, déformations que captcha
+    tire avec `secrets`, non seedable, remplacé par un générateur seedé).
+    """
+    random.seed(seed)
+    captcha_image.secrets = _SeededSecrets(seed)
+
 
 if not os.path.exists(OUTPUT_DIR):
     os.makedirs(OUTPUT_DIR)
@@ -42,18 +77,21 @@ def generate_random_length_text() -> str:
     return "".join(random.choices(ALPHABET, k=text_length))
 
 
-def generate_dataset(force=False, root_dir=None, num_images=NUM_IMAGES):
-    global DATA_ROOT, OUTPUT_DIR, CSV_FILE
-
+def _find_data_root(root_dir=None):
     if root_dir:
-        DATA_ROOT = root_dir
+        return root_dir
     elif os.path.exists("data"):
-        DATA_ROOT = "data"
+        return "data"
     elif os.path.exists("../data"):
-        DATA_ROOT = "../data"
-    else:
-        # Fallback creation if it doesn't exist anywhere
-        DATA_ROOT = "data"
+        return "../data"
+    # Fallback creation if it doesn't exist anywhere
+    return "data"
+
+
+def generate_dataset(force=False, root_dir=None, num_images=NUM_IMAGES):
+    global DATA_ROOT, OUTPUT_DIR, CSV_FILE
+
+    DATA_ROOT = _find_data_root(root_dir)
 
     OUTPUT_DIR = os.path.join(DATA_ROOT, "images")
     CSV_FILE = os.path.join(DATA_ROOT, "dataset.csv")
@@ -119,5 +157,94 @@ def generate_dataset(force=False, root_dir=None, num_images=NUM_IMAGES):
     print("Terminé !")
 
 
+# --- GENERATION PARALLELE ---
+# Le dataset est découpé en shards de SHARD_SIZE images, rendus par un pool de
+# processus qui ont chacun leur ImageCaptcha. Le shard k est écrit dans
+# images/shard_k/ avec son index shards/shard_k.csv, et tiré avec une graine
+# dérivée de (seed, k) : le résultat ne dépend pas du nombre de workers, et deux
+# valeurs de --seed donnent des shards indépendants. Les index sont
+# ensuite fusionnés en dataset.csv / train.csv / val.csv, dans le format de
+# generate_dataset (filename relatif à images/, Label).
+
+_worker_captcha = None
+
+
+def _init_worker():
+    global _worker_captcha
+    _worker_captcha = make_captcha()
+
+
+def shard_seed(seed, shard):
+    # seed + shard ferait que --seed 1 rejoue les shards 1..N de --seed 0
+    return int(np.random.SeedSequence([seed, shard]).generate_state(1)[0])
+
+
+def _generate_shard(data_root, shard, start, count, seed):
+    seed_captcha(shard_seed(seed, shard))
+    name = f"shard_{shard:04d}"
+    shard_dir = os.path.join(data_root, "images", name)
+    os.makedirs(shard_dir, exist_ok=True)
+    rows = []
+    for i in range(start, start + count):
+        text = generate_random_length_text()
+        filename = f"{name}/{i}.png"
+        _worker_captcha.write(text, os.path.join(data_root, "images", filename))
+        rows.append([filename, text])
+    csv_path = os.path.join(data_root, "shards", f"{name}.csv")
+    pd.DataFrame(rows, columns=["filename", "Label"]).to_csv(csv_path, index=False)
+    return csv_path
+
+
+def generate_dataset_parallel(force=False, root_dir=None, num_images=NUM_IMAGES, num_workers=None,
+                              shard_size=SHARD_SIZE, seed=0):
+    data_root = _find_data_root(root_dir)
+    images_dir = os.path.join(data_root, "images")
+    os.makedirs(images_dir, exist_ok=True)
+    os.makedirs(os.path.join(data_root, "shards"), exist_ok=True)
+    if os.listdir(images_dir) and not force:
+        raise Exception("There is already data in images")
+
+    num_workers = num_workers or os.cpu_count() or 1
+    starts = list(range(0, num_images, shard_size))
+    print(f"Génération de {num_images} captchas image : {len(starts)} shards, {num_workers} workers...")
+
+    start_time = time.time()
+    with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker) as pool:
+        futures = [
+            pool.submit(_generate_shard, data_root, shard, start, min(shard_size, num_images - start), seed)
+            for shard, start in enumerate(starts)
+        ]
+        shard_csvs = []
+        for done, future in enumerate(futures, 1):
+            shard_csvs.append(future.result())
+            print(f"  {done}/{len(starts)} shards...")
+    elapsed = time.time() - start_time
+    print(f"{num_images} images en {elapsed:.1f}s ({num_images / elapsed:.0f} images/s)")
+
+    print("Writing dataset.csv...")
+    df = pd.concat([pd.read_csv(path) for path in shard_csvs], ignore_index=True)
+    df.to_csv(os.path.join(data_root, "dataset.csv"), index=False)
+
+    print("Generating train/val splits...")
+    train_df, val_df = train_test_split(df, test_size=0.1, random_state=42)
+    train_df.to_csv(os.path.join(data_root, "train.csv"), index=False)
+    val_df.to_csv(os.path.join(data_root, "val.csv"), index=False)
+    print("Terminé !")
+
+
 if __name__ == "__main__":
-    generate_dataset()
+    parser = argparse.ArgumentParser(description="Génération du dataset de captchas")
+    parser.add_argument("--num-images", type=int, default=NUM_IMAGES)
+    parser.add_argument("--root", default=None, help="dossier data (défaut : data ou ../data)")
+    parser.add_argument("--force", action="store_true", help="régénérer même si des images existent")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="génération parallèle par shards sur N processus (défaut : séquentielle)")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+    parser.add_argument("--seed", type=int, default=0, help="graine des shards (génération parallèle)")
+    args = parser.parse_args()
+
+    if args.workers:
+        generate_dataset_parallel(args.force, args.root, args.num_images, args.workers, args.shard_size,
+                                  args.seed)
+    else:
+        generate_dataset(args.force, args.root, args.num_images)
@@ -1,12 +1,16 @@
 import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
-import math
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.physics import cartpole_params, cartpole_step_single
 
 class SwingUpCartPoleEnv(gym.Env):
     metadata = {"render_modes": ["rgb_array"], "render_fps": 50}
 
-    def __init__(self):
+    def __init__(self, integrator="euler", substeps=1):
         super(SwingUpCartPoleEnv, self).__init__()
         
         self.gravity = 9.8
@@ -17,6 +21,8 @@ class SwingUpCartPoleEnv(gym.Env):
         self.polemass_length = (self.masspole * self.length)
         self.force_mag = 20.0 # PLUS PUISSANT (Avant 10.0)
         self.tau = 0.02 
+        self.integrator = integrator # Integration scheme, see common/integrators.py
+        self.substeps = substeps
         self.x_threshold = 5.0 # Augmenté (était 2.4)
 
         self.action_space = spaces.Discrete(2)
@@ -26,62 +32,23 @@ class SwingUpCartPoleEnv(gym.Env):
         self.observation_space = spaces.Box(-high, high, dtype=np.float32)
 
         self.state = None
+        # Paramètres physiques lus une seule fois pour le noyau de step (common/physics.py)
+        self.params = cartpole_params(self).ravel()
 
     def step(self, action):
-        x, x_dot, theta, theta_dot = self.state
-        force = self.force_mag if action == 1 else -self.force_mag
-        
-        costheta = math.cos(theta)
-        sintheta = math.sin(theta)
-
-        temp = (force + self.polemass_length * theta_dot ** 2 * sintheta) / self.total_mass
-        thetaacc = (self.gravity * sintheta - costheta * temp) / (self.length * (4.0 / 3.0 - self.masspole * costheta ** 2 / self.total_mass))
-        xacc = temp - self.polemass_length * thetaacc * costheta / self.total_mass
-
-        x = x + self.tau * x_dot
-        x_dot = x_dot + self.tau * xacc
-        theta = theta + self.tau * theta_dot
-        theta_dot = theta_dot + self.tau * thetaacc
-
-        # --- CORRECTION TYPE ---
-        # On sauvegarde en numpy array pour pouvoir le modifier via l'interface plus tard
-        self.state = np.array([x, x_dot, theta, theta_dot], dtype=np.float32)
-
-        # --- NOUVELLE FONCTION DE RÉCOMPENSE (Optimisée V3.2 - HIGH POWER) ---
-        
-        # 1. Angle: 
-        # Base: -1 (Bas) à +1 (Haut)
-        reward_theta = np.cos(theta)
-        
-        # BONUS CRITIQUE : Si on est presque vertical, on donne un gros bonbon.
-        # C'est ça qui va lui apprendre à MAINTENIR l'équilibre.
-        if reward_theta > 0.95:
-            reward_theta += 10.0 
-
-        # 2. Position: Pénalité quadratique
-        # On veut qu'il reste au centre (0), mais on tolère un peu de mouvement
-        reward_x = -0.2 * (x**2)
-        
-        # 3. Vitesse Pendule: 
-        # On punit la vitesse angulaire SEULEMENT si on est proche de l'équilibre
-        # Pour forcer la stabilisation immobile.
-        reward_vel = 0.0
-        if np.cos(theta) > 0.8:
-            reward_vel = -0.5 * (theta_dot**2) # Pénalité forte sur la rotation rapide en haut
-        
-        reward = float(reward_theta + reward_x + reward_vel)
-
-        # DEBUG: Voir ce que le réseau voit
-        # if np.abs(x) < 0.1: # Pour ne pas spammer, on affiche que au début
-        #    print(f"Action: {action} | Obs: x={x:.2f}, dx={x_dot:.2f}, th={theta:.2f}, dth={theta_dot:.2f} | Rew: {reward:.2f}")
-
-        terminated = bool(x < -self.x_threshold or x > self.x_threshold)
-        
+        force_input = 1.0 if action == 1 else -1.0
+
+        # --- PHYSIQUE + RÉCOMPENSE (Optimisée V3.2 - HIGH POWER) ---
+        # Noyau commun à V3-V6 (common/physics.py, compilé par Numba si disponible).
+        # Récompense : cos(theta) + gros bonus (+10) si presque vertical,
+        # pénalité quadratique sur x, pénalité de rotation seulement près de l'équilibre
+        # (détail dans SPECS["v3"], common/reward_spec.py).
+        obs, reward, terminated = cartpole_step_single(
+            self.state, force_input, self.params, "v3", self.integrator, self.substeps
+        )
+        # self.state (float32) est mis à jour sur place : on peut toujours le modifier
+        # via l'interface (visualize.py).
         # Pas de bonus discret (+1) pour éviter les sauts de gradient
-        
-        terminated = bool(x < -self.x_threshold or x > self.x_threshold)
-        
-        obs = np.array([x, x_dot, np.cos(theta), np.sin(theta), theta_dot], dtype=np.float32)
 
         return obs, reward, terminated, False, {}
 
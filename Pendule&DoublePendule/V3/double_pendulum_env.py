@@ -1,13 +1,18 @@
 import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
-import math
-from scipy.integrate import odeint
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.integrators import integrate
+from common.physics import double_pendulum_accelerations
+from common.reward_spec import scalar_reward
 
 class DoubleSwingUpCartPoleEnv(gym.Env):
     metadata = {"render_modes": ["rgb_array"], "render_fps": 50}
 
-    def __init__(self):
+    def __init__(self, integrator="euler", substeps=1):
         super(DoubleSwingUpCartPoleEnv, self).__init__()
         
         # --- PARAMETRES PHYSIQUES ---
@@ -19,6 +24,8 @@ class DoubleSwingUpCartPoleEnv(gym.Env):
         self.l2 = 0.5       # Longueur 2
         self.force_mag = 20.0
         self.dt = 0.02      # Pas de temps simulation
+        self.integrator = integrator # Schéma d'intégration (voir common/integrators.py)
+        self.substeps = substeps     # Sous-pas par pas de contrôle
         self.x_threshold = 5.0
 
         # Actions: Force continue entre -1 et 1 (multipliée par force_mag)
@@ -31,51 +38,22 @@ class DoubleSwingUpCartPoleEnv(gym.Env):
         self.observation_space = spaces.Box(-high, high, dtype=np.float32)
 
         self.state = None
+        # Récompense déclarée dans common/reward_spec.py (SPECS["double"])
+        self.reward_fn = scalar_reward("double")
 
     def deriv(self, state, t, f):
         # State = [x, x_dot, th1, th1_dot, th2, th2_dot]
         x, x_dot, th1, th1_dot, th2, th2_dot = state
         
-        # Force d'entrée
-        u = f
-        
-        # Raccourcis
-        s1, c1 = math.sin(th1), math.cos(th1)
-        s2, c2 = math.sin(th2), math.cos(th2)
-        s12 = math.sin(th1 - th2)
-        
-        # Masses combinées
-        m = self.m1 + self.m2
-        M = self.m_cart + m
-
         # Équations du mouvement (Lagrangien simplifié pour double pendule sur chariot)
         # C'est un système A * acceleration = B
-        # A est la matrice de masse (inertie)
-        # B est le vecteur des forces (gravité, coriolis, input)
-        
-        # Matrice A (3x3) pour [x_acc, th1_acc, th2_acc]
-        # x_acc termes: M, l1*m*c1, m2*l2*c2
-        # th1_acc termes: l1*m*c1, l1*l1*m, l1*l2*m2*c12
-        # th2_acc termes: m2*l2*c2, l1*l2*m2*c12, l2*l2*m2
-        
-        # Pour simplifier et éviter d'importer scipy.linalg ou numpy.linalg lourd dans la boucle step,
-        # on écrit les équations explicitement ou on utilise numpy solve.
-        
-        A = np.array([
-            [M,              self.l1*m*c1,       self.m2*self.l2*c2],
-            [self.l1*m*c1,   self.l1**2*m,       self.l1*self.l2*self.m2*math.cos(th1-th2)],
-            [self.m2*self.l2*c2, self.l1*self.l2*self.m2*math.cos(th1-th2), self.l2**2*self.m2]
-        ])
-
-        B = np.array([
-            u + self.l1*m*s1*th1_dot**2 + self.m2*self.l2*s2*th2_dot**2, # Coriolis/Centrifuge sur x
-            -self.l1*self.l2*self.m2*s12*th2_dot**2 + m*self.g*self.l1*s1, # Gravité + interaction sur th1
-            self.l1*self.l2*self.m2*s12*th1_dot**2 + self.m2*self.g*self.l2*s2 # Gravité + interaction sur th2
-        ])
-
-        # Résolution A * acc = B
-        # acc = [x_acc, th1_acc, th2_acc]
-        acc = np.linalg.solve(A, B)
+        # A est la matrice de masse (inertie), B le vecteur des forces (gravité, coriolis, input)
+        # Le système 3x3 est résolu en forme fermée (voir common/physics.py),
+        # sans np.array ni np.linalg.solve à chaque pas.
+        acc = double_pendulum_accelerations(
+            th1, th1_dot, th2, th2_dot, f,
+            self.g, self.m_cart, self.m1, self.m2, self.l1, self.l2
+        )
         
         return np.array([x_dot, acc[0], th1_dot, acc[1], th2_dot, acc[2]])
 
@@ -83,53 +61,21 @@ class DoubleSwingUpCartPoleEnv(gym.Env):
         # Action est un tableau numpy, on prend la valeur scalaire
         force = float(action[0]) * self.force_mag
         
-        # Intégration Euler semi-implicite (plus simple et rapide que RK4 pour RL)
-        # Ou Euler simple si le pas de temps est petit.
-        # Ici on fait une approximation simple pour la rapidité :
-        
-        # On récupère les dérivées à l'instant t
-        derivs = self.deriv(self.state, 0, force)
-        
-        # Mise à jour état (Euler Integration)
-        self.state = self.state + derivs * self.dt
+        # Intégration (Euler explicite par défaut, cf. self.integrator / self.substeps)
+        # RK4 ou des sous-pas permettent un dt plus grand à précision égale.
+        self.state = integrate(lambda s: self.deriv(s, 0, force), self.state, self.dt, self.integrator, self.substeps)
         
         # Unpack
         x, x_dot, th1, th1_dot, th2, th2_dot = self.state
 
-        # --- REWARD FUNCTION (Optimisée Swing-Up + Balance) ---
-        
-        # 1. Alignement vertical (Hauteur des pointes)
-        # Partie "Guidage Global" : Encourage à monter le plus haut possible.
-        # Va de -2 (tout en bas) à +2 (tout en haut).
-        reward_height = np.cos(th1) + np.cos(th2)
-        
-        # Partie "Précision" : Uniquement quand on est proche du but.
-        # C'est ça qui verrouille l'équilibre.
-        cos_dist_1 = (1.0 - np.cos(th1)) 
-        cos_dist_2 = (1.0 - np.cos(th2))
-        reward_precision = np.exp(-2.0 * (cos_dist_1 + cos_dist_2))
-        
-        # 2. Pénalité de Vitesse (Ajustée)
-        # On pénalise la vitesse, MAIS on doit permettre l'élan pour monter.
-        # Donc on réduit un peu la pénalité par rapport à avant, ou on accepte que monter coûte un peu.
-        penalty_spin = -0.05 * (th1_dot**2) - 0.1 * (th2_dot**2)
-        
-        # 3. Pénalité distance chariot et Vitesse chariot
-        penalty_cart = -0.1 * (x**2) - 0.05 * (x_dot**2)
-        
-        # 4. Bonus d'équilibre parfait
-        bonus_static = 0.0
-        if cos_dist_1 < 0.1 and cos_dist_2 < 0.1:
-            if abs(th1_dot) < 1.0 and abs(th2_dot) < 1.0:
-                bonus_static = 5.0
-
-        # Total : On combine le guidage (x2) et la précision (x10)
-        # Si on est en bas : Height=-2, Prec=0 -> Reward faible mais on veut monter.
-        # Si on est en haut : Height=2, Prec=1 -> Reward MAX.
-        reward = float(2.0 * reward_height + 10.0 * reward_precision + penalty_spin + penalty_cart + bonus_static)
-
         # Conditions d'arrêt
         terminated = bool(x < -self.x_threshold or x > self.x_threshold)
+
+        # --- REWARD FUNCTION (Optimisée Swing-Up + Balance) ---
+        # Hauteur des pointes (guidage global, x2) + précision près du but (x10),
+        # pénalités de vitesse des pendules et du chariot, bonus d'équilibre parfait
+        # (détail dans SPECS["double"], common/reward_spec.py).
+        reward = float(self.reward_fn(x, x_dot, th1, th1_dot, th2, th2_dot, float(action[0]), terminated))
         
         # Normalization implicite dans l'obs (cos/sin sont bornés)
         obs = np.array([
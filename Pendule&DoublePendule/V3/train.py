@@ -5,9 +5,13 @@ from custom_env import SwingUpCartPoleEnv
 from stable_baselines3 import PPO
 from stable_baselines3.common.env_checker import check_env
 import os
+import sys
 import datetime
 from custom_env import SwingUpCartPoleEnv
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.profiling import ProfilingCallback
+
 # Génération d'un nom unique pour cet entraînement
 run_id = datetime.datetime.now().strftime("run_%Y%m%d_%H%M%S")
 
@@ -45,9 +49,12 @@ model = PPO(
 TIMESTEPS = 25000
 TOTAL_LOOPS = 40 # J'augmente à 1 Million de steps (le swing up est dur)
 
+# Temps env / inférence / mise à jour par rollout -> TensorBoard + perf.csv (common/profiling.py)
+callback = ProfilingCallback()
+
 print(f"Début de l'entraînement V3 - ID: {run_id}")
 for i in range(1, TOTAL_LOOPS + 1):
-    model.learn(total_timesteps=TIMESTEPS, reset_num_timesteps=False)
+    model.learn(total_timesteps=TIMESTEPS, reset_num_timesteps=False, callback=callback)
     model.save(f"{models_dir}/{TIMESTEPS*i}")
     print(f"Sauvegarde {i}/{TOTAL_LOOPS}")
 
@@ -1,11 +1,27 @@
 from stable_baselines3 import PPO
-from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
+from stable_baselines3.common.vec_env import VecNormalize
 from stable_baselines3.common.env_checker import check_env
 import os
+import sys
 import datetime
 import gymnasium as gym
 from double_pendulum_env import DoubleSwingUpCartPoleEnv
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.checkpoints import record_checkpoint, reward_stats
+from common.curriculum import Curriculum, CurriculumCallback
+from common.profiling import ProfilingCallback
+from common.double_vec_env import DoubleSwingUpCartPoleVecEnv
+
+# Nombre de doubles pendules simulés en parallèle (un seul objet, calcul vectorisé)
+NUM_ENVS = 16
+
+# Curriculum sur les départs (common/curriculum.py) : 90% de départs en haut au
+# début, jusqu'au 50/50 d'origine quand l'équilibre est acquis. Les épisodes
+# sont alors limités à MAX_EPISODE_STEPS pas (10 s) pour compter les succès.
+CURRICULUM = False
+MAX_EPISODE_STEPS = 500
+
 # Génération d'un nom unique
 run_id = datetime.datetime.now().strftime("double_run_%Y%m%d_%H%M%S")
 
@@ -24,10 +40,14 @@ print("Vérification de l'environnement Double Pendule...")
 check_env(env)
 print("Environnement OK.")
 
-# 3. Wrapping pour la normalisation automatique (CRITIQUE pour le double pendule)
+# 3. Env vectorisé + normalisation automatique (CRITIQUE pour le double pendule)
 # VecNormalize va centrer et réduire les obs et les rewards, ce qui aide énormément le réseau.
-env = DummyVecEnv([lambda: DoubleSwingUpCartPoleEnv()])
-env = VecNormalize(env, norm_obs=True, norm_reward=True, clip_obs=10.)
+batch_env = DoubleSwingUpCartPoleVecEnv(num_envs=NUM_ENVS, max_episode_steps=MAX_EPISODE_STEPS if CURRICULUM else None)
+env = VecNormalize(batch_env, norm_obs=True, norm_reward=True, clip_obs=10.)
+# Temps env / inférence / mise à jour par rollout -> TensorBoard + perf.csv (common/profiling.py)
+callback = [ProfilingCallback()]
+if CURRICULUM:
+    callback.append(CurriculumCallback(Curriculum(batch_env), verbose=1))
 
 # Hyperparamètres
 model = PPO(
@@ -36,7 +56,7 @@ model = PPO(
     verbose=1, 
     tensorboard_log=log_dir, 
     learning_rate=0.0003,
-    n_steps=2048,   
+    n_steps=2048 // NUM_ENVS, # Même taille de rollout (2048 transitions) qu'avec un seul env
     batch_size=64,
     n_epochs=10,
     gamma=0.99,
@@ -50,11 +70,12 @@ TOTAL_LOOPS = 40
 print(f"Début de l'entraînement Double Pendule - ID: {run_id}")
 
 for i in range(1, TOTAL_LOOPS + 1):
-    model.learn(total_timesteps=TIMESTEPS, reset_num_timesteps=False)
+    model.learn(total_timesteps=TIMESTEPS, reset_num_timesteps=False, callback=callback)
     
     # On sauvegarde le modèle ET les stats de normalisation
     model.save(f"{models_dir}/{TIMESTEPS*i}")
     env.save(f"{models_dir}/{TIMESTEPS*i}_env.pkl") 
+    record_checkpoint(models_dir, TIMESTEPS*i, f"{models_dir}/{TIMESTEPS*i}", f"{models_dir}/{TIMESTEPS*i}_env.pkl", reward_stats(model))
     
     print(f"Sauvegarde {i}/{TOTAL_LOOPS}")
 
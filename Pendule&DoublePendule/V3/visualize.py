@@ -5,8 +5,12 @@ import math
 from custom_env import SwingUpCartPoleEnv # Important !
 
 import os
+import sys
 import glob
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.replay import main as replay_main
+
 # --- CONFIGURATION ---
 def get_latest_model():
     # Chemin absolu du dossier V3
@@ -158,4 +162,8 @@ def run_visualizer():
     env.close()
 
 if __name__ == "__main__":
-    run_visualizer()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "--replay":
+        # Relecture d'enregistrements (common/recorder.py) : ni modèle, ni simulation
+        replay_main(sys.argv[2:])
+    else:
+        run_visualizer()
\ No newline at end of file
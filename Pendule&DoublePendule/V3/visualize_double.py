@@ -3,41 +3,29 @@ from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
 import pygame
 import numpy as np
 import math
-import glob
 import os
+import sys
 from double_pendulum_env import DoubleSwingUpCartPoleEnv
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.checkpoints import latest_checkpoint, latest_run
+from common.replay import main as replay_main
+
 # --- CONFIGURATION ---
 WIDTH, HEIGHT = 1200, 600
 SCALE = 100 
 
 def get_latest_model_dir():
-    # Cherche le dernier dossier créé dans models/PPO_DoublePendulum
+    # Dossier du dernier run sauvegardé dans models/PPO_DoublePendulum (index LATEST.json)
     current_dir = os.path.dirname(os.path.abspath(__file__))
     base_dir = os.path.join(current_dir, "models", "PPO_DoublePendulum")
-        
-    if not os.path.exists(base_dir): return None
-
-    # Trouve tous les sous-dossiers (double_run_...)
-    subdirs = [os.path.join(base_dir, d) for d in os.listdir(base_dir) if os.path.isdir(os.path.join(base_dir, d))]
-    if not subdirs: return None
-    
-    # Prend le plus récent
-    latest_dir = max(subdirs, key=os.path.getmtime)
-    return latest_dir
+    return latest_run(base_dir)
 
 def get_latest_files(model_dir):
-    # Trouve le dernier zip et le dernier env.pkl
-    zips = glob.glob(os.path.join(model_dir, "*.zip"))
-    if not zips: return None, None
-    
-    latest_zip = max(zips, key=lambda x: int(os.path.basename(x).split('_')[0]) if os.path.basename(x).split('_')[0].isdigit() else (int(os.path.basename(x).split('.')[0]) if os.path.basename(x).split('.')[0].isdigit() else 0))
-    
-    # Le fichier env correspondant
-    base_name = os.path.splitext(latest_zip)[0]
-    env_path = base_name + "_env.pkl"
-    
-    return latest_zip, env_path
+    # Dernier checkpoint du manifest du run, avec ses stats de normalisation
+    checkpoint = latest_checkpoint(model_dir)
+    if not checkpoint: return None, None
+    return checkpoint["path"], checkpoint["norm_stats_path"]
 
 def run_visualizer():
     model_dir = get_latest_model_dir()
@@ -56,7 +44,7 @@ def run_visualizer():
     env = DummyVecEnv([lambda: DoubleSwingUpCartPoleEnv()])
     
     # 2. Charger les stats de normalisation (Moyenne/Variance) apprises
-    if os.path.exists(env_path):
+    if env_path and os.path.exists(env_path):
         print(f"Chargement normalisation : {env_path}")
         env = VecNormalize.load(env_path, env)
         env.training = False # IMPORTANT: Ne pas mettre à jour les stats en test
@@ -172,4 +160,8 @@ def run_visualizer():
     env.close()
 
 if __name__ == "__main__":
-    run_visualizer()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "--replay":
+        # Relecture d'enregistrements (common/recorder.py) : ni modèle, ni simulation
+        replay_main(sys.argv[2:])
+    else:
+        run_visualizer()
\ No newline at end of file
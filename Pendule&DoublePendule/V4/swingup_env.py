@@ -2,11 +2,16 @@ import gymnasium as gym
 from gymnasium import spaces
 import numpy as np
 import math
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.physics import cartpole_params, cartpole_step_single
 
 class SwingUpCartPoleEnv(gym.Env):
     metadata = {"render_modes": ["rgb_array"], "render_fps": 50}
 
-    def __init__(self):
+    def __init__(self, integrator="euler", substeps=1):
         super(SwingUpCartPoleEnv, self).__init__()
         
         self.gravity = 9.8
@@ -17,6 +22,8 @@ class SwingUpCartPoleEnv(gym.Env):
         self.polemass_length = (self.masspole * self.length)
         self.force_mag = 20.0 
         self.tau = 0.02 
+        self.integrator = integrator # Integration scheme, see common/integrators.py
+        self.substeps = substeps
         self.x_threshold = 15.0 
 
         self.action_space = spaces.Discrete(2)
@@ -32,65 +39,20 @@ class SwingUpCartPoleEnv(gym.Env):
         self.observation_space = spaces.Box(-high, high, dtype=np.float32)
 
         self.state = None
+        # Physics parameters read once for the step kernel (common/physics.py)
+        self.params = cartpole_params(self).ravel()
 
     def step(self, action):
-        # Ensure state is unpacked as native floats for internal math
-        x, x_dot, theta, theta_dot = self.state.tolist()
-        
-        force = self.force_mag if action == 1 else -self.force_mag
-        
-        costheta = math.cos(theta)
-        sintheta = math.sin(theta)
-
-        temp = (force + self.polemass_length * theta_dot ** 2 * sintheta) / self.total_mass
-        thetaacc = (self.gravity * sintheta - costheta * temp) / (self.length * (4.0 / 3.0 - self.masspole * costheta ** 2 / self.total_mass))
-        xacc = temp - self.polemass_length * thetaacc * costheta / self.total_mass
-
-        x = x + self.tau * x_dot
-        x_dot = x_dot + self.tau * xacc
-        theta = theta + self.tau * theta_dot
-        theta_dot = theta_dot + self.tau * thetaacc
-
-        self.state = np.array([x, x_dot, theta, theta_dot], dtype=np.float32)
-
-        # --- REWARD (Explicitly native Python floats) ---
-        r_theta = math.cos(theta)
-        
-        # 2. Radical Position Penalty
-        # Base penalty increased
-        r_x = -0.2 * (x**2) 
-        
-        # "Zone of Death": If you go beyond 4 meters, massive penalty
-        if abs(x) > 4.0:
-            r_x -= 5.0
-            
-        # "Wrong Way" Penalty: If far (> 3m) AND moving away from center
-        if abs(x) > 3.0 and (x * x_dot > 0):
-            r_x -= 5.0
-
-        # 3. Cart Velocity Penalty: Prevent "charging"
-        r_cart_vel = -0.01 * (x_dot**2)
-        
-        # 4. Modified Velocity Penalty: Stricter when upright
-        r_vel = 0.0
-        if r_theta > 0.0:
-            r_vel = -0.5 * (theta_dot**2) * r_theta
-
-        # 5. Stability Bonus: ONLY IF NEAR CENTER
-        r_stability = 0.0
-        if r_theta > 0.95 and abs(theta_dot) < 2.0:
-            if abs(x) < 2.0: # Condition sine qua non: stay in the middle
-                r_stability = 10.0
-            else:
-                # No bonus at all if far away now. Radical.
-                r_stability = 0.0
-
-        reward = float(r_theta + r_x + r_cart_vel + r_vel + r_stability)
-
-        terminated = bool(x < -self.x_threshold or x > self.x_threshold)
-        
-        # Observation must be float32 array
-        obs = np.array([x, x_dot, math.cos(theta), math.sin(theta), theta_dot], dtype=np.float32)
+        force_input = 1.0 if action == 1 else -1.0
+
+        # Physics + reward from the shared core (common/physics.py, Numba-compiled when available).
+        # V4 reward: cos(theta), radical position penalty ("zone of death" beyond 4 m,
+        # "wrong way" beyond 3 m), cart velocity penalty, stricter spin penalty when upright,
+        # stability bonus only near the center (see SPECS in common/reward_spec.py).
+        obs, reward, terminated = cartpole_step_single(
+            self.state, force_input, self.params, "v4", self.integrator, self.substeps
+        )
+        # self.state (float32) is updated in place, obs is float32 [x, x_dot, cos, sin, theta_dot]
 
         return obs, reward, terminated, False, {}
 
@@ -1,19 +1,22 @@
 import os
-import glob
+import sys
 from stable_baselines3 import PPO
 from stable_baselines3.common.env_checker import check_env
 from swingup_env import SwingUpCartPoleEnv
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.checkpoints import latest_checkpoint, latest_run, record_checkpoint, reward_stats
+from common.profiling import ProfilingCallback
+
 def get_latest_checkpoint(base_models_dir):
-    """Trouve le fichier .zip le plus récent dans tous les sous-dossiers de base_models_dir."""
-    checkpoint_files = glob.glob(os.path.join(base_models_dir, "**", "*.zip"), recursive=True)
-    if not checkpoint_files:
-        return None, None
-    
-    latest_file = max(checkpoint_files, key=os.path.getmtime)
-    # Extraire le run_id (nom du dossier parent)
-    run_id = os.path.basename(os.path.dirname(latest_file))
-    return latest_file, run_id
+    """Trouve le dernier checkpoint sauvegardé grâce à l'index des runs (manifest.json)."""
+    run_dir = latest_run(base_models_dir)
+    if not run_dir:
+        return None, None, 0
+    checkpoint = latest_checkpoint(run_dir)
+    if not checkpoint:
+        return None, None, 0
+    return checkpoint["path"], os.path.basename(run_dir), checkpoint["step"]
 
 def train():
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -21,18 +24,14 @@ def train():
     base_log_dir = os.path.join(current_dir, "logs_swingup_v4")
 
     # 1. Tenter de reprendre un entraînement
-    latest_checkpoint, run_id = get_latest_checkpoint(base_models_dir)
+    checkpoint_path, run_id, start_step = get_latest_checkpoint(base_models_dir)
     
     env = SwingUpCartPoleEnv()
     
-    if latest_checkpoint:
-        print(f"Reprise de l'entraînement : {latest_checkpoint}")
-        model = PPO.load(latest_checkpoint, env=env)
-        # On extrait le nombre de pas déjà effectués à partir du nom du fichier (ex: 50000.zip)
-        try:
-            start_step = int(os.path.basename(latest_checkpoint).replace(".zip", ""))
-        except ValueError:
-            start_step = 0
+    if checkpoint_path:
+        print(f"Reprise de l'entraînement : {checkpoint_path}")
+        model = PPO.load(checkpoint_path, env=env)
+        # Le nombre de pas déjà effectués est enregistré dans le manifest du run
     else:
         import datetime
         run_id = datetime.datetime.now().strftime("run_%Y%m%d_%H%M%S")
@@ -71,15 +70,20 @@ def train():
 
     print(f"Début/Reprise à l'étape {start_step} (Boucle {current_loop}/{total_loops})")
     
+    # Temps env / inférence / mise à jour par rollout -> TensorBoard + perf.csv (common/profiling.py)
+    callback = ProfilingCallback()
+
     try:
         for i in range(current_loop, total_loops + 1):
-            model.learn(total_timesteps=TIMESTEPS, reset_num_timesteps=False)
+            model.learn(total_timesteps=TIMESTEPS, reset_num_timesteps=False, callback=callback)
             save_path = os.path.join(models_dir, f"{TIMESTEPS * i}")
             model.save(save_path)
+            record_checkpoint(models_dir, TIMESTEPS * i, save_path, reward=reward_stats(model))
             print(f"Sauvegarde effectuée : {save_path}.zip")
     except KeyboardInterrupt:
         print("\nEntraînement interrompu par l'utilisateur. Sauvegarde en cours...")
         model.save(os.path.join(models_dir, "interrupted_model"))
+        record_checkpoint(models_dir, model.num_timesteps, os.path.join(models_dir, "interrupted_model"))
         print("Sauvegardé sous 'interrupted_model.zip'.")
 
     env.close()
@@ -8,6 +8,9 @@ import os
 import glob
 import sys
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.replay import main as replay_main
+
 # --- CONFIGURATION ---
 def get_latest_model():
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -26,7 +29,7 @@ def get_latest_model():
     return latest
 
 # Logic to select model: CLI argument or latest
-if len(sys.argv) > 1:
+if len(sys.argv) > 1 and sys.argv[1] != "--replay":
     MODEL_PATH = sys.argv[1]
     print(f"Using specified model: {MODEL_PATH}")
 else:
@@ -171,4 +174,8 @@ def run_visualizer():
     env.close()
 
 if __name__ == "__main__":
-    run_visualizer()
+    if len(sys.argv) > 1 and sys.argv[1] == "--replay":
+        # Play back recordings (common/recorder.py): no model, no simulation
+        replay_main(sys.argv[2:])
+    else:
+        run_visualizer()
@@ -1,9 +1,14 @@
 import os
+import sys
 import datetime
 from stable_baselines3 import PPO
 from stable_baselines3.common.env_checker import check_env
 from swingup_env_v5 import SwingUpCartPoleEnvV5
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.checkpoints import record_checkpoint, reward_stats
+from common.profiling import ProfilingCallback
+
 def train():
     # 1. Directories
     run_id = datetime.datetime.now().strftime("run_%Y%m%d_%H%M%S")
@@ -41,12 +46,16 @@ def train():
     TIMESTEPS = 25000
     TOTAL_LOOPS = 40 # 1M steps
 
+    # Env step / inference / update time per rollout -> TensorBoard + perf.csv (common/profiling.py)
+    callback = ProfilingCallback()
+
     print(f"Starting V5 Training (Multiplicative Reward) - ID: {run_id}")
     
     for i in range(1, TOTAL_LOOPS + 1):
-        model.learn(total_timesteps=TIMESTEPS, reset_num_timesteps=False)
+        model.learn(total_timesteps=TIMESTEPS, reset_num_timesteps=False, callback=callback)
         save_path = f"{models_dir}/{TIMESTEPS*i}"
         model.save(save_path)
+        record_checkpoint(models_dir, TIMESTEPS*i, save_path, reward=reward_stats(model))
         print(f"Saved {i}/{TOTAL_LOOPS} -> {save_path}")
 
     env.close()
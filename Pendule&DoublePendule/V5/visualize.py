@@ -7,6 +7,9 @@ import os
 import glob
 from swingup_env_v5 import SwingUpCartPoleEnvV5
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.replay import main as replay_main
+
 # --- CONFIGURATION ---
 def get_latest_model():
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -18,7 +21,7 @@ def get_latest_model():
     if not all_files: return None
     return max(all_files, key=os.path.getmtime)
 
-if len(sys.argv) > 1:
+if len(sys.argv) > 1 and sys.argv[1] != "--replay":
     MODEL_PATH = sys.argv[1]
     print(f"Using specified model: {MODEL_PATH}")
 else:
@@ -132,4 +135,8 @@ def run_visualizer():
     env.close()
 
 if __name__ == "__main__":
-    run_visualizer()
+    if len(sys.argv) > 1 and sys.argv[1] == "--replay":
+        # Play back recordings (common/recorder.py): no model, no simulation
+        replay_main(sys.argv[2:])
+    else:
+        run_visualizer()
@@ -1,19 +1,32 @@
 import os
-import glob
+import sys
 import datetime
 from stable_baselines3 import PPO
-from stable_baselines3.common.vec_env import DummyVecEnv, VecNormalize
-from swingup_env_continuous import SwingUpCartPoleEnvV6
+from stable_baselines3.common.vec_env import VecNormalize
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.checkpoints import latest_checkpoint, latest_run, record_checkpoint, reward_stats
+from common.curriculum import Curriculum, CurriculumCallback
+from common.profiling import ProfilingCallback
+from common.vec_env import SwingUpCartPoleVecEnv
+
+# Carts simulated in parallel by the batched env.
+# n_steps is divided accordingly so one PPO rollout still holds 2048 transitions.
+NUM_ENVS = 16
+
+# Curriculum on the starting angle (common/curriculum.py): starts near the top,
+# moves to pi +- 1.0 as balance improves. Episodes are then limited to
+# MAX_EPISODE_STEPS steps (10 s) so that successes can be counted.
+CURRICULUM = False
+MAX_EPISODE_STEPS = 500
 
 def get_latest_checkpoint(base_dir):
-    checkpoint_files = glob.glob(os.path.join(base_dir, "**", "*.zip"), recursive=True)
-    if not checkpoint_files:
+    # Read from the run index (manifest.json), no scan of the .zip files
+    run_dir = latest_run(base_dir)
+    checkpoint = latest_checkpoint(run_dir) if run_dir else None
+    if not checkpoint:
         return None, None, None
-    
-    latest_file = max(checkpoint_files, key=os.path.getmtime)
-    run_dir = os.path.dirname(latest_file)
-    run_id = os.path.basename(run_dir)
-    return latest_file, run_dir, run_id
+    return checkpoint, run_dir, os.path.basename(run_dir)
 
 def train():
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -23,21 +36,18 @@ def train():
     latest_checkpoint, run_dir, run_id = get_latest_checkpoint(base_models_dir)
 
     def make_env():
-        return SwingUpCartPoleEnvV6()
+        return SwingUpCartPoleVecEnv(num_envs=NUM_ENVS, version="v6",
+                                     max_episode_steps=MAX_EPISODE_STEPS if CURRICULUM else None)
 
     if latest_checkpoint:
         print(f"Reprise de l'entraînement : {run_id}")
         
         # REMOVED NORMALIZATION FOR DEBUGGING
-        env = DummyVecEnv([make_env])
+        env = make_env()
         # env = VecNormalize.load(stats_path, env) 
         
-        model = PPO.load(latest_checkpoint, env=env)
-        
-        try:
-            start_step = int(os.path.basename(latest_checkpoint).replace(".zip", ""))
-        except:
-            start_step = 0
+        model = PPO.load(latest_checkpoint["path"], env=env, custom_objects={"n_steps": 2048 // NUM_ENVS})
+        start_step = latest_checkpoint["step"]
     else:
         run_id = datetime.datetime.now().strftime("run_%Y%m%d_%H%M%S")
         print(f"Nouveau run : {run_id}")
@@ -48,12 +58,12 @@ def train():
         os.makedirs(log_dir, exist_ok=True)
         
         # REMOVED NORMALIZATION FOR DEBUGGING
-        env = DummyVecEnv([make_env])
+        env = make_env()
         # env = VecNormalize(env, norm_obs=True, norm_reward=True, clip_obs=10.)
         
         model = PPO(
             "MlpPolicy", env, verbose=1, tensorboard_log=log_dir,
-            learning_rate=0.0003, n_steps=2048, batch_size=64,
+            learning_rate=0.0003, n_steps=2048 // NUM_ENVS, batch_size=64,
             use_sde=True
         )
         start_step = 0
@@ -62,17 +72,23 @@ def train():
     TOTAL_STEPS = 1000000
     current_loop = (start_step // TIMESTEPS) + 1
     total_loops = TOTAL_STEPS // TIMESTEPS
+    # Time of env steps / inference / updates per rollout -> TensorBoard + perf.csv (common/profiling.py)
+    callback = [ProfilingCallback()]
+    if CURRICULUM:
+        callback.append(CurriculumCallback(Curriculum(env), verbose=1))
 
     try:
         for i in range(current_loop, total_loops + 1):
-            model.learn(total_timesteps=TIMESTEPS, reset_num_timesteps=False)
+            model.learn(total_timesteps=TIMESTEPS, reset_num_timesteps=False, callback=callback)
             steps = TIMESTEPS * i
             model.save(os.path.join(run_dir, f"{steps}"))
+            record_checkpoint(run_dir, steps, os.path.join(run_dir, f"{steps}"), reward=reward_stats(model))
             # env.save(os.path.join(run_dir, "vec_normalize.pkl")) # No norm stats to save
             print(f"Sauvegarde étape {steps}")
     except KeyboardInterrupt:
         print("\nInterrompu. Sauvegarde...")
         model.save(os.path.join(run_dir, "interrupted"))
+        record_checkpoint(run_dir, model.num_timesteps, os.path.join(run_dir, "interrupted"))
         # env.save(os.path.join(run_dir, "vec_normalize.pkl"))
 
     env.close()
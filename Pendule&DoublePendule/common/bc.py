@@ -0,0 +1,275 @@
+# Behaviour-cloning warm start of PPO on V6 from controller demonstrations.
+#
+# 1. collect: a controller (CEM planner of common/mpc.py by default) drives
+#    batched V6 envs with 5 s episodes, so the demonstrations hold many
+#    swing-ups and not only balancing. Rollouts are written with the
+#    trajectory recorder (common/recorder.py), one recording per worker.
+# 2. pretrain: the SB3 MlpPolicy of a fresh PPO model (same settings as
+#    V6/train.py) is fitted on the demonstrations: log-likelihood of the
+#    controller's forces for the actor, discounted returns for the critic.
+# 3. PPO continues from that initialization.
+#
+# compare measures the environment steps each start needs to reach a stable
+# upright policy: success rate >= --target on common/evaluate.py episodes,
+# evaluated every --eval-every steps.
+#
+# Usage (from the Pendule&DoublePendule folder):
+#     python -m common.bc collect --envs 16 --steps 2000 --workers 4
+#     python -m common.bc train                   # BC + PPO, saved like V6/train.py
+#     python -m common.bc compare --budget 1000000
+import argparse
+import datetime
+import glob
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import torch
+from stable_baselines3 import PPO
+from stable_baselines3.common.callbacks import BaseCallback
+
+from common.checkpoints import record_checkpoint, reward_stats, write_json
+from common.evaluate import evaluate_policy
+from common.recorder import TrajectoryReader, TrajectoryRecorder
+from common.vec_env import SwingUpCartPoleVecEnv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEMOS_DIR = os.path.join(ROOT, "V6", "demos", "mpc")
+MODELS_DIR = os.path.join(ROOT, "V6", "models", "PPO_SwingUp_V6")
+LOGS_DIR = os.path.join(ROOT, "V6", "logs_swingup_v6")
+
+NUM_ENVS = 16  # as V6/train.py
+EPISODE_STEPS = 250  # 5 s demonstrations
+
+
+# --- DEMONSTRATIONS ---
+
+def collect_worker(out_dir, num_envs, n_steps, seed):
+    from common.mpc import CEMController
+
+    torch.set_num_threads(1)
+    env = TrajectoryRecorder(
+        SwingUpCartPoleVecEnv(num_envs=num_envs, version="v6", seed=seed, max_episode_steps=EPISODE_STEPS),
+        out_dir,
+    )
+    controller = CEMController(seed=seed)
+    obs = env.reset()
+    episode_start = np.ones(num_envs, dtype=bool)
+    for _ in range(n_steps):
+        actions, _ = controller.predict(obs, episode_start=episode_start)
+        obs, _, episode_start, _ = env.step(actions)
+    env.close()
+    return out_dir
+
+
+def collect(out_dir=DEMOS_DIR, num_envs=16, n_steps=2000, num_workers=1, seed=0):
+    """Records ``num_workers`` x ``num_envs`` x ``n_steps`` controller steps into out_dir/worker_XX."""
+    ctx = mp.get_context("forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn")
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=ctx) as pool:
+        futures = [
+            pool.submit(collect_worker, os.path.join(out_dir, f"worker_{k:02d}"), num_envs, n_steps,
+                        seed + k * num_envs)
+            for k in range(num_workers)
+        ]
+        return [future.result() for future in futures]
+
+
+def load_demonstrations(demos_dir, gamma=0.99):
+    """(obs, actions, returns) of every recording of demos_dir, flattened over steps and envs."""
+    obs, actions, returns = [], [], []
+    for path in sorted(glob.glob(os.path.join(demos_dir, "*", "index.json"))):
+        reader = TrajectoryReader(os.path.dirname(path))
+        data = reader.slice(0, len(reader), columns=["obs", "action", "reward", "done"])
+        # Discounted return of every step, cut at the end of the episodes
+        ret = np.zeros_like(data["reward"], dtype=np.float64)
+        running = np.zeros(reader.num_envs)
+        for t in range(len(reader) - 1, -1, -1):
+            running = data["reward"][t] + gamma * running * ~data["done"][t]
+            ret[t] = running
+        obs.append(data["obs"].reshape(-1, data["obs"].shape[-1]))
+        actions.append(data["action"].reshape(len(data["obs"]) * reader.num_envs, -1))
+        returns.append(ret.reshape(-1))
+    if not obs:
+        raise FileNotFoundError(f"No demonstrations in {demos_dir} (run: python -m common.bc collect)")
+    return np.concatenate(obs), np.concatenate(actions), np.concatenate(returns)
+
+
+# --- PRETRAINING ---
+
+def make_model(env, seed=None, log_dir=None):
+    # Same PPO as V6/train.py
+    return PPO(
+        "MlpPolicy", env, verbose=0, tensorboard_log=log_dir, seed=seed,
+        learning_rate=0.0003, n_steps=2048 // NUM_ENVS, batch_size=64, use_sde=True,
+    )
+
+
+def pretrain(model, obs, actions, returns=None, epochs=20, batch_size=256, learning_rate=1e-3, seed=0):
+    """
+    Supervised fit of ``model.policy`` on the demonstrations: maximizes the
+    log-likelihood of the demonstrated actions and, when ``returns`` is given,
+    regresses the value head on them (the actor and critic networks of
+    MlpPolicy are separate, so the two losses do not compete).
+    Returns the mean negative log-likelihood of every epoch.
+    """
+    policy = model.policy
+    policy.set_training_mode(True)
+    optimizer = torch.optim.Adam(policy.parameters(), lr=learning_rate)
+    device = policy.device
+    obs_t = torch.as_tensor(obs, dtype=torch.float32, device=device)
+    actions_t = torch.as_tensor(np.clip(actions, -1.0, 1.0), dtype=torch.float32, device=device)
+    returns_t = None if returns is None else torch.as_tensor(returns, dtype=torch.float32, device=device)
+    generator = torch.Generator().manual_seed(seed)
+
+    history = []
+    for _ in range(epochs):
+        total, batches = 0.0, 0
+        for idx in torch.randperm(len(obs_t), generator=generator).split(batch_size):
+            values, log_prob, _ = policy.evaluate_actions(obs_t[idx], actions_t[idx])
+            nll = -log_prob.mean()
+            loss = nll
+            if returns_t is not None:
+                loss = loss + 0.5 * torch.nn.functional.mse_loss(values.flatten(), returns_t[idx])
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total, batches = total + nll.item(), batches + 1
+        history.append(total / batches)
+    policy.set_training_mode(False)
+    return history
+
+
+# --- PPO + MEASURE ---
+
+class SuccessCallback(BaseCallback):
+    """
+    Evaluates the policy every ``eval_every`` steps and stops training once
+    its success rate reaches ``target``; ``self.history`` keeps (steps, rate).
+    """
+
+    def __init__(self, eval_every=25_000, target=0.9, n_episodes=100, verbose=0):
+        super().__init__(verbose)
+        self.eval_every = eval_every
+        self.target = target
+        self.n_episodes = n_episodes
+        self.history = []
+        self.reached_at = None
+        self._next_eval = 0
+
+    def evaluate(self):
+        rate = evaluate_policy(self.model, "v6", self.n_episodes, max_steps=500, seed=12345)["success_rate"]
+        self.history.append((self.model.num_timesteps, rate))
+        if self.verbose:
+            print(f"{self.model.num_timesteps:>9} steps : {rate:.1%} de succès")
+        if rate >= self.target and self.reached_at is None:
+            self.reached_at = self.model.num_timesteps
+        return self.reached_at is None
+
+    def _on_training_start(self):
+        self._next_eval = self.num_timesteps + self.eval_every
+
+    def _on_step(self):
+        if self.num_timesteps < self._next_eval:
+            return True
+        self._next_eval += self.eval_every
+        return self.evaluate()
+
+
+def run(demos_dir=None, budget=1_000_000, eval_every=25_000, target=0.9, epochs=20, seed=0):
+    """
+    PPO on V6 from scratch (demos_dir None) or from a BC initialization,
+    until ``target`` success or ``budget`` steps. Returns the measures.
+    """
+    env = SwingUpCartPoleVecEnv(num_envs=NUM_ENVS, version="v6", seed=seed)
+    model = make_model(env, seed)
+    callback = SuccessCallback(eval_every, target, verbose=1)
+    callback.init_callback(model)
+
+    result = {"warm_start": demos_dir is not None, "target": target}
+    if demos_dir is not None:
+        start = time.perf_counter()
+        obs, actions, returns = load_demonstrations(demos_dir, model.gamma)
+        result["demo_samples"] = len(obs)
+        result["bc_nll"] = pretrain(model, obs, actions, returns, epochs=epochs, seed=seed)
+        result["bc_seconds"] = time.perf_counter() - start
+        callback.evaluate()  # the cloned policy alone, at step 0
+
+    start = time.perf_counter()
+    if callback.reached_at is None:
+        model.learn(total_timesteps=budget, callback=callback)
+    result.update(steps_to_target=callback.reached_at, history=callback.history,
+                  ppo_seconds=time.perf_counter() - start, steps=model.num_timesteps)
+    env.close()
+    return result
+
+
+def train(demos_dir=DEMOS_DIR, total_steps=1_000_000, save_every=25_000, epochs=20, seed=None):
+    """BC + PPO with the checkpoints of V6/train.py (models/PPO_SwingUp_V6/bc_run_*)."""
+    run_id = datetime.datetime.now().strftime("bc_run_%Y%m%d_%H%M%S")
+    run_dir = os.path.join(MODELS_DIR, run_id)
+    log_dir = os.path.join(LOGS_DIR, run_id)
+    os.makedirs(run_dir, exist_ok=True)
+    os.makedirs(log_dir, exist_ok=True)
+
+    env = SwingUpCartPoleVecEnv(num_envs=NUM_ENVS, version="v6", seed=seed)
+    model = make_model(env, seed, log_dir)
+    obs, actions, returns = load_demonstrations(demos_dir, model.gamma)
+    print(f"Pré-entraînement sur {len(obs)} transitions de démonstration")
+    for epoch, loss in enumerate(pretrain(model, obs, actions, returns, epochs=epochs), 1):
+        print(f"Epoch {epoch}: -log p(action) {loss:.4f}")
+    model.save(os.path.join(run_dir, "0"))
+    record_checkpoint(run_dir, 0, os.path.join(run_dir, "0"))
+
+    while model.num_timesteps < total_steps:
+        model.learn(total_timesteps=save_every, reset_num_timesteps=False)
+        steps = model.num_timesteps
+        model.save(os.path.join(run_dir, f"{steps}"))
+        record_checkpoint(run_dir, steps, os.path.join(run_dir, f"{steps}"), reward=reward_stats(model))
+        print(f"Sauvegarde étape {steps}")
+    env.close()
+    return run_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Behaviour-cloning warm start of PPO (V6)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("collect", help="record controller demonstrations")
+    p.add_argument("--out", default=DEMOS_DIR)
+    p.add_argument("--envs", type=int, default=16, help="envs per worker")
+    p.add_argument("--steps", type=int, default=2000, help="steps per env")
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--seed", type=int, default=0)
+
+    p = sub.add_parser("train", help="BC pretraining then PPO")
+    p.add_argument("--demos", default=DEMOS_DIR)
+    p.add_argument("--total-steps", type=int, default=1_000_000)
+    p.add_argument("--epochs", type=int, default=20)
+    p.add_argument("--seed", type=int, default=None)
+
+    p = sub.add_parser("compare", help="steps to a stable policy, scratch vs BC")
+    p.add_argument("--demos", default=DEMOS_DIR)
+    p.add_argument("--budget", type=int, default=1_000_000)
+    p.add_argument("--eval-every", type=int, default=25_000)
+    p.add_argument("--target", type=float, default=0.9, help="success rate of a stable policy")
+    p.add_argument("--epochs", type=int, default=20)
+    p.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "collect":
+        for path in collect(args.out, args.envs, args.steps, args.workers, args.seed):
+            print(f"{path} : {len(TrajectoryReader(path)) * args.envs} transitions")
+    elif args.command == "train":
+        print(train(args.demos, args.total_steps, epochs=args.epochs, seed=args.seed))
+    else:
+        results = [run(None, args.budget, args.eval_every, args.target, seed=args.seed),
+                   run(args.demos, args.budget, args.eval_every, args.target, args.epochs, args.seed)]
+        write_json(os.path.join(args.demos, "warm_start.json"), results)
+        for r in results:
+            reached = f"{r['steps_to_target']:,} steps" if r["steps_to_target"] is not None else "non atteint"
+            print(f"{'BC + PPO' if r['warm_start'] else 'PPO seul':<9}: {reached} ({r['ppo_seconds']:.0f} s de PPO)")
+        scratch, warm = (r["steps_to_target"] for r in results)
+        if scratch is not None and warm is not None:
+            print(f"Steps économisés : {scratch - warm:,}")
@@ -0,0 +1,71 @@
+# Benchmark: speed vs accuracy of each integration scheme.
+#
+# 256 free (no force) systems start from random angles and are simulated for
+# SIM_SECONDS. Without force or friction the total energy is conserved, so the
+# energy change at the end measures the integration error.
+#
+# Usage (from the Pendule&DoublePendule folder):
+#     python -m common.bench_integrators
+import time
+
+import numpy as np
+
+from common.integrators import integrate
+from common.physics import (
+    cartpole_derivatives, cartpole_energy,
+    double_pendulum_derivatives, double_pendulum_energy,
+)
+
+NUM_SYSTEMS = 256
+SIM_SECONDS = 10.0
+SCHEMES = [
+    ("euler", 0.02, 1),
+    ("euler", 0.02, 4),
+    ("semi_implicit", 0.02, 1),
+    ("semi_implicit", 0.02, 4),
+    ("rk4", 0.02, 1),
+    ("rk4", 0.05, 1),
+    ("rk4", 0.1, 1),
+]
+
+CARTPOLE = {"gravity": 9.8, "masscart": 1.0, "masspole": 0.1, "length": 0.5}
+DOUBLE = {"g": 9.81, "m_cart": 1.0, "m1": 0.5, "m2": 0.5, "l1": 0.5, "l2": 0.5}
+
+
+def initial_states(dim, rng):
+    state = rng.uniform(-0.5, 0.5, size=(dim, NUM_SYSTEMS))
+    state[2::2] = rng.uniform(-np.pi, np.pi, size=(dim // 2 - 1, NUM_SYSTEMS))
+    return state
+
+
+def run(system, method, dt, substeps, rng):
+    if system == "cartpole":
+        state = initial_states(4, rng)
+        deriv = lambda s: cartpole_derivatives(s, 0.0, **CARTPOLE)
+        energy = lambda s: cartpole_energy(s, **CARTPOLE)
+    else:
+        state = initial_states(6, rng)
+        deriv = lambda s: double_pendulum_derivatives(s, 0.0, **DOUBLE)
+        energy = lambda s: double_pendulum_energy(s, **DOUBLE)
+
+    e0 = energy(state)
+    n_steps = int(round(SIM_SECONDS / dt))
+    start = time.perf_counter()
+    with np.errstate(over="ignore", invalid="ignore"):
+        for _ in range(n_steps):
+            state = integrate(deriv, state, dt, method, substeps)
+        elapsed = time.perf_counter() - start
+        drift = np.abs(energy(state) - e0) / (np.abs(e0) + 1.0)
+
+    steps_per_sec = n_steps * NUM_SYSTEMS / elapsed
+    return steps_per_sec, np.nanmedian(drift), np.isfinite(drift).mean()
+
+
+if __name__ == "__main__":
+    for system in ("cartpole", "double"):
+        print(f"\n--- {system} ({NUM_SYSTEMS} systems, {SIM_SECONDS:.0f} s simulated) ---")
+        print(f"{'scheme':<15}{'dt':>6}{'sub':>5}{'ctrl steps/s':>15}{'energy drift':>15}{'stable':>9}")
+        for method, dt, substeps in SCHEMES:
+            rng = np.random.default_rng(0)
+            sps, drift, stable = run(system, method, dt, substeps, rng)
+            print(f"{method:<15}{dt:>6.2f}{substeps:>5}{sps:>15,.0f}{drift:>15.2e}{stable:>8.0%}")
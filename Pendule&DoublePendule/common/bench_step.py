@@ -0,0 +1,72 @@
+# Micro-benchmark: step latency of every cart-pole env version, for each
+# backend of the physics core (NumPy and, when installed, Numba). On the
+# "numpy" backend the single envs run the scalar step kernel as plain Python.
+#
+# Usage (from the Pendule&DoublePendule folder):
+#     python -m common.bench_step
+import importlib.util
+import os
+import time
+
+import numpy as np
+
+from common import physics
+from common.jit import HAS_NUMBA
+from common.vec_env import SwingUpCartPoleVecEnv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# version -> (file, class) of the single env
+SINGLE_ENVS = {
+    "v3": ("V3/custom_env.py", "SwingUpCartPoleEnv"),
+    "v4": ("V4/swingup_env.py", "SwingUpCartPoleEnv"),
+    "v5": ("V5/swingup_env_v5.py", "SwingUpCartPoleEnvV5"),
+    "v6": ("V6/swingup_env_continuous.py", "SwingUpCartPoleEnvV6"),
+}
+N_STEPS = 20000
+BATCH = 256
+
+
+def load_single_env(version):
+    # V3 and V4 both name their class SwingUpCartPoleEnv, so load by file path
+    path, class_name = SINGLE_ENVS[version]
+    spec = importlib.util.spec_from_file_location(f"env_{version}", os.path.join(ROOT, path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, class_name)()
+
+
+def time_single(env, version):
+    action = np.array([0.5], dtype=np.float32) if version == "v6" else 1
+    env.reset(seed=0)
+    env.step(action)  # JIT warm-up
+    start = time.perf_counter()
+    for _ in range(N_STEPS):
+        _, _, terminated, _, _ = env.step(action)
+        if terminated:
+            env.reset()
+    return (time.perf_counter() - start) / N_STEPS
+
+
+def time_batched(version):
+    env = SwingUpCartPoleVecEnv(num_envs=BATCH, version=version, seed=0)
+    env.reset()
+    actions = np.stack([env.action_space.sample() for _ in range(BATCH)])
+    env.step(actions)  # JIT warm-up
+    n = N_STEPS // 20
+    start = time.perf_counter()
+    for _ in range(n):
+        env.step(actions)
+    return (time.perf_counter() - start) / n
+
+
+if __name__ == "__main__":
+    backends = ["numpy"] + (["numba"] if HAS_NUMBA else [])
+    print(f"{'version':<9}{'backend':<9}{'single env step':>18}{f'batch {BATCH} step':>18}{'carts/s':>14}")
+    for version in SINGLE_ENVS:
+        env = load_single_env(version)
+        for backend in backends:
+            physics.set_backend(backend)
+            single = time_single(env, version)
+            batched = time_batched(version)
+            print(f"{version:<9}{backend:<9}{single * 1e6:>15.1f} us{batched * 1e6:>15.1f} us{BATCH / batched:>14,.0f}")
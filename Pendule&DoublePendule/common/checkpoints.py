@@ -0,0 +1,186 @@
+# Checkpoint index of the training runs.
+#
+# Every run folder (models/PPO_xxx/<run_id>/) holds a manifest.json that lists
+# its checkpoints in save order:
+#     {"run_id": ..., "checkpoints": [{"step", "file", "sha256", "norm_stats",
+#      "norm_sha256", "reward", "time"}, ...]}
+# and the models/PPO_xxx/ folder holds a LATEST.json pointing to the run that
+# saved last. Both files are replaced atomically (write to a temp file, then
+# os.replace), so a crash during a save never leaves a half-written index.
+#
+# Resuming or opening the latest model reads these two small files instead of
+# globbing and stat-ing every .zip. Runs saved before the manifest existed are
+# indexed once, on first access.
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+
+import numpy as np
+
+MANIFEST = "manifest.json"
+LATEST = "LATEST.json"
+
+
+def _umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def write_json(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp_", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file 0600: give the index the usual permissions of the folder
+        os.chmod(tmp_path, 0o666 & ~_umask())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def file_hash(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def reward_stats(model):
+    """Reward statistics of the last rollout of an SB3 model (as seen by PPO)."""
+    rewards = model.rollout_buffer.rewards
+    stats = {
+        "mean": float(np.mean(rewards)),
+        "std": float(np.std(rewards)),
+        "min": float(np.min(rewards)),
+        "max": float(np.max(rewards)),
+    }
+    if model.ep_info_buffer:
+        stats["ep_rew_mean"] = float(np.mean([info["r"] for info in model.ep_info_buffer]))
+    return stats
+
+
+def _legacy_manifest(run_dir):
+    # One-time index of a run saved before the manifest: numeric .zip names, in step order
+    checkpoints = []
+    for name in os.listdir(run_dir):
+        match = re.fullmatch(r"(\d+)\.zip", name)
+        if not match:
+            continue
+        path = os.path.join(run_dir, name)
+        norm_stats = f"{match.group(1)}_env.pkl"
+        has_norm = os.path.exists(os.path.join(run_dir, norm_stats))
+        checkpoints.append({
+            "step": int(match.group(1)),
+            "file": name,
+            "sha256": file_hash(path),
+            "norm_stats": norm_stats if has_norm else None,
+            "norm_sha256": file_hash(os.path.join(run_dir, norm_stats)) if has_norm else None,
+            "reward": None,
+            "time": os.path.getmtime(path),
+        })
+    checkpoints.sort(key=lambda c: c["step"])
+    return {"run_id": os.path.basename(run_dir), "checkpoints": checkpoints}
+
+
+def load_manifest(run_dir):
+    path = os.path.join(run_dir, MANIFEST)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    manifest = _legacy_manifest(run_dir)
+    if manifest["checkpoints"]:
+        write_json(path, manifest)
+    return manifest
+
+
+def record_checkpoint(run_dir, step, model_path, norm_stats_path=None, reward=None, latest=True):
+    """
+    Adds a saved checkpoint to the manifest of its run, and marks the run as
+    the latest one of its models folder. Call it right after ``model.save``.
+
+    :param run_dir: run folder (models/PPO_xxx/<run_id>)
+    :param step: number of timesteps of the model
+    :param model_path: saved .zip (the ".zip" suffix may be omitted, as for model.save)
+    :param norm_stats_path: VecNormalize statistics saved with the model, if any
+    :param reward: reward statistics, see ``reward_stats``
+    :param latest: update LATEST.json (False for runs saving side by side, e.g. the PBT members)
+    """
+    if not model_path.endswith(".zip"):
+        model_path += ".zip"
+    entry = {
+        "step": int(step),
+        "file": os.path.relpath(model_path, run_dir),
+        "sha256": file_hash(model_path),
+        "norm_stats": os.path.relpath(norm_stats_path, run_dir) if norm_stats_path else None,
+        "norm_sha256": file_hash(norm_stats_path) if norm_stats_path else None,
+        "reward": reward,
+        "time": time.time(),
+    }
+    manifest = load_manifest(run_dir)
+    # Saving twice under the same name (e.g. "interrupted") replaces the entry
+    manifest["checkpoints"] = [c for c in manifest["checkpoints"] if c["file"] != entry["file"]]
+    manifest["checkpoints"].append(entry)
+    write_json(os.path.join(run_dir, MANIFEST), manifest)
+    if latest:
+        mark_latest(run_dir, entry["step"])
+    return entry
+
+
+def mark_latest(run_dir, step):
+    """Points the LATEST.json of the models folder at ``run_dir``."""
+    base_dir = os.path.dirname(os.path.abspath(run_dir))
+    write_json(os.path.join(base_dir, LATEST), {"run_id": os.path.basename(run_dir), "step": int(step)})
+
+
+def _resolve(run_dir, entry):
+    # Manifest entries hold paths relative to the run folder
+    entry = dict(entry)
+    entry["path"] = os.path.join(run_dir, entry["file"])
+    entry["norm_stats_path"] = os.path.join(run_dir, entry["norm_stats"]) if entry["norm_stats"] else None
+    return entry
+
+
+def list_checkpoints(run_dir):
+    """Checkpoints of a run in save order, with absolute ``path`` and ``norm_stats_path``."""
+    return [_resolve(run_dir, c) for c in load_manifest(run_dir)["checkpoints"]]
+
+
+def latest_checkpoint(run_dir, verify=True):
+    """
+    Last saved checkpoint of a run, or None.
+
+    With ``verify``, a checkpoint whose file is missing or does not match its
+    hash (e.g. killed during the save) is skipped for the previous one.
+    """
+    for entry in reversed(list_checkpoints(run_dir)):
+        if not verify:
+            return entry
+        if os.path.exists(entry["path"]) and file_hash(entry["path"]) == entry["sha256"]:
+            return entry
+        print(f"Checkpoint ignoré (absent ou corrompu) : {entry['path']}")
+    return None
+
+
+def latest_run(base_dir):
+    """Run folder that saved last in base_dir (e.g. models/PPO_SwingUp_V6), or None."""
+    if not os.path.isdir(base_dir):
+        return None
+    pointer = os.path.join(base_dir, LATEST)
+    if os.path.exists(pointer):
+        with open(pointer) as f:
+            run_dir = os.path.join(base_dir, json.load(f)["run_id"])
+        if os.path.isdir(run_dir):
+            return run_dir
+    # No pointer yet (runs saved before the index): most recently modified run folder
+    runs = [os.path.join(base_dir, d) for d in os.listdir(base_dir) if os.path.isdir(os.path.join(base_dir, d))]
+    if not runs:
+        return None
+    return max(runs, key=os.path.getmtime)
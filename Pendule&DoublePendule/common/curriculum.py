@@ -0,0 +1,143 @@
+# Curriculum on the starting states of the batched envs.
+#
+# Every env slot has a difficulty level in [0, 1] that sets its reset
+# distribution. Level 1 is the original distribution of the env:
+# - cart-pole (SwingUpCartPoleVecEnv): theta starts in center +- width, the
+#   center going from 0 (pole up) to the version's (pi for V4-V6) and the
+#   width from START_WIDTH to the version's (1.0 rad for V6);
+# - double pendulum: the probability of a start at the top goes from
+#   START_P_TOP to 0.5 and the swing-up angles from +-START_SWING_WIDTH to +-pi.
+# A start width never exceeds the target one: a version whose own window is
+# narrower (V3: +-0.05 rad) keeps its width at every level.
+#
+# CurriculumCallback follows the episodes during training. An episode is a
+# success when it reaches its time limit without crash, with the pole(s)
+# upright during the last second (criterion of common/evaluate.py). At the
+# end of every rollout, the slots whose rolling success rate is above
+# `promote` get harder, those below `demote` easier. All updates are array
+# operations over the slots.
+#
+# The episodes need a time limit (max_episode_steps of the env), and the env
+# must live in the training process (batched env, possibly wrapped by
+# VecNormalize): the curriculum writes its reset distribution directly.
+#
+# Usage:
+#     env = SwingUpCartPoleVecEnv(num_envs=16, version="v6", max_episode_steps=500)
+#     model.learn(..., callback=CurriculumCallback(Curriculum(env)))
+import numpy as np
+from stable_baselines3.common.callbacks import BaseCallback
+
+from common.double_vec_env import DoubleSwingUpCartPoleVecEnv
+from common.evaluate import SUCCESS_WINDOW, is_upright
+
+START_WIDTH = 0.2  # rad around the top, cart-pole at level 0
+START_P_TOP = 0.9  # double pendulum at level 0
+START_SWING_WIDTH = 0.5  # rad
+
+
+class Curriculum:
+    """
+    Per-slot difficulty levels and rolling success statistics.
+
+    :param env: SwingUpCartPoleVecEnv or DoubleSwingUpCartPoleVecEnv
+    :param window: episodes in the rolling success rate of a slot
+    :param promote: success rate from which a slot gets harder
+    :param demote: success rate under which a slot gets easier
+    :param step: level change of a promotion / demotion
+    :param start: initial level of every slot
+    """
+
+    def __init__(self, env, window=8, promote=0.75, demote=0.25, step=0.1, start=0.0):
+        self.env = env
+        self.window = window
+        self.promote = promote
+        self.demote = demote
+        self.step = step
+        n = env.num_envs
+        self.levels = np.full(n, float(start))
+        self.results = np.zeros((n, window), dtype=bool)
+        self.counts = np.zeros(n, dtype=np.int64)
+
+        # Target (level 1) distribution: the env's own
+        self.double = isinstance(env, DoubleSwingUpCartPoleVecEnv)
+        if self.double:
+            self.target = (float(env.p_top), float(env.swing_width))
+        else:
+            low, high = np.broadcast_to(env.reset_low, (4, n)), np.broadcast_to(env.reset_high, (4, n))
+            self.target = (low.copy(), high.copy())
+        self.apply()
+
+    def apply(self):
+        """Writes the reset distribution of every slot into the env."""
+        level = self.levels
+        if self.double:
+            p_top, swing_width = self.target
+            self.env.p_top = START_P_TOP + (p_top - START_P_TOP) * level
+            start_swing = min(START_SWING_WIDTH, swing_width)
+            self.env.swing_width = start_swing + (swing_width - start_swing) * level
+            return
+        low, high = self.target[0].copy(), self.target[1].copy()
+        center = (low[2] + high[2]) / 2 * level
+        target_width = (high[2] - low[2]) / 2
+        start_width = np.minimum(START_WIDTH, target_width)
+        width = start_width + (target_width - start_width) * level
+        low[2], high[2] = center - width, center + width
+        self.env.reset_low, self.env.reset_high = low.astype(np.float32), high.astype(np.float32)
+
+    def record(self, indices, success):
+        """Results of the episodes that just ended in slots ``indices``."""
+        self.results[indices, self.counts[indices] % self.window] = success
+        self.counts[indices] += 1
+
+    def success_rate(self):
+        # Rolling rate of each slot (nan before its first episode)
+        seen = np.minimum(self.counts, self.window)
+        return np.where(seen > 0, self.results.sum(axis=1) / np.maximum(seen, 1), np.nan)
+
+    def update(self):
+        """Promotes / demotes the slots with a full window, returns the number of changed slots."""
+        full = self.counts >= self.window
+        rate = self.results.mean(axis=1)
+        up = full & (rate >= self.promote) & (self.levels < 1.0)
+        down = full & (rate < self.demote) & (self.levels > 0.0)
+        self.levels = np.clip(self.levels + self.step * up - self.step * down, 0.0, 1.0)
+        changed = up | down
+        # A new level starts a new window
+        self.counts[changed] = 0
+        self.results[changed] = False
+        if changed.any():
+            self.apply()
+        return int(changed.sum())
+
+
+class CurriculumCallback(BaseCallback):
+    """Feeds a Curriculum with the episodes of training, updates it every rollout."""
+
+    def __init__(self, curriculum, verbose=0):
+        super().__init__(verbose)
+        self.curriculum = curriculum
+        self.streak = np.zeros(curriculum.env.num_envs, dtype=np.int64)
+
+    def _on_step(self):
+        dones, infos = self.locals["dones"], self.locals["infos"]
+        done_idx = np.flatnonzero(dones)
+        if done_idx.size:
+            # The last state of a finished episode is already replaced by the
+            # reset one: its streak counts the steps before it
+            truncated = np.array([infos[i].get("TimeLimit.truncated", False) for i in done_idx])
+            self.curriculum.record(done_idx, truncated & (self.streak[done_idx] >= SUCCESS_WINDOW - 1))
+        self.streak = np.where(is_upright(self.curriculum.env), self.streak + 1, 0)
+        self.streak[done_idx] = 0
+        return True
+
+    def _on_rollout_end(self):
+        changed = self.curriculum.update()
+        levels = self.curriculum.levels
+        rate = self.curriculum.success_rate()
+        self.logger.record("curriculum/level_mean", float(levels.mean()))
+        self.logger.record("curriculum/level_min", float(levels.min()))
+        self.logger.record("curriculum/changed_slots", changed)
+        if not np.isnan(rate).all():
+            self.logger.record("curriculum/success_rate", float(np.nanmean(rate)))
+        if self.verbose and changed:
+            print(f"Curriculum : {changed} slots modifiés, niveau moyen {levels.mean():.2f}")
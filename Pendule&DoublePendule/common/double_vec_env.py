@@ -0,0 +1,158 @@
+import numpy as np
+from gymnasium import spaces
+
+from common.integrators import integrate
+from common.physics import double_pendulum_derivatives
+from common.randomization import make_randomizer
+from common.reward_spec import compile_reward
+from common.vec_env import BatchedVecEnv, make_action_space
+
+
+class DoubleSwingUpCartPoleVecEnv(BatchedVecEnv):
+    """
+    Batched version of ``DoubleSwingUpCartPoleEnv`` (V3).
+
+    ``self.state`` has shape (6, num_envs), rows x, x_dot, th1, th1_dot,
+    th2, th2_dot. It is kept in float64 like the single env (whose state
+    becomes float64 after the first Euler step), observations are float32.
+    ``reward`` replaces the reward of the single env (SPECS["double"]) by a
+    RewardSpec (see common/reward_spec.py, inputs DOUBLE_INPUTS).
+    ``randomization`` draws g, masses, lengths and force per env at each
+    reset (common/randomization.py).
+
+    The starting distribution is ``p_top`` (probability of a start at the top)
+    and ``swing_width`` (angle range of the swing-up starts), scalars or one
+    value per env (common/curriculum.py). ``max_episode_steps`` truncates the
+    episodes (none by default). ``actions`` = K replaces the Box(-1, 1) forces
+    by K discrete levels (see common.vec_env.make_action_space).
+    """
+
+    def __init__(self, num_envs=256, seed=None, integrator="euler", substeps=1, reward=None,
+                 randomization=None, max_episode_steps=None, actions=None):
+        # --- PARAMETRES PHYSIQUES (identiques a DoubleSwingUpCartPoleEnv) ---
+        self.g = 9.81
+        self.m_cart = 1.0
+        self.m1 = 0.5
+        self.m2 = 0.5
+        self.l1 = 0.5
+        self.l2 = 0.5
+        self.force_mag = 20.0
+        self.dt = 0.02
+        self.x_threshold = 5.0
+        self.integrator = integrator
+        self.substeps = substeps
+        self.p_top = 0.5
+        self.swing_width = np.pi
+        self.max_episode_steps = max_episode_steps
+        self.render_mode = None
+
+        action_space, self.force_levels = make_action_space(actions, continuous=True)
+        high = np.inf * np.ones(8, dtype=np.float32)
+        observation_space = spaces.Box(-high, high, dtype=np.float32)
+
+        super().__init__(num_envs, observation_space, action_space)
+
+        self.state = np.zeros((6, num_envs), dtype=np.float64)
+        self._obs = np.zeros((num_envs, 8), dtype=np.float32)
+        self.episode_steps = np.zeros(num_envs, dtype=np.int64)
+        self._actions = None
+        self.np_random = np.random.default_rng(seed)
+        self.reward_fn = compile_reward("double" if reward is None else reward, num_envs, self.state.dtype)
+        self.randomizer = make_randomizer(randomization)
+        if self.randomizer is not None:
+            self.randomizer.attach(self)
+
+    def _fill_obs(self, indices=slice(None)):
+        x, x_dot, th1, th1_dot, th2, th2_dot = self.state[:, indices]
+        self._obs[indices, 0] = x
+        self._obs[indices, 1] = x_dot
+        self._obs[indices, 2] = np.cos(th1)
+        self._obs[indices, 3] = np.sin(th1)
+        self._obs[indices, 4] = th1_dot
+        self._obs[indices, 5] = np.cos(th2)
+        self._obs[indices, 6] = np.sin(th2)
+        self._obs[indices, 7] = th2_dot
+
+    def _reset_indices(self, indices):
+        n = len(indices) if isinstance(indices, np.ndarray) else self.num_envs
+        rng = self.np_random
+        if self.randomizer is not None:
+            self.randomizer.resample(self, indices)
+
+        # --- INITIALISATION HYBRIDE ---
+        # p_top "Start at Top" (50% by default), otherwise "Swing Up" with
+        # angles in [-swing_width, swing_width] ([-pi, pi] by default)
+        p_top = np.broadcast_to(self.p_top, (self.num_envs,))[indices]
+        width = np.broadcast_to(self.swing_width, (self.num_envs,))[indices]
+        at_top = rng.random(n) < p_top
+        top = rng.uniform(-0.05, 0.05, size=(6, n))
+        swing = np.empty((6, n))
+        swing[0] = rng.uniform(-1, 1, n)
+        swing[2] = rng.uniform(-width, width, n)
+        swing[4] = rng.uniform(-width, width, n)
+        swing[[1, 3, 5]] = rng.uniform(-0.1, 0.1, size=(3, n))
+
+        # float32 round trip, as in the single env reset
+        self.state[:, indices] = np.where(at_top, top, swing).astype(np.float32)
+        self.episode_steps[indices] = 0
+        self._fill_obs(indices)
+
+    def reset(self):
+        if self._seeds[0] is not None:
+            self.np_random = np.random.default_rng(self._seeds[0])
+        self._reset_seeds()
+        self._reset_options()
+        self._reset_indices(slice(None))
+        return self._obs.copy()
+
+    def _force_input(self, actions):
+        actions = np.asarray(actions)
+        if self.force_levels is None:
+            return actions.astype(np.float64).reshape(self.num_envs)
+        return self.force_levels[actions.reshape(self.num_envs).astype(np.intp)].astype(np.float64)
+
+    def step_wait(self):
+        force_input = self._force_input(self._actions)
+        force = force_input * self.force_mag
+
+        def deriv(state):
+            return double_pendulum_derivatives(
+                state, force, self.g, self.m_cart, self.m1, self.m2, self.l1, self.l2
+            )
+
+        self.state[:] = integrate(deriv, self.state, self.dt, self.integrator, self.substeps)
+        x = self.state[0]
+
+        terminated = (x < -self.x_threshold) | (x > self.x_threshold)
+        rewards = self.reward_fn(self.state, force_input, terminated, out=np.empty(self.num_envs, dtype=np.float32))
+
+        self.episode_steps += 1
+        dones = terminated
+        if self.max_episode_steps is not None:
+            dones = terminated | (self.episode_steps >= self.max_episode_steps)
+
+        self._fill_obs()
+        infos = [{} for _ in range(self.num_envs)]
+        done_idx = np.flatnonzero(dones)
+        if done_idx.size:
+            for i in done_idx:
+                infos[i]["terminal_observation"] = self._obs[i].copy()
+                infos[i]["TimeLimit.truncated"] = not terminated[i]
+            self._reset_indices(done_idx)
+
+        return self._obs.copy(), rewards, dones, infos
+
+
+if __name__ == "__main__":
+    import time
+
+    for n in (1, 256, 4096):
+        env = DoubleSwingUpCartPoleVecEnv(num_envs=n, seed=0)
+        env.reset()
+        actions = np.random.uniform(-1, 1, size=(n, 1)).astype(np.float32)
+        steps = max(2000, 200000 // n)
+        start = time.perf_counter()
+        for _ in range(steps):
+            env.step(actions)
+        elapsed = time.perf_counter() - start
+        print(f"double | {n:5d} envs | {n * steps / elapsed:12,.0f} steps/s")
@@ -0,0 +1,126 @@
+# Pygame drawing of the pendulum scenes, shared by the live visualizers, the
+# replay player and the offscreen renderer: V6/visualize.py look for the
+# cart-pole (camera locked on the cart), V3/visualize_double.py look for the
+# double pendulum.
+#
+# Every function draws into the surface it is given and uses its size, so a
+# scene can go to the window, to a subsurface (side-by-side) or offscreen.
+import math
+
+import pygame
+
+# Colors
+WHITE, BLACK, RED, GREY, BLUE, GREEN = (255, 255, 255), (0, 0, 0), (200, 50, 50), (150, 150, 150), (50, 50, 200), (50, 200, 50)
+SCALE = 80
+DOUBLE_SCALE = 100
+
+
+def draw_arrow_continuous(screen, color, start, end_max, force_ratio, width=3):
+    # force_ratio is between -1 and 1
+    # end_max is the pixel position for force=1.0
+
+    start_x, start_y = start
+    end_max_x, end_max_y = end_max
+
+    # Calculate actual end point based on force
+    # Length of max arrow
+    max_len = end_max_x - start_x
+    actual_len = max_len * abs(force_ratio)
+
+    if force_ratio > 0:
+        direction = 1
+    else:
+        direction = -1
+
+    end_x = start_x + (actual_len * direction)
+    end_y = start_y # Horizontal force only
+
+    start_int = (int(start_x), int(start_y))
+    end_int = (int(end_x), int(end_y))
+
+    if abs(force_ratio) > 0.05:
+        pygame.draw.line(screen, color, start_int, end_int, width)
+        # Arrowhead
+        rotation = math.degrees(math.atan2(start_y-end_y, end_x-start_x))+90
+        p1 = (int(end_x+10*math.sin(math.radians(rotation))), int(end_y+10*math.cos(math.radians(rotation))))
+        p2 = (int(end_x+10*math.sin(math.radians(rotation-120))), int(end_y+10*math.cos(math.radians(rotation-120))))
+        p3 = (int(end_x+10*math.sin(math.radians(rotation+120))), int(end_y+10*math.cos(math.radians(rotation+120))))
+        pygame.draw.polygon(screen, color, (p1, p2, p3))
+
+
+def draw_cartpole(screen, cart_x, pole_angle, force_ratio):
+    # Returns the screen position of the pole tip (mouse drag overlay of V6/visualize.py)
+    width, height = screen.get_size()
+    screen.fill(WHITE)
+
+    # Camera
+    camera_x = cart_x
+    def to_screen(x, y):
+        sx = int((x - camera_x) * SCALE + width // 2)
+        sy = int(height // 2 + 100 - y)
+        return sx, sy
+
+    cx, cy = to_screen(cart_x, 0)
+
+    # Grid
+    for i in range(int(cart_x - 10), int(cart_x + 10)):
+        gx, gy = to_screen(i, 0)
+        pygame.draw.line(screen, GREY, (gx, gy-10), (gx, gy+10), 1)
+
+    pygame.draw.line(screen, BLACK, (0, cy+15), (width, cy+15), 2)
+
+    pole_len = 120
+    px = cx + pole_len * math.sin(pole_angle)
+    py = cy - pole_len * math.cos(pole_angle)
+
+    pygame.draw.rect(screen, GREY, (cx-40, cy-20, 80, 40))
+    pygame.draw.rect(screen, BLACK, (cx-40, cy-20, 80, 40), 2)
+    pygame.draw.circle(screen, BLACK, (cx-25, cy+20), 10)
+    pygame.draw.circle(screen, BLACK, (cx+25, cy+20), 10)
+
+    pygame.draw.line(screen, BLACK, (cx, cy), (px, py), 6)
+    pygame.draw.circle(screen, RED, (int(px), int(py)), 15)
+
+    # Force Arrow (Variable Length, max 80px)
+    draw_arrow_continuous(screen, BLUE, (cx, cy), (cx+80, cy), force_ratio)
+    return px, py
+
+
+def draw_double_pendulum(screen, x, th1, th2, force_ratio):
+    width, height = screen.get_size()
+    screen.fill(WHITE)
+
+    cx = width // 2 + x * DOUBLE_SCALE
+    cy = height // 2
+    p1_x = cx + math.sin(th1) * DOUBLE_SCALE
+    p1_y = cy - math.cos(th1) * DOUBLE_SCALE
+    p2_x = p1_x + math.sin(th2) * DOUBLE_SCALE
+    p2_y = p1_y - math.cos(th2) * DOUBLE_SCALE
+
+    icx, icy = int(cx), int(cy)
+    ip1x, ip1y = int(p1_x), int(p1_y)
+    ip2x, ip2y = int(p2_x), int(p2_y)
+
+    pygame.draw.rect(screen, GREY, (icx-30, icy-15, 60, 30))
+    pygame.draw.line(screen, BLACK, (icx, icy), (ip1x, ip1y), 4)
+    pygame.draw.line(screen, BLACK, (ip1x, ip1y), (ip2x, ip2y), 4)
+    pygame.draw.circle(screen, RED, (ip1x, ip1y), 8)
+    pygame.draw.circle(screen, BLUE, (ip2x, ip2y), 8)
+
+    pygame.draw.line(screen, (0, 200, 0), (icx, icy + 30), (int(icx + force_ratio * 50), icy + 30), 3)
+
+
+def draw_state(screen, state, force_ratio):
+    """Draws a raw physics state: 4 values for a cart-pole, 6 for the double pendulum."""
+    if len(state) == 6:
+        draw_double_pendulum(screen, state[0], state[2], state[4], force_ratio)
+    else:
+        draw_cartpole(screen, state[0], state[2], force_ratio)
+
+
+def force_ratio(action):
+    # Discrete actions (0 = left, 1 = right) are drawn as full force
+    value = float(action.reshape(-1)[0]) if hasattr(action, "reshape") else float(action)
+    if getattr(action, "dtype", None) is not None and action.dtype.kind in "iu":
+        return 1.0 if value == 1 else -1.0
+    return max(-1.0, min(1.0, value))
@@ -0,0 +1,206 @@
+# Headless evaluation of trained checkpoints.
+#
+# A checkpoint is played on a batched env (one episode per env, thousands of
+# episodes at once, deterministic policy, no rendering) and scored with:
+# - success rate: no crash and the pole(s) upright during the last second;
+# - time to upright: first time the pole(s) reach the top (s);
+# - energy used: work of the cart motor, sum of |F * x_dot| * dt (J);
+# - cart drift: largest distance of the cart from the center (m).
+#
+# Usage (from the Pendule&DoublePendule folder):
+#     python -m common.evaluate v6                          # every checkpoint of the latest run
+#     python -m common.evaluate v6 V6/models/PPO_SwingUp_V6/run_xxx
+#     python -m common.evaluate double V3/models/PPO_DoublePendulum/run_xxx/1000000.zip
+#     python -m common.evaluate v6 V6/models/PPO_SwingUp_V6/run_xxx/1000000_policy.npz   # exported, no torch
+import argparse
+import json
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from common.checkpoints import latest_run, list_checkpoints, write_json
+from common.double_vec_env import DoubleSwingUpCartPoleVecEnv
+from common.vec_env import SwingUpCartPoleVecEnv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# variant -> models folder of its runs
+MODELS_DIRS = {
+    "v3": os.path.join("V3", "models", "PPO_SwingUp_V3"),
+    "v4": os.path.join("V4", "models", "PPO_SwingUp_V4"),
+    "v5": os.path.join("V5", "models", "PPO_SwingUp_V5"),
+    "v6": os.path.join("V6", "models", "PPO_SwingUp_V6"),
+    "double": os.path.join("V3", "models", "PPO_DoublePendulum"),
+}
+
+UPRIGHT_COS = 0.95  # cos(theta) above which a pole counts as upright (~18 deg)
+SUCCESS_WINDOW = 50  # steps (1 s) the pole(s) must stay upright at the end
+
+
+def make_eval_env(variant, num_envs, seed, actions=None):
+    if variant == "double":
+        return DoubleSwingUpCartPoleVecEnv(num_envs=num_envs, seed=seed, actions=actions)
+    return SwingUpCartPoleVecEnv(num_envs=num_envs, version=variant, seed=seed, actions=actions)
+
+
+def _force_input(env, actions):
+    if isinstance(env, SwingUpCartPoleVecEnv):
+        return env._force_input(actions)
+    return np.clip(env._force_input(actions), -1.0, 1.0)
+
+
+def is_upright(env):
+    # (N,) bool: pole(s) of every env near the top
+    if isinstance(env, SwingUpCartPoleVecEnv):
+        return np.cos(env.state[2]) > UPRIGHT_COS
+    return (np.cos(env.state[2]) > UPRIGHT_COS) & (np.cos(env.state[4]) > UPRIGHT_COS)
+
+
+def policy_actions(model):
+    # Action parameterization a policy was trained with (see make_action_space),
+    # None for the version's own
+    space = getattr(model, "action_space", None)
+    if space is None:
+        return getattr(model, "actions", None)
+    return space.n if hasattr(space, "n") else "continuous"
+
+
+def evaluate_policy(model, variant, n_episodes=1000, max_steps=500, norm_stats_path=None, seed=0):
+    """
+    Plays ``n_episodes`` deterministic episodes of at most ``max_steps`` steps
+    in parallel and returns the aggregated metrics (dict).
+
+    An episode ends on a crash (cart off the track) or after ``max_steps``;
+    the metrics of finished episodes are frozen while the others continue.
+    """
+    from stable_baselines3.common.vec_env import VecNormalize
+
+    env = make_eval_env(variant, n_episodes, seed, policy_actions(model))
+    venv = env
+    if norm_stats_path:
+        venv = VecNormalize.load(norm_stats_path, env)
+        venv.training = False
+        venv.norm_reward = False
+    dt = env.tau if isinstance(env, SwingUpCartPoleVecEnv) else env.dt
+
+    obs = venv.reset()
+    active = np.ones(n_episodes, dtype=bool)
+    crashed = np.zeros(n_episodes, dtype=bool)
+    returns = np.zeros(n_episodes)
+    energy = np.zeros(n_episodes)
+    drift = np.zeros(n_episodes)
+    time_to_upright = np.full(n_episodes, np.nan)
+    upright_streak = np.zeros(n_episodes, dtype=int)
+
+    for t in range(max_steps):
+        actions, _ = model.predict(obs, deterministic=True)
+        force = _force_input(env, actions) * env.force_mag
+        x, x_dot = env.state[0].copy(), env.state[1].copy()
+
+        obs, rewards, dones, _ = venv.step(actions)
+
+        # Done envs are already reset: only count what happened before the crash
+        energy += np.where(active, np.abs(force * x_dot) * dt, 0.0)
+        drift = np.where(active, np.maximum(drift, np.abs(x)), drift)
+        returns += np.where(active, rewards, 0.0)
+        crashed |= active & dones
+        active &= ~dones
+
+        upright = active & is_upright(env)
+        upright_streak = np.where(upright, upright_streak + 1, 0)
+        time_to_upright = np.where(upright & np.isnan(time_to_upright), (t + 1) * dt, time_to_upright)
+        if not active.any():
+            break
+
+    success = ~crashed & (upright_streak >= SUCCESS_WINDOW)
+    reached = ~np.isnan(time_to_upright)
+    return {
+        "episodes": n_episodes,
+        "success_rate": float(success.mean()),
+        "crash_rate": float(crashed.mean()),
+        "mean_return": float(returns.mean()),
+        "upright_rate": float(reached.mean()),
+        "time_to_upright": float(np.median(time_to_upright[reached])) if reached.any() else None,
+        "energy_used": float(energy.mean()),
+        "max_drift": float(drift.mean()),
+    }
+
+
+def evaluate_checkpoint(model_path, variant, n_episodes=1000, max_steps=500, norm_stats_path=None, seed=0):
+    # Entry point of the pool workers: one torch thread each
+    from common.export import load_policy
+
+    if model_path.endswith(".npz"):
+        # Exported policy: NumPy only, normalization already inside
+        norm_stats_path = None
+    else:
+        import torch
+
+        torch.set_num_threads(1)
+    model = load_policy(model_path)
+    metrics = evaluate_policy(model, variant, n_episodes, max_steps, norm_stats_path, seed)
+    metrics["path"] = model_path
+    return metrics
+
+
+def evaluate_run(run_dir, variant, n_episodes=1000, max_steps=500, num_workers=None, seed=0):
+    """Evaluates every checkpoint of a run in parallel, writes evaluation.json in the run folder."""
+    checkpoints = list_checkpoints(run_dir)
+    num_workers = num_workers or max(1, os.cpu_count() or 1)
+    ctx = mp.get_context("forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn")
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=ctx) as pool:
+        futures = [
+            pool.submit(evaluate_checkpoint, c["path"], variant, n_episodes, max_steps, c["norm_stats_path"], seed)
+            for c in checkpoints
+        ]
+        results = []
+        for checkpoint, future in zip(checkpoints, futures):
+            metrics = future.result()
+            metrics["step"] = checkpoint["step"]
+            results.append(metrics)
+
+    write_json(os.path.join(run_dir, "evaluation.json"), results)
+    return results
+
+
+def best_checkpoint(results):
+    # Highest success rate, then highest return
+    return max(results, key=lambda r: (r["success_rate"], r["mean_return"]))
+
+
+def print_results(results):
+    print(f"{'step':>9}{'success':>9}{'crash':>7}{'return':>10}{'t upright':>11}{'energy J':>10}{'drift m':>9}")
+    for r in sorted(results, key=lambda r: r.get("step", 0)):
+        t_up = f"{r['time_to_upright']:.2f}s" if r["time_to_upright"] is not None else "-"
+        print(f"{r.get('step', 0):>9}{r['success_rate']:>9.1%}{r['crash_rate']:>7.1%}{r['mean_return']:>10.1f}"
+              f"{t_up:>11}{r['energy_used']:>10.1f}{r['max_drift']:>9.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless evaluation of PPO checkpoints")
+    parser.add_argument("variant", choices=sorted(MODELS_DIRS))
+    parser.add_argument("path", nargs="?", help="checkpoint .zip, exported .npz or run folder (default: latest run)")
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--max-steps", type=int, default=500, help="episode length (500 steps = 10 s)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--norm-stats", default=None, help="VecNormalize stats of a single .zip")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    path = args.path or latest_run(os.path.join(ROOT, MODELS_DIRS[args.variant]))
+    if path is None:
+        parser.error(f"aucun run trouvé pour {args.variant}")
+
+    if path.endswith((".zip", ".npz")):
+        # Double pendulum: stats saved next to the model as <steps>_env.pkl
+        norm_stats = args.norm_stats or path[:-len(".zip")] + "_env.pkl"
+        norm_stats = norm_stats if os.path.exists(norm_stats) else None
+        result = evaluate_checkpoint(path, args.variant, args.episodes, args.max_steps, norm_stats, args.seed)
+        print(json.dumps(result, indent=1))
+    else:
+        results = evaluate_run(path, args.variant, args.episodes, args.max_steps, args.workers, args.seed)
+        print_results(results)
+        best = best_checkpoint(results)
+        print(f"\nMeilleur checkpoint : {best['path']} ({best['success_rate']:.1%} de succès)")
@@ -0,0 +1,163 @@
+# Export of trained policies to a NumPy-only artifact.
+#
+# PPO.load rebuilds the whole SB3 model (torch, critic, optimizer state) just
+# to compute deterministic actions. export_policy keeps only what predict()
+# needs and writes it to one .npz next to the checkpoint:
+#     <steps>.zip -> <steps>_policy.npz
+# holding the actor MLP (weights, biases, activation), the action head, the
+# action space, and the VecNormalize observation statistics when the model
+# was trained with them (<steps>_env.pkl), so no wrapper is needed at
+# inference time.
+#
+# NumpyPolicy loads the artifact with NumPy only (no torch, no SB3) and has
+# the predict() of the SB3 models: the evaluator, the visualizers and the
+# recorders accept a .npz wherever they accept a .zip (load_policy).
+#
+# Usage (from the Pendule&DoublePendule folder):
+#     python -m common.export V6/models/PPO_SwingUp_V6/run_xxx/1000000.zip
+#     python -m common.export V3/models/PPO_DoublePendulum/double_run_xxx      # every checkpoint of the run
+import argparse
+import json
+import os
+
+import numpy as np
+
+ACTIVATIONS = {
+    "Tanh": np.tanh,
+    "ReLU": lambda x: np.maximum(x, 0.0),
+    "Identity": lambda x: x,
+}
+
+
+def policy_path(model_path):
+    return os.path.splitext(model_path)[0] + "_policy.npz"
+
+
+def export_policy(model_path, out_path=None, norm_stats_path=None):
+    """Writes the deterministic policy of a PPO checkpoint to a .npz, returns its path."""
+    import pickle
+
+    import torch
+    from stable_baselines3 import PPO
+
+    model = PPO.load(model_path, device="cpu")
+    policy = model.policy
+    if policy.squash_output:
+        raise ValueError("Policies with squashed outputs are not supported")
+
+    layers, activations = [], []
+    for module in policy.mlp_extractor.policy_net:
+        if isinstance(module, torch.nn.Linear):
+            layers.append((module.weight.detach().numpy().T, module.bias.detach().numpy()))
+        elif type(module).__name__ in ACTIVATIONS:
+            activations.append(type(module).__name__)
+        else:
+            raise ValueError(f"Unsupported layer in the policy network: {module}")
+    head = policy.action_net
+    layers.append((head.weight.detach().numpy().T, head.bias.detach().numpy()))
+
+    space = model.action_space
+    meta = {
+        "activations": activations,
+        "action": "discrete" if hasattr(space, "n") else "box",
+        "obs_dim": int(np.prod(model.observation_space.shape)),
+        "source": os.path.basename(model_path),
+    }
+    arrays = {f"w{i}": w.astype(np.float32) for i, (w, _) in enumerate(layers)}
+    arrays.update({f"b{i}": b.astype(np.float32) for i, (_, b) in enumerate(layers)})
+    if meta["action"] == "box":
+        arrays["low"], arrays["high"] = space.low, space.high
+
+    if norm_stats_path is None:
+        candidate = os.path.splitext(model_path)[0] + "_env.pkl"
+        norm_stats_path = candidate if os.path.exists(candidate) else None
+    if norm_stats_path:
+        with open(norm_stats_path, "rb") as f:
+            norm = pickle.load(f)
+        if norm.norm_obs:
+            arrays["obs_mean"] = norm.obs_rms.mean.astype(np.float32)
+            arrays["obs_std"] = np.sqrt(norm.obs_rms.var + norm.epsilon).astype(np.float32)
+            meta["clip_obs"] = float(norm.clip_obs)
+
+    out_path = out_path or policy_path(model_path)
+    np.savez(out_path, meta=np.array(json.dumps(meta)), **arrays)
+    return out_path
+
+
+class NumpyPolicy:
+    """
+    Deterministic actions of an exported policy, NumPy only.
+
+    ``predict`` has the signature of the SB3 models and takes raw (not
+    normalized) observations, one (obs_dim,) or a batch (N, obs_dim).
+    """
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.meta = json.loads(str(data["meta"]))
+            n_layers = len(self.meta["activations"]) + 1
+            self.weights = [data[f"w{i}"] for i in range(n_layers)]
+            self.biases = [data[f"b{i}"] for i in range(n_layers)]
+            self.low = data["low"] if "low" in data else None
+            self.high = data["high"] if "high" in data else None
+            self.obs_mean = data["obs_mean"] if "obs_mean" in data else None
+            self.obs_std = data["obs_std"] if "obs_std" in data else None
+        self.activations = [ACTIVATIONS[name] for name in self.meta["activations"]]
+        self.discrete = self.meta["action"] == "discrete"
+        # Action parameterization, as the ``actions`` of the batched envs
+        self.actions = len(self.biases[-1]) if self.discrete else "continuous"
+
+    def forward(self, obs):
+        # (N, obs_dim) float32 -> (N, n_outputs) logits or mean actions
+        x = obs
+        if self.obs_mean is not None:
+            x = np.clip((x - self.obs_mean) / self.obs_std, -self.meta["clip_obs"], self.meta["clip_obs"])
+        for w, b, activation in zip(self.weights, self.biases, self.activations):
+            x = activation(x @ w + b)
+        return x @ self.weights[-1] + self.biases[-1]
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=True):
+        obs = np.asarray(observation, dtype=np.float32)
+        single = obs.ndim == 1
+        out = self.forward(obs.reshape(-1, self.meta["obs_dim"]))
+        if self.discrete:
+            actions = out.argmax(axis=1)
+        else:
+            actions = np.clip(out, self.low, self.high)
+        return (actions[0] if single else actions), state
+
+
+def load_policy(path):
+    """NumpyPolicy for an exported .npz, SB3 PPO model (CPU) for a .zip checkpoint."""
+    if path.endswith(".npz"):
+        return NumpyPolicy(path)
+    from stable_baselines3 import PPO
+
+    return PPO.load(path, device="cpu")
+
+
+if __name__ == "__main__":
+    import time
+
+    from common.checkpoints import list_checkpoints
+
+    parser = argparse.ArgumentParser(description="Export PPO checkpoints to NumPy-only policies")
+    parser.add_argument("path", help="checkpoint .zip or run folder")
+    parser.add_argument("--out", default=None, help="output .npz (single checkpoint)")
+    parser.add_argument("--norm-stats", default=None, help="VecNormalize stats (default: <steps>_env.pkl if present)")
+    args = parser.parse_args()
+
+    if args.path.endswith(".zip"):
+        paths = [export_policy(args.path, args.out, args.norm_stats)]
+    else:
+        paths = [export_policy(c["path"], norm_stats_path=c["norm_stats_path"]) for c in list_checkpoints(args.path)]
+
+    policy = NumpyPolicy(paths[-1])
+    obs = np.zeros(policy.meta["obs_dim"], dtype=np.float32)
+    start = time.perf_counter()
+    for _ in range(10000):
+        policy.predict(obs)
+    per_call = (time.perf_counter() - start) / 10000
+    for path in paths:
+        print(f"{path} ({os.path.getsize(path) / 1024:.0f} Ko)")
+    print(f"predict: {per_call * 1e6:.1f} us par observation")
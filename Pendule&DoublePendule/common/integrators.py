@@ -0,0 +1,52 @@
+# Time integration schemes shared by the pendulum envs.
+#
+# Every scheme takes ``deriv(state) -> d(state)/dt`` and the state laid out as
+# [position, velocity, position, velocity, ...] along the first axis, e.g.
+# [x, x_dot, theta, theta_dot] for the cart-pole. Trailing axes are batch
+# axes, so the same code advances one env or N envs stored as (dim, N).
+
+
+def euler(deriv, state, dt):
+    # Explicit Euler: every variable moves with the derivative at the start of the step
+    return state + dt * deriv(state)
+
+
+def semi_implicit_euler(deriv, state, dt):
+    # Symplectic Euler: velocities first, then positions with the NEW velocities.
+    # Same cost as explicit Euler but the energy stays bounded instead of growing.
+    d = deriv(state)
+    new_state = state.copy()
+    new_state[1::2] += dt * d[1::2]
+    new_state[0::2] += dt * new_state[1::2]
+    return new_state
+
+
+def rk4(deriv, state, dt):
+    k1 = deriv(state)
+    k2 = deriv(state + 0.5 * dt * k1)
+    k3 = deriv(state + 0.5 * dt * k2)
+    k4 = deriv(state + dt * k3)
+    return state + (dt / 6.0) * (k1 + 2.0 * k2 + 2.0 * k3 + k4)
+
+
+INTEGRATORS = {
+    "euler": euler,
+    "semi_implicit": semi_implicit_euler,
+    "rk4": rk4,
+}
+
+
+def integrate(deriv, state, dt, method="euler", substeps=1):
+    """
+    Advance ``state`` by one control step ``dt``.
+
+    With ``substeps > 1`` the step is split into equal sub-steps of the
+    chosen scheme (the action stays constant over the control step).
+    """
+    if method not in INTEGRATORS:
+        raise ValueError(f"Unknown integrator '{method}', expected one of {list(INTEGRATORS)}")
+    step = INTEGRATORS[method]
+    h = dt / substeps
+    for _ in range(substeps):
+        state = step(deriv, state, h)
+    return state
@@ -0,0 +1,36 @@
+# Optional Numba support.
+#
+# When Numba is installed, `njit` compiles the physics kernels to machine code.
+# Otherwise (or with PENDULUM_NO_JIT=1) it is a no-op decorator and the callers
+# use their pure NumPy path instead (set_backend selects the path at run time).
+import os
+
+try:
+    if os.environ.get("PENDULUM_NO_JIT") == "1":
+        raise ImportError("JIT disabled by PENDULUM_NO_JIT")
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+# Path of the code that has both forms (common/physics.py, common/reward_spec.py)
+_backend = "numba" if HAS_NUMBA else "numpy"
+
+
+def set_backend(name):
+    global _backend
+    if name not in ("numba", "numpy"):
+        raise ValueError(f"Unknown backend '{name}', expected 'numba' or 'numpy'")
+    if name == "numba" and not HAS_NUMBA:
+        raise ValueError("Numba is not installed (or disabled by PENDULUM_NO_JIT)")
+    _backend = name
+
+
+def get_backend():
+    return _backend
@@ -0,0 +1,143 @@
+# Multi-core PPO launcher for the swing-up family.
+#
+# K worker processes each simulate a batch of carts (SwingUpCartPoleVecEnv or
+# DoubleSwingUpCartPoleVecEnv); the results are exchanged through shared memory
+# (common/shm_vec_env.py). K defaults to the number of cores minus one, the
+# last core runs PPO itself.
+#
+# Checkpoints keep the layout of the trainers, so the visualizers find them:
+#     Vx/models/PPO_SwingUp_Vx/<run_id>/<steps>.zip
+#     V3/models/PPO_DoublePendulum/<run_id>/<steps>.zip (+ <steps>_env.pkl)
+#
+# Usage (from the Pendule&DoublePendule folder):
+#     python -m common.launcher v6
+#     python -m common.launcher double --workers 4 --envs-per-worker 32
+#     python -m common.launcher v4 --reward v6      # V4 physics, V6 reward (common/reward_spec.py)
+#     python -m common.launcher v6 --randomize      # per-cart physics (common/randomization.py)
+#     python -m common.launcher v6 --actions 5      # 5 discrete force levels (common/registry.py)
+import argparse
+import datetime
+import functools
+import os
+import time
+
+from gymnasium import spaces
+from stable_baselines3 import PPO
+from stable_baselines3.common.vec_env import VecNormalize
+
+from common.checkpoints import record_checkpoint, reward_stats
+from common.profiling import ProfilingCallback
+from common.randomization import CARTPOLE_RANDOMIZATION, DOUBLE_RANDOMIZATION
+from common.registry import make_batched, parse_actions
+from common.reward_spec import SPECS
+from common.shm_vec_env import SharedMemoryVecEnv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# variant -> folder, models subfolder, logs folder, run_id prefix, VecNormalize
+VARIANTS = {
+    "v3": ("V3", "PPO_SwingUp_V3", "logs_swingup_v3", "run", False),
+    "v4": ("V4", "PPO_SwingUp_V4", "logs_swingup_v4", "run", False),
+    "v5": ("V5", "PPO_SwingUp_V5", "logs_swingup_v5", "run", False),
+    "v6": ("V6", "PPO_SwingUp_V6", "logs_swingup_v6", "run", False),
+    "double": ("V3", "PPO_DoublePendulum", "logs_double", "double_run", True),
+}
+
+# PPO hyperparameters of each trainer (n_steps / batch_size are set by the launcher)
+PPO_KWARGS = {
+    "v3": dict(learning_rate=0.0003, n_epochs=10, gamma=0.99, gae_lambda=0.95, ent_coef=0.01),
+    "v4": dict(learning_rate=0.0003, n_epochs=10, gamma=0.99, gae_lambda=0.95, ent_coef=0.01),
+    "v5": dict(learning_rate=0.0003, n_epochs=10, gamma=0.99, gae_lambda=0.95, ent_coef=0.01, clip_range=0.2),
+    "v6": dict(learning_rate=0.0003, use_sde=True),
+    "double": dict(learning_rate=0.0003, n_epochs=10, gamma=0.99, gae_lambda=0.95, ent_coef=0.0),
+}
+
+
+def make_batch_env(variant, envs_per_worker, seed, worker_index, reward=None, randomize=False, actions=None):
+    # Runs inside the worker process: module-level so it can be pickled
+    worker_seed = None if seed is None else seed + worker_index * envs_per_worker
+    randomization = None
+    if randomize:
+        randomization = DOUBLE_RANDOMIZATION if variant == "double" else CARTPOLE_RANDOMIZATION
+    return make_batched(variant, envs_per_worker, worker_seed, reward=reward, randomization=randomization,
+                        actions=actions)
+
+
+def default_num_workers():
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def launch(variant, num_workers=None, envs_per_worker=64, n_steps=64, total_steps=1_000_000,
+           save_every=25_000, seed=None, reward=None, randomize=False, actions=None):
+    folder, models_name, logs_name, prefix, normalize = VARIANTS[variant]
+    num_workers = num_workers or default_num_workers()
+
+    run_id = datetime.datetime.now().strftime(f"{prefix}_%Y%m%d_%H%M%S")
+    run_dir = os.path.join(ROOT, folder, "models", models_name, run_id)
+    log_dir = os.path.join(ROOT, folder, logs_name, run_id)
+    os.makedirs(run_dir, exist_ok=True)
+    os.makedirs(log_dir, exist_ok=True)
+
+    env = SharedMemoryVecEnv(
+        functools.partial(make_batch_env, variant, envs_per_worker, seed, reward=reward, randomize=randomize,
+                          actions=actions),
+        num_workers
+    )
+    if normalize:
+        env = VecNormalize(env, norm_obs=True, norm_reward=True, clip_obs=10.)
+
+    # 32 minibatches per epoch, whatever the number of carts
+    rollout_size = env.num_envs * n_steps
+    ppo_kwargs = dict(PPO_KWARGS[variant])
+    if not isinstance(env.action_space, spaces.Box):
+        # gSDE only exists for continuous actions
+        ppo_kwargs.pop("use_sde", None)
+    model = PPO(
+        "MlpPolicy", env, verbose=1, tensorboard_log=log_dir, seed=seed,
+        n_steps=n_steps, batch_size=max(64, rollout_size // 32), **ppo_kwargs
+    )
+
+    print(f"{variant} - ID: {run_id}")
+    print(f"{num_workers} workers x {envs_per_worker} envs = {env.num_envs} envs, {rollout_size} steps par rollout")
+
+    start = time.perf_counter()
+    callback = ProfilingCallback(verbose=1)
+    try:
+        while model.num_timesteps < total_steps:
+            model.learn(total_timesteps=save_every, reset_num_timesteps=False, callback=callback)
+            steps = model.num_timesteps
+            model.save(os.path.join(run_dir, f"{steps}"))
+            norm_stats = os.path.join(run_dir, f"{steps}_env.pkl") if normalize else None
+            if normalize:
+                env.save(norm_stats)
+            record_checkpoint(run_dir, steps, os.path.join(run_dir, f"{steps}"), norm_stats, reward_stats(model))
+            print(f"Sauvegarde étape {steps} ({steps / (time.perf_counter() - start):,.0f} steps/s en moyenne)")
+    except KeyboardInterrupt:
+        print("\nInterrompu. Sauvegarde...")
+        model.save(os.path.join(run_dir, "interrupted"))
+        norm_stats = os.path.join(run_dir, "interrupted_env.pkl") if normalize else None
+        if normalize:
+            env.save(norm_stats)
+        record_checkpoint(run_dir, model.num_timesteps, os.path.join(run_dir, "interrupted"), norm_stats)
+    finally:
+        env.close()
+    return run_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-process PPO training of a swing-up variant")
+    parser.add_argument("variant", choices=sorted(VARIANTS))
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: cores - 1)")
+    parser.add_argument("--envs-per-worker", type=int, default=64)
+    parser.add_argument("--n-steps", type=int, default=64, help="steps per env and per rollout")
+    parser.add_argument("--total-steps", type=int, default=1_000_000)
+    parser.add_argument("--save-every", type=int, default=25_000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--reward", choices=sorted(SPECS), default=None, help="reward spec (default: the variant's)")
+    parser.add_argument("--randomize", action="store_true", help="domain randomization of the physics")
+    parser.add_argument("--actions", type=parse_actions, default=None,
+                        help="'continuous' or a number of discrete force levels (default: the variant's)")
+    args = parser.parse_args()
+
+    launch(args.variant, args.workers, args.envs_per_worker, args.n_steps,
+           args.total_steps, args.save_every, args.seed, args.reward, args.randomize, args.actions)
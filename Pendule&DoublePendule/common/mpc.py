@@ -0,0 +1,128 @@
+# Model-predictive control of the V6 cart-pole with the cross-entropy method.
+#
+# At every control step (50 Hz) the planner samples `samples` force sequences
+# of `horizon` steps around its current plan, plays all of them from the
+# current state through a copy of the V6 dynamics and reward
+# (physics.cartpole_rollout: one Numba call for all candidates over the whole
+# horizon), refits the plan on the `elites` best sequences, and repeats
+# `iterations` times. The first force of the plan is applied, the rest is
+# shifted to warm-start the next step.
+#
+# No learning: it is a baseline for PPO and a source of expert
+# demonstrations. CEMController has the predict() method of
+# the SB3 models, so it plugs into the visualizer and into common/evaluate.
+#
+# Usage (from the Pendule&DoublePendule folder):
+#     python -m common.mpc                      # evaluation + time per action
+#     python V6/visualize.py --mpc              # live, instead of a checkpoint
+import argparse
+import json
+import time
+
+import numpy as np
+
+from common.physics import cartpole_params, cartpole_rollout
+from common.vec_env import VERSIONS, SwingUpCartPoleVecEnv
+
+
+class CEMController:
+    """
+    Cross-entropy planner on the swing-up dynamics (continuous versions).
+
+    :param version: dynamics, reward and force of this version of VERSIONS
+    :param horizon: steps of a planned sequence (60 = 1.2 s)
+    :param samples: candidate sequences per iteration
+    :param iterations: CEM iterations per control step
+    :param elites: best sequences the distribution is refitted on
+    :param smoothing: weight of the previous distribution in the refit
+    :param discount: discount of the planned returns
+    :param terminal_cost: weight of x^2 + x_dot^2 at the end of the horizon; the
+        reward alone does not see a drift that crashes after the horizon
+    """
+
+    def __init__(self, version="v6", horizon=60, samples=512, iterations=4, elites=32,
+                 smoothing=0.1, init_std=0.7, min_std=0.05, discount=0.99, terminal_cost=5.0, seed=0):
+        if not VERSIONS[version]["continuous"]:
+            raise ValueError(f"CEM plans continuous forces, version '{version}' has discrete actions")
+        self.version = version
+        self.horizon = horizon
+        self.samples = samples
+        self.iterations = iterations
+        self.elites = elites
+        self.smoothing = smoothing
+        self.init_std = init_std
+        self.min_std = min_std
+        self.discount = discount
+        self.terminal_cost = terminal_cost
+        self.rng = np.random.default_rng(seed)
+        self.params = cartpole_params(SwingUpCartPoleVecEnv(num_envs=1, version=version))
+        self._plans = np.zeros((0, horizon))
+
+    def reset(self, n=1):
+        # One plan (mean force sequence) per controlled env
+        self._plans = np.zeros((n, self.horizon))
+
+    def plan(self, state, mean):
+        """Best force in [-1, 1] from ``state`` (x, x_dot, theta, theta_dot), refines ``mean`` in place."""
+        state = np.asarray(state, dtype=np.float64).reshape(4, 1)
+        std = np.full(self.horizon, self.init_std)
+        best, best_return = mean.copy(), -np.inf
+        for _ in range(self.iterations):
+            noise = self.rng.standard_normal((self.horizon, self.samples))
+            actions = np.clip(mean[:, None] + std[:, None] * noise, -1.0, 1.0)
+            actions[:, 0] = best  # the best sequence so far stays in the population
+            final = np.repeat(state, self.samples, axis=1)
+            returns = cartpole_rollout(final, actions, self.params, self.version, discount=self.discount)
+            returns -= self.terminal_cost * (final[0] ** 2 + final[1] ** 2)
+            elite_idx = np.argpartition(-returns, self.elites)[:self.elites]
+            elites = actions[:, elite_idx]
+            mean[:] = self.smoothing * mean + (1 - self.smoothing) * elites.mean(axis=1)
+            std = np.maximum(self.smoothing * std + (1 - self.smoothing) * elites.std(axis=1), self.min_std)
+            k = int(np.argmax(returns))
+            if returns[k] > best_return:
+                best, best_return = actions[:, k].copy(), returns[k]
+        mean[:] = best
+        return float(best[0])
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=True):
+        """Same signature as the SB3 models: observations (x, x_dot, cos, sin, theta_dot) -> forces."""
+        obs = np.asarray(observation, dtype=np.float64).reshape(-1, 5)
+        if len(self._plans) != len(obs):
+            self.reset(len(obs))
+        if episode_start is not None:
+            self._plans[np.asarray(episode_start, dtype=bool)] = 0.0
+        actions = np.empty((len(obs), 1), dtype=np.float32)
+        for i, (x, x_dot, cos_t, sin_t, theta_dot) in enumerate(obs):
+            theta = np.arctan2(sin_t, cos_t)
+            actions[i, 0] = self.plan((x, x_dot, theta, theta_dot), self._plans[i])
+            # Warm start: the rest of the plan, held on its last force
+            self._plans[i, :-1] = self._plans[i, 1:]
+        return actions, None
+
+
+if __name__ == "__main__":
+    from common.evaluate import evaluate_policy
+
+    parser = argparse.ArgumentParser(description="CEM model-predictive control baseline")
+    parser.add_argument("--version", default="v6")
+    parser.add_argument("--episodes", type=int, default=10)
+    parser.add_argument("--max-steps", type=int, default=500)
+    parser.add_argument("--horizon", type=int, default=60)
+    parser.add_argument("--samples", type=int, default=512)
+    parser.add_argument("--iterations", type=int, default=4)
+    parser.add_argument("--terminal-cost", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    controller = CEMController(args.version, args.horizon, args.samples, args.iterations,
+                               terminal_cost=args.terminal_cost, seed=args.seed)
+    obs = SwingUpCartPoleVecEnv(num_envs=1, version=args.version, seed=args.seed).reset()
+    controller.predict(obs)  # JIT warm-up
+    start = time.perf_counter()
+    for _ in range(50):
+        controller.predict(obs)
+    per_action = (time.perf_counter() - start) / 50
+    print(f"{per_action * 1000:.1f} ms par action ({'temps réel' if per_action < 0.02 else 'plus lent que'} 50 Hz)")
+
+    metrics = evaluate_policy(controller, args.version, args.episodes, args.max_steps, seed=args.seed)
+    print(json.dumps(metrics, indent=1))
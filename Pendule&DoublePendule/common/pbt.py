@@ -0,0 +1,199 @@
+# Population-based training (PBT) of PPO on the swing-up family.
+#
+# A population of PPO learners of one variant trains in parallel, one process
+# per member. Each member is an ordinary run of the trainers' layout, so the
+# visualizers, common/evaluate.py and common/export.py work on it unchanged:
+#     Vx/models/PPO_SwingUp_Vx/pbt_<date>_mKK/<steps>.zip (+ <steps>_env.pkl)
+#     Vx/logs_swingup_vx/pbt_<date>_mKK/
+# and the history of the population (scores, hyperparameters, copies) goes to
+#     Vx/models/PPO_SwingUp_Vx/pbt_<date>.json
+# At the end, LATEST.json points at the best member of the last generation.
+#
+# Training goes by generations of `interval` steps. After each one, every
+# member is scored on the same starting states (success rate, then mean
+# return, as common/evaluate.py). The members in the bottom `fraction` then
+# restart from the checkpoint of a member drawn from the top `fraction`
+# (exploit: weights, optimizer state and normalization statistics). They
+# also take its hyperparameters, each multiplied by 0.8 or 1.2 (explore).
+#
+# Usage (from the Pendule&DoublePendule folder):
+#     python -m common.pbt v6                          # one member per core, 40 x 25k steps
+#     python -m common.pbt v5 --population 8 --generations 20 --interval 50000
+import argparse
+import datetime
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from common.checkpoints import mark_latest, record_checkpoint, reward_stats, write_json
+from common.launcher import PPO_KWARGS, VARIANTS
+from common.reward_spec import SPECS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+NUM_ENVS = 16  # carts per member, n_steps = 2048 // NUM_ENVS as in the trainers
+EVAL_EPISODES = 200
+EVAL_SEED = 12345
+
+# Explored hyperparameters: name -> (low, high, log scale)
+HYPERPARAMS = {
+    "learning_rate": (1e-5, 3e-3, True),
+    "ent_coef": (1e-4, 0.05, True),
+    "clip_range": (0.05, 0.4, False),
+    "gae_lambda": (0.8, 0.99, False),
+}
+PERTURB = (0.8, 1.2)
+
+
+def sample_hyperparams(rng):
+    params = {}
+    for name, (low, high, log) in HYPERPARAMS.items():
+        if log:
+            params[name] = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+        else:
+            params[name] = float(rng.uniform(low, high))
+    return params
+
+
+def perturb(params, rng):
+    # Explore step: every hyperparameter times 0.8 or 1.2, kept in its range
+    new = {}
+    for name, value in params.items():
+        low, high, _ = HYPERPARAMS[name]
+        new[name] = float(np.clip(value * rng.choice(PERTURB), low, high))
+    return new
+
+
+def train_member(variant, run_dir, log_dir, start, hyperparams, interval, seed, reward=None):
+    """
+    Trains one member for ``interval`` steps from ``start`` (checkpoint entry
+    or None), saves and records the checkpoint in ``run_dir``, returns its score.
+    Runs in a pool worker: one torch thread each.
+    """
+    import torch
+    from stable_baselines3 import PPO
+    from stable_baselines3.common.vec_env import VecNormalize
+
+    from common.evaluate import evaluate_policy
+    from common.registry import make_batched
+
+    torch.set_num_threads(1)
+    normalize = VARIANTS[variant][4]
+    env = make_batched(variant, NUM_ENVS, seed, reward=reward)
+    if normalize:
+        if start and start["norm_stats_path"]:
+            env = VecNormalize.load(start["norm_stats_path"], env)
+        else:
+            env = VecNormalize(env, norm_obs=True, norm_reward=True, clip_obs=10.)
+
+    if start:
+        # Own checkpoint, or the one of the member copied (exploit)
+        model = PPO.load(start["path"], env=env, device="cpu",
+                         custom_objects=dict(hyperparams, tensorboard_log=log_dir))
+    else:
+        kwargs = dict(PPO_KWARGS[variant], **hyperparams)
+        model = PPO("MlpPolicy", env, verbose=0, tensorboard_log=log_dir, seed=seed, device="cpu",
+                    n_steps=2048 // NUM_ENVS, batch_size=64, **kwargs)
+
+    model.learn(total_timesteps=interval, reset_num_timesteps=False)
+    steps = model.num_timesteps
+    model_path = os.path.join(run_dir, f"{steps}")
+    model.save(model_path)
+    norm_stats = None
+    if normalize:
+        norm_stats = os.path.join(run_dir, f"{steps}_env.pkl")
+        env.save(norm_stats)
+    # LATEST.json is left alone: pbt() points it at the best member at the end
+    entry = record_checkpoint(run_dir, steps, model_path, norm_stats, reward_stats(model), latest=False)
+    env.close()
+
+    metrics = evaluate_policy(model, variant, EVAL_EPISODES, norm_stats_path=norm_stats, seed=EVAL_SEED)
+    return {
+        "path": os.path.join(run_dir, entry["file"]),
+        "norm_stats_path": norm_stats,
+        "step": steps,
+        "success_rate": metrics["success_rate"],
+        "mean_return": metrics["mean_return"],
+    }
+
+
+def pbt(variant, population=None, generations=40, interval=25_000, fraction=0.25, num_workers=None,
+        seed=0, reward=None):
+    folder, models_name, logs_name, prefix, _ = VARIANTS[variant]
+    population = population or max(2, os.cpu_count() or 1)
+    num_workers = num_workers or min(population, os.cpu_count() or 1)
+    # Top and bottom never overlap
+    n_swap = max(1, min(int(population * fraction), population // 2))
+    rng = np.random.default_rng(seed)
+
+    pbt_id = datetime.datetime.now().strftime(f"{prefix.replace('run', 'pbt')}_%Y%m%d_%H%M%S")
+    models_dir = os.path.join(ROOT, folder, "models", models_name)
+    members = []
+    for k in range(population):
+        run_id = f"{pbt_id}_m{k:02d}"
+        run_dir = os.path.join(models_dir, run_id)
+        log_dir = os.path.join(ROOT, folder, logs_name, run_id)
+        os.makedirs(run_dir, exist_ok=True)
+        os.makedirs(log_dir, exist_ok=True)
+        members.append({"run_dir": run_dir, "log_dir": log_dir, "start": None,
+                        "hyperparams": sample_hyperparams(rng)})
+    history = {"pbt_id": pbt_id, "variant": variant, "interval": interval, "fraction": fraction,
+               "generations": []}
+    history_path = os.path.join(models_dir, f"{pbt_id}.json")
+
+    print(f"PBT {pbt_id}: {population} membres, {num_workers} workers, {generations} x {interval} steps")
+    ctx = mp.get_context("forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn")
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=ctx) as pool:
+        for generation in range(generations):
+            start_time = time.perf_counter()
+            futures = [
+                pool.submit(train_member, variant, m["run_dir"], m["log_dir"], m["start"], m["hyperparams"],
+                            interval, seed + 1000 * generation + k, reward)
+                for k, m in enumerate(members)
+            ]
+            results = [future.result() for future in futures]
+
+            # Best first: success rate, then return
+            order = sorted(range(population), key=lambda k: (results[k]["success_rate"], results[k]["mean_return"]),
+                           reverse=True)
+            top, bottom = order[:n_swap], order[-n_swap:]
+            record = []
+            for k, m in enumerate(members):
+                record.append(dict(results[k], member=k, hyperparams=m["hyperparams"], copied_from=None))
+                m["start"] = results[k]
+            for k in bottom:
+                donor = int(rng.choice(top))
+                members[k]["start"] = results[donor]
+                members[k]["hyperparams"] = perturb(members[donor]["hyperparams"], rng)
+                record[k]["copied_from"] = donor
+            history["generations"].append(record)
+            write_json(history_path, history)
+
+            best = results[order[0]]
+            print(f"Génération {generation + 1}/{generations} ({time.perf_counter() - start_time:.0f}s) : "
+                  f"meilleur m{order[0]:02d} {best['success_rate']:.1%} de succès, retour {best['mean_return']:.1f} | "
+                  + ", ".join(f"m{k:02d} <- m{record[k]['copied_from']:02d}" for k in bottom))
+
+    best = max(history["generations"][-1], key=lambda r: (r["success_rate"], r["mean_return"]))
+    mark_latest(members[best["member"]]["run_dir"], best["step"])
+    print(f"\nMeilleur membre : {best['path']} ({best['success_rate']:.1%} de succès)")
+    return history_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Population-based training of PPO")
+    parser.add_argument("variant", choices=sorted(VARIANTS))
+    parser.add_argument("--population", type=int, default=None, help="members (default: cores)")
+    parser.add_argument("--generations", type=int, default=40)
+    parser.add_argument("--interval", type=int, default=25_000, help="steps per member between two exploits")
+    parser.add_argument("--fraction", type=float, default=0.25, help="share of members replaced / copied")
+    parser.add_argument("--workers", type=int, default=None, help="concurrent members (default: cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reward", choices=sorted(SPECS), default=None, help="reward spec (default: the variant's)")
+    args = parser.parse_args()
+
+    pbt(args.variant, args.population, args.generations, args.interval, args.fraction, args.workers,
+        args.seed, args.reward)
@@ -0,0 +1,365 @@
+# Equations of motion of the cart-pole (V3-V6) and of the double pendulum
+# on a cart (V3 double). All functions work on scalars or on arrays whose
+# first axis is the state variable, e.g. a (4, N) batch of cart-poles.
+#
+# cartpole_step is the entry point of the batched cart-pole envs for dynamics
+# AND reward. It runs a Numba kernel when Numba is installed and falls back to
+# NumPy array expressions otherwise. The single envs (V3 to V6) call
+# cartpole_step_single, the same formulas on one cart without any temporary
+# array: a Numba kernel, or the same code as plain Python floats.
+# The rewards come from common/reward_spec.py (SPECS): each kernel is compiled
+# once per process for a reward, around the scalar function of its spec.
+import math
+
+import numpy as np
+
+from common.integrators import INTEGRATORS, integrate
+from common.jit import get_backend, njit, set_backend  # noqa: F401 (backend switch, see common/jit.py)
+from common.reward_spec import compile_reward, get_spec, scalar_reward
+
+
+# --- CART-POLE (simple) ---
+
+def cartpole_derivatives(state, force, gravity, masscart, masspole, length):
+    # state = [x, x_dot, theta, theta_dot], theta = 0 is upright
+    x, x_dot, theta, theta_dot = state
+    total_mass = masspole + masscart
+    polemass_length = masspole * length
+
+    costheta = np.cos(theta)
+    sintheta = np.sin(theta)
+
+    temp = (force + polemass_length * theta_dot ** 2 * sintheta) / total_mass
+    thetaacc = (gravity * sintheta - costheta * temp) / (length * (4.0 / 3.0 - masspole * costheta ** 2 / total_mass))
+    xacc = temp - polemass_length * thetaacc * costheta / total_mass
+
+    return np.array([x_dot, xacc, theta_dot, thetaacc])
+
+
+def cartpole_energy(state, gravity, masscart, masspole, length):
+    # Cart + uniform rod of half-length `length`, (inertia 4/3 m l^2 about the pivot)
+    x, x_dot, theta, theta_dot = state
+    kinetic = (0.5 * (masscart + masspole) * x_dot**2
+               + masspole * length * x_dot * theta_dot * np.cos(theta)
+               + 0.5 * (4.0 / 3.0) * masspole * length**2 * theta_dot**2)
+    potential = masspole * gravity * length * np.cos(theta)
+    return kinetic + potential
+
+
+# --- CART-POLE CORE (dynamics + reward) ---
+
+# Order of the rows of the parameter array given to cartpole_step
+CARTPOLE_PARAMS = ("gravity", "masscart", "masspole", "length", "force_mag", "tau", "x_threshold")
+INTEGRATOR_IDS = {name: i for i, name in enumerate(INTEGRATORS)}
+
+# Kernels compiled for one reward (closures over its scalar function), by scalar
+# function, or by (reward argument, jit) for the single-cart kernel
+_STEP_KERNELS = {}
+_SINGLE_KERNELS = {}
+_ROLLOUT_KERNELS = {}
+# NumPy code of the rewards on the "numpy" backend, by (spec, number of carts, dtype)
+_ARRAY_REWARDS = {}
+
+
+def cartpole_params(env):
+    """
+    Read the CARTPOLE_PARAMS attributes of ``env`` into a (7, 1) array,
+    or (7, N) when some of them hold one value per cart.
+    """
+    values = [getattr(env, name) for name in CARTPOLE_PARAMS]
+    try:
+        params = np.array(values, dtype=np.float64)
+    except ValueError:
+        params = np.array(np.broadcast_arrays(*[np.asarray(v, dtype=np.float64) for v in values]))
+    return params.reshape(len(CARTPOLE_PARAMS), -1)
+
+
+@njit(cache=True)
+def _accelerations(theta, theta_dot, force, gravity, masscart, masspole, length):
+    total_mass = masspole + masscart
+    polemass_length = masspole * length
+    costheta = math.cos(theta)
+    sintheta = math.sin(theta)
+    temp = (force + polemass_length * theta_dot ** 2 * sintheta) / total_mass
+    thetaacc = (gravity * sintheta - costheta * temp) / (length * (4.0 / 3.0 - masspole * costheta ** 2 / total_mass))
+    xacc = temp - polemass_length * thetaacc * costheta / total_mass
+    return xacc, thetaacc
+
+
+@njit(cache=True)
+def _integrate(x, x_dot, theta, theta_dot, force, gravity, masscart, masspole, length, tau, method, substeps):
+    h = tau / substeps
+    for _ in range(substeps):
+        if method == 0:
+            # Explicit Euler
+            xacc, thetaacc = _accelerations(theta, theta_dot, force, gravity, masscart, masspole, length)
+            x, theta = x + h * x_dot, theta + h * theta_dot
+            x_dot, theta_dot = x_dot + h * xacc, theta_dot + h * thetaacc
+        elif method == 1:
+            # Semi-implicit Euler
+            xacc, thetaacc = _accelerations(theta, theta_dot, force, gravity, masscart, masspole, length)
+            x_dot, theta_dot = x_dot + h * xacc, theta_dot + h * thetaacc
+            x, theta = x + h * x_dot, theta + h * theta_dot
+        else:
+            # RK4
+            a1, b1 = _accelerations(theta, theta_dot, force, gravity, masscart, masspole, length)
+            xd2, td2 = x_dot + 0.5 * h * a1, theta_dot + 0.5 * h * b1
+            a2, b2 = _accelerations(theta + 0.5 * h * theta_dot, td2, force, gravity, masscart, masspole, length)
+            xd3, td3 = x_dot + 0.5 * h * a2, theta_dot + 0.5 * h * b2
+            a3, b3 = _accelerations(theta + 0.5 * h * td2, td3, force, gravity, masscart, masspole, length)
+            xd4, td4 = x_dot + h * a3, theta_dot + h * b3
+            a4, b4 = _accelerations(theta + h * td3, td4, force, gravity, masscart, masspole, length)
+            x += h / 6.0 * (x_dot + 2.0 * xd2 + 2.0 * xd3 + xd4)
+            theta += h / 6.0 * (theta_dot + 2.0 * td2 + 2.0 * td3 + td4)
+            x_dot += h / 6.0 * (a1 + 2.0 * a2 + 2.0 * a3 + a4)
+            theta_dot += h / 6.0 * (b1 + 2.0 * b2 + 2.0 * b3 + b4)
+    return x, x_dot, theta, theta_dot
+
+
+@njit(cache=True)
+def _no_reward(x, x_dot, theta, theta_dot, force_input, terminated):
+    return 0.0
+
+
+def _reward_function(reward):
+    return _no_reward if reward is None else scalar_reward(reward)
+
+
+def _array_reward(reward, n, dtype):
+    key = (get_spec(reward), n, np.dtype(dtype))
+    if key not in _ARRAY_REWARDS:
+        _ARRAY_REWARDS[key] = compile_reward(key[0], n, dtype)
+    return _ARRAY_REWARDS[key]
+
+
+def _step_kernel(reward_fn):
+    if reward_fn in _STEP_KERNELS:
+        return _STEP_KERNELS[reward_fn]
+
+    @njit
+    def kernel(state, force_input, params, method, substeps, rewards, terminated):
+        per_cart = params.shape[1] > 1
+        for i in range(state.shape[1]):
+            j = i if per_cart else 0
+            gravity, masscart, masspole = params[0, j], params[1, j], params[2, j]
+            length, force_mag, tau, x_threshold = params[3, j], params[4, j], params[5, j], params[6, j]
+            x, x_dot, theta, theta_dot = _integrate(
+                float(state[0, i]), float(state[1, i]), float(state[2, i]), float(state[3, i]),
+                force_mag * force_input[i], gravity, masscart, masspole, length, tau, method, substeps,
+            )
+            state[0, i], state[1, i], state[2, i], state[3, i] = x, x_dot, theta, theta_dot
+            done = x < -x_threshold or x > x_threshold
+            terminated[i] = done
+            rewards[i] = reward_fn(x, x_dot, theta, theta_dot, force_input[i], done)
+
+    _STEP_KERNELS[reward_fn] = kernel
+    return kernel
+
+
+def cartpole_step(state, force_input, params, reward="v6", integrator="euler", substeps=1):
+    """
+    Advance a batch of cart-poles by one control step, in place.
+
+    :param state: (4, N) array, rows x, x_dot, theta, theta_dot (float32 or float64)
+    :param force_input: (N,) force in [-1, 1], multiplied by force_mag
+    :param params: (7, 1) or (7, N) array built by cartpole_params
+    :param reward: a RewardSpec or the name of one of common.reward_spec.SPECS,
+        or None for no reward (zeros)
+    :return: (rewards, terminated), float32 and bool arrays of shape (N,)
+    """
+    if integrator not in INTEGRATOR_IDS:
+        raise ValueError(f"Unknown integrator '{integrator}', expected one of {list(INTEGRATOR_IDS)}")
+    force_input = np.ascontiguousarray(force_input, dtype=np.float64)
+    n = state.shape[1]
+    rewards = np.zeros(n, dtype=np.float32)
+
+    if get_backend() == "numba":
+        terminated = np.empty(n, dtype=np.bool_)
+        _step_kernel(_reward_function(reward))(state, force_input, params, INTEGRATOR_IDS[integrator], substeps,
+                                               rewards, terminated)
+        return rewards, terminated
+
+    gravity, masscart, masspole, length, force_mag, tau, x_threshold = params
+    force = force_mag * force_input
+
+    def deriv(s):
+        return cartpole_derivatives(s, force, gravity, masscart, masspole, length)
+
+    state[:] = integrate(deriv, state, tau, integrator, substeps)
+    x = state[0]
+    terminated = (x < -x_threshold) | (x > x_threshold)
+    if reward is not None:
+        _array_reward(reward, n, state.dtype)(state, force_input, terminated, out=rewards)
+    return rewards, terminated
+
+
+def _single_kernel(reward, jit):
+    # By reward argument (name, spec or None): no spec lookup at every step
+    key = (reward, jit)
+    if key in _SINGLE_KERNELS:
+        return _SINGLE_KERNELS[key]
+    reward_fn = _reward_function(reward)
+    if not jit:
+        reward_fn = getattr(reward_fn, "py_func", reward_fn)
+
+    def kernel(state, force_input, params, method, substeps, obs):
+        gravity, masscart, masspole, length, force_mag, tau, x_threshold = (
+            float(params[0]), float(params[1]), float(params[2]), float(params[3]),
+            float(params[4]), float(params[5]), float(params[6]),
+        )
+        x, x_dot, theta, theta_dot = _integrate(
+            float(state[0]), float(state[1]), float(state[2]), float(state[3]),
+            force_mag * force_input, gravity, masscart, masspole, length, tau, method, substeps,
+        )
+        state[0], state[1], state[2], state[3] = x, x_dot, theta, theta_dot
+        # Observation from the unrounded values, as the original envs
+        obs[0], obs[1], obs[2], obs[3], obs[4] = x, x_dot, math.cos(theta), math.sin(theta), theta_dot
+        terminated = x < -x_threshold or x > x_threshold
+        return reward_fn(x, x_dot, theta, theta_dot, force_input, terminated), terminated
+
+    # Without jit: the same kernel run by the Python interpreter (no Numba, or the "numpy" backend)
+    _SINGLE_KERNELS[key] = njit(kernel) if jit else kernel
+    return _SINGLE_KERNELS[key]
+
+
+def cartpole_step_single(state, force_input, params, reward="v6", integrator="euler", substeps=1):
+    """
+    Advance one cart-pole by one control step, in place, with no temporary
+    arrays. Used by the single envs, step after step.
+
+    :param state: (4,) array x, x_dot, theta, theta_dot, updated in place
+        (a float32 state is rounded as in the original envs)
+    :param force_input: force in [-1, 1] (float), multiplied by force_mag
+    :param params: (7,) float64 array, see cartpole_params
+    :param reward: a RewardSpec or the name of one of common.reward_spec.SPECS, or None
+    :return: (obs, reward, terminated), obs = float32 [x, x_dot, cos, sin, theta_dot]
+    """
+    if integrator not in INTEGRATOR_IDS:
+        raise ValueError(f"Unknown integrator '{integrator}', expected one of {list(INTEGRATOR_IDS)}")
+    obs = np.empty(5, dtype=np.float32)
+    method = INTEGRATOR_IDS[integrator]
+    if get_backend() == "numba":
+        reward, terminated = _single_kernel(reward, True)(state, force_input, params, method, substeps, obs)
+    else:
+        # Python floats are much cheaper than NumPy scalars in the interpreter
+        reward, terminated = _single_kernel(reward, False)(state, force_input, params.tolist(), method, substeps, obs)
+    return obs, reward, terminated
+
+
+def _rollout_kernel(reward_fn):
+    if reward_fn in _ROLLOUT_KERNELS:
+        return _ROLLOUT_KERNELS[reward_fn]
+    step = _step_kernel(reward_fn)
+
+    @njit
+    def kernel(state, actions, params, method, substeps, discount, returns):
+        n = state.shape[1]
+        rewards = np.empty(n, dtype=np.float32)
+        terminated = np.empty(n, dtype=np.bool_)
+        alive = np.ones(n, dtype=np.bool_)
+        weight = 1.0
+        for t in range(actions.shape[0]):
+            step(state, actions[t], params, method, substeps, rewards, terminated)
+            for i in range(n):
+                if alive[i]:
+                    returns[i] += weight * rewards[i]
+                    alive[i] = not terminated[i]
+            weight *= discount
+
+    _ROLLOUT_KERNELS[reward_fn] = kernel
+    return kernel
+
+
+def cartpole_rollout(state, actions, params, reward="v6", integrator="euler", substeps=1, discount=1.0):
+    """
+    Plays N action sequences from N states and returns their (discounted)
+    returns. An episode stops counting at its crash (reward included).
+    Used by the planners (common/mpc.py): one call simulates all the
+    candidates over the whole horizon.
+
+    :param state: (4, N) float64 array, advanced in place
+    :param actions: (H, N) force inputs in [-1, 1], time-major
+    :return: (N,) float64 returns
+    """
+    returns = np.zeros(state.shape[1])
+    actions = np.ascontiguousarray(actions, dtype=np.float64)
+    if get_backend() == "numba":
+        _rollout_kernel(scalar_reward(reward))(state, actions, params, INTEGRATOR_IDS[integrator], substeps,
+                                               discount, returns)
+        return returns
+    alive = np.ones(state.shape[1], dtype=bool)
+    weight = 1.0
+    for force_input in actions:
+        rewards, terminated = cartpole_step(state, force_input, params, reward, integrator, substeps)
+        returns += np.where(alive, weight * rewards, 0.0)
+        alive &= ~terminated
+        weight *= discount
+    return returns
+
+
+# --- DOUBLE PENDULE ---
+
+def double_pendulum_accelerations(th1, th1_dot, th2, th2_dot, u, g, m_cart, m1, m2, l1, l2):
+    """
+    Accelerations [x_acc, th1_acc, th2_acc] of the double pendulum on a cart.
+
+    Same system A * acc = B as the original ``deriv``, but the symmetric 3x3
+    matrix is inverted in closed form (cofactors / determinant) instead of
+    calling ``np.linalg.solve``. Works on scalars or on arrays of any shape,
+    so N environments are solved with a handful of array operations.
+    """
+    s1, c1 = np.sin(th1), np.cos(th1)
+    s2, c2 = np.sin(th2), np.cos(th2)
+    s12, c12 = np.sin(th1 - th2), np.cos(th1 - th2)
+
+    m = m1 + m2
+    M = m_cart + m
+
+    # A = [[a, b, c], [b, d, e], [c, e, f]]
+    a = M
+    b = l1 * m * c1
+    c = m2 * l2 * c2
+    d = l1**2 * m
+    e = l1 * l2 * m2 * c12
+    f = l2**2 * m2
+
+    B0 = u + l1 * m * s1 * th1_dot**2 + m2 * l2 * s2 * th2_dot**2
+    B1 = -l1 * l2 * m2 * s12 * th2_dot**2 + m * g * l1 * s1
+    B2 = l1 * l2 * m2 * s12 * th1_dot**2 + m2 * g * l2 * s2
+
+    # Cofactors of the symmetric matrix (the adjugate is symmetric too)
+    C11 = d * f - e * e
+    C12 = c * e - b * f
+    C13 = b * e - c * d
+    C22 = a * f - c * c
+    C23 = b * c - a * e
+    C33 = a * d - b * b
+    inv_det = 1.0 / (a * C11 + b * C12 + c * C13)
+
+    x_acc = (C11 * B0 + C12 * B1 + C13 * B2) * inv_det
+    th1_acc = (C12 * B0 + C22 * B1 + C23 * B2) * inv_det
+    th2_acc = (C13 * B0 + C23 * B1 + C33 * B2) * inv_det
+    return x_acc, th1_acc, th2_acc
+
+
+def double_pendulum_derivatives(state, u, g, m_cart, m1, m2, l1, l2):
+    # state = [x, x_dot, th1, th1_dot, th2, th2_dot]
+    x, x_dot, th1, th1_dot, th2, th2_dot = state
+    x_acc, th1_acc, th2_acc = double_pendulum_accelerations(
+        th1, th1_dot, th2, th2_dot, u, g, m_cart, m1, m2, l1, l2
+    )
+    return np.array([x_dot, x_acc, th1_dot, th1_acc, th2_dot, th2_acc])
+
+
+def double_pendulum_energy(state, g, m_cart, m1, m2, l1, l2):
+    # Point masses m1 at the end of link 1 and m2 at the end of link 2
+    x, x_dot, th1, th1_dot, th2, th2_dot = state
+    m = m1 + m2
+    kinetic = (0.5 * (m_cart + m) * x_dot**2
+               + m * l1 * np.cos(th1) * x_dot * th1_dot
+               + m2 * l2 * np.cos(th2) * x_dot * th2_dot
+               + 0.5 * m * l1**2 * th1_dot**2
+               + m2 * l1 * l2 * np.cos(th1 - th2) * th1_dot * th2_dot
+               + 0.5 * m2 * l2**2 * th2_dot**2)
+    potential = m * g * l1 * np.cos(th1) + m2 * g * l2 * np.cos(th2)
+    return kinetic + potential
@@ -0,0 +1,220 @@
+# Throughput and latency of the PPO phases, measured during training.
+#
+# ProfilingCallback splits the wall time of every PPO iteration into:
+# - env step: VecEnv.step of the training env (physics, reward, resets,
+#   VecNormalize, waiting for the workers of SharedMemoryVecEnv);
+# - inference: forward pass of the policy that picks the rollout actions;
+# - other: the rest of the rollout collection (tensor conversions, buffer);
+# - update: the gradient epochs of PPO.train() after the rollout;
+# plus the rollout throughput (steps/s) and the memory of the training
+# process (RSS, peak RSS, CUDA memory when on GPU) after each phase.
+#
+# The env step and the policy forward are timed by wrapping the two methods
+# on the instances for the duration of learn(), nothing to change in the env
+# or the model. Metrics go to TensorBoard (perf/*, memory/*) and, one row per
+# rollout, to perf.csv in the TensorBoard folder of the run
+# (Vx/logs_swingup_vx/<run_id>/PPO_<k>/perf.csv). The update time of a rollout
+# is known after the TensorBoard dump of its iteration: it is logged with the
+# next one, like the train/* metrics of SB3.
+#
+# Usage:
+#     model.learn(..., callback=ProfilingCallback())
+#     python -m common.profiling V6/logs_swingup_v6/run_xxx     # summary of the perf.csv of a run
+import argparse
+import csv
+import glob
+import os
+import time
+
+import numpy as np
+from stable_baselines3.common.callbacks import BaseCallback
+
+try:
+    import psutil
+except ImportError:  # optional, /proc is read on Linux otherwise
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CSV_NAME = "perf.csv"
+FIELDS = [
+    "step", "rollout_steps", "rollout_s", "fps", "env_ms", "inference_ms", "other_ms", "update_s",
+    "rss_rollout_mb", "rss_update_mb", "peak_rss_mb", "cuda_mb",
+]
+
+
+def rss_mb():
+    # Resident memory of this process (MB), None when it cannot be read
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 2**20
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kB on Linux
+
+
+class _Timer:
+    # Wraps a bound method: accumulated time and number of calls
+    def __init__(self, method):
+        self.method = method
+        self.total = 0.0
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.method(*args, **kwargs)
+        finally:
+            self.total += time.perf_counter() - start
+            self.calls += 1
+
+    def pop(self):
+        total, calls = self.total, self.calls
+        self.total, self.calls = 0.0, 0
+        return total, calls
+
+
+class ProfilingCallback(BaseCallback):
+    """
+    Time and memory of each phase of every PPO iteration, to TensorBoard and CSV.
+
+    :param csv_path: CSV file of the rows (default: perf.csv in the TensorBoard
+        folder of the run, no CSV when the model has no TensorBoard log)
+    :param verbose: 1 prints the split of every rollout
+    """
+
+    def __init__(self, csv_path=None, verbose=0):
+        super().__init__(verbose)
+        self.csv_path = csv_path
+        self._update_start = None
+        self._update_time = None
+        self._rss_update = None
+
+    def _on_training_start(self):
+        self._env_timer = _Timer(self.training_env.step)
+        self._policy_timer = _Timer(self.model.policy.forward)
+        self.training_env.step = self._env_timer
+        self.model.policy.forward = self._policy_timer
+        if self.csv_path is None and self.model.tensorboard_log is not None:
+            self.csv_path = os.path.join(self.logger.get_dir(), CSV_NAME)
+
+    def _on_training_end(self):
+        # The methods of the class are visible again
+        del self.training_env.step
+        del self.model.policy.forward
+        self._end_update()
+
+    def _end_update(self):
+        if self._update_start is not None:
+            self._update_time = time.perf_counter() - self._update_start
+            self._rss_update = rss_mb()
+            self._update_start = None
+
+    def _on_rollout_start(self):
+        self._end_update()
+        self._env_timer.pop()
+        self._policy_timer.pop()
+        self._rollout_start = time.perf_counter()
+        self._rollout_steps = self.num_timesteps
+
+    def _on_step(self):
+        return True
+
+    def _on_rollout_end(self):
+        now = time.perf_counter()
+        elapsed = now - self._rollout_start
+        steps = self.num_timesteps - self._rollout_steps
+        env_time, env_calls = self._env_timer.pop()
+        policy_time, _ = self._policy_timer.pop()
+        calls = max(env_calls, 1)
+        row = {
+            "step": self.num_timesteps,
+            "rollout_steps": steps,
+            "rollout_s": elapsed,
+            "fps": steps / max(elapsed, 1e-9),
+            "env_ms": env_time / calls * 1000,
+            "inference_ms": policy_time / calls * 1000,
+            "other_ms": (elapsed - env_time - policy_time) / calls * 1000,
+            "update_s": self._update_time,
+            "rss_rollout_mb": rss_mb(),
+            "rss_update_mb": self._rss_update,
+            "peak_rss_mb": peak_rss_mb(),
+            "cuda_mb": None,
+        }
+        if self.model.device.type == "cuda":
+            import torch
+
+            row["cuda_mb"] = torch.cuda.max_memory_allocated(self.model.device) / 2**20
+
+        self.logger.record("time/rollout_fps", row["fps"])
+        for key in ("env_ms", "inference_ms", "other_ms", "update_s"):
+            if row[key] is not None:
+                self.logger.record(f"perf/{key}", row[key])
+        for key in ("rss_rollout_mb", "rss_update_mb", "peak_rss_mb", "cuda_mb"):
+            if row[key] is not None:
+                self.logger.record(f"memory/{key}", row[key])
+        if self.csv_path:
+            self._write_row(row)
+        if self.verbose:
+            update = f", update précédente {row['update_s']:.2f}s" if row["update_s"] is not None else ""
+            print(f"Rollout: {steps} steps en {elapsed:.2f}s ({row['fps']:,.0f} steps/s) | par step : "
+                  f"env {row['env_ms']:.2f} ms, inférence {row['inference_ms']:.2f} ms, "
+                  f"autre {row['other_ms']:.2f} ms{update}")
+        self._update_start = time.perf_counter()
+
+    def _write_row(self, row):
+        new = not os.path.exists(self.csv_path)
+        with open(self.csv_path, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            if new:
+                writer.writeheader()
+            writer.writerow({k: ("" if v is None else v) for k, v in row.items()})
+
+
+def read_rows(path):
+    # Rows of a perf.csv, or of every perf.csv under a folder
+    paths = [path] if path.endswith(".csv") else sorted(glob.glob(os.path.join(path, "**", CSV_NAME), recursive=True))
+    rows = []
+    for p in paths:
+        with open(p, newline="") as f:
+            rows.extend(csv.DictReader(f))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summary of the perf.csv of a training run")
+    parser.add_argument("path", help="perf.csv, or a logs folder to search")
+    args = parser.parse_args()
+
+    rows = read_rows(args.path)
+    if not rows:
+        parser.error(f"aucun {CSV_NAME} sous {args.path}")
+
+    def column(name):
+        return np.array([float(r[name]) for r in rows if r[name] != ""])
+
+    rollout = column("rollout_s").sum()
+    update = column("update_s").sum()
+    steps = column("rollout_steps").sum()
+    env = (column("env_ms") * column("rollout_steps")).sum()  # per vec step, weighted by the rollout size
+    inference = (column("inference_ms") * column("rollout_steps")).sum()
+    other = (column("other_ms") * column("rollout_steps")).sum()
+    per_step = env + inference + other
+    total = rollout + update
+    print(f"{len(rows)} rollouts, {steps:,.0f} steps, {total:.0f} s ({steps / total:,.0f} steps/s en moyenne)")
+    print(f"  collecte  {rollout / total:6.1%}  dont env {env / per_step:.0%}, inférence {inference / per_step:.0%}, "
+          f"autre {other / per_step:.0%}")
+    print(f"  update    {update / total:6.1%}")
+    peak = column("peak_rss_mb")
+    if peak.size:
+        print(f"  mémoire   {peak.max():.0f} Mo (pic RSS)")
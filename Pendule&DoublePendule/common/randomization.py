@@ -0,0 +1,94 @@
+# Domain randomization of the physical parameters of the batched envs.
+#
+# A DomainRandomizer gives each physical attribute of an env (gravity,
+# masscart, masspole, length, force_mag for the cart-pole; g, m_cart, m1, m2,
+# l1, l2, force_mag for the double pendulum) a distribution. Once attached,
+# the attributes hold one value per env, shape (N,), and new values are drawn
+# for every env that is reset. The physics already broadcasts over them
+# (cartpole_params builds a (7, N) array), so N different carts still advance
+# in one vectorized step.
+#
+# Distributions, (kind, a, b):
+#     ("uniform", low, high)        absolute bounds
+#     ("loguniform", low, high)     absolute bounds, uniform in log space
+#     ("normal", mean, std)         absolute, clipped at mean +- 3 std
+#     ("scale", low, high)          nominal value (the env's) times U(low, high)
+#
+# Usage:
+#     SwingUpCartPoleVecEnv(num_envs=256, version="v6", randomization=CARTPOLE_RANDOMIZATION)
+#     python -m common.launcher v6 --randomize
+import numpy as np
+
+KINDS = ("uniform", "loguniform", "normal", "scale")
+
+# +-5% gravity, +-20% masses and length, +-10% motor
+CARTPOLE_RANDOMIZATION = {
+    "gravity": ("scale", 0.95, 1.05),
+    "masscart": ("scale", 0.8, 1.2),
+    "masspole": ("scale", 0.8, 1.2),
+    "length": ("scale", 0.8, 1.2),
+    "force_mag": ("scale", 0.9, 1.1),
+}
+DOUBLE_RANDOMIZATION = {
+    "g": ("scale", 0.95, 1.05),
+    "m_cart": ("scale", 0.8, 1.2),
+    "m1": ("scale", 0.8, 1.2),
+    "m2": ("scale", 0.8, 1.2),
+    "l1": ("scale", 0.9, 1.1),
+    "l2": ("scale", 0.9, 1.1),
+    "force_mag": ("scale", 0.9, 1.1),
+}
+
+
+class DomainRandomizer:
+    """
+    Per-env sampling of physical parameters.
+
+    :param ranges: {attribute: (kind, a, b)}, see KINDS
+    """
+
+    def __init__(self, ranges):
+        for name, (kind, a, b) in ranges.items():
+            if kind not in KINDS:
+                raise ValueError(f"Unknown distribution '{kind}' for '{name}', expected one of {list(KINDS)}")
+            if kind != "normal" and not a <= b:
+                raise ValueError(f"Empty range for '{name}': [{a}, {b}]")
+            if kind == "loguniform" and a <= 0:
+                raise ValueError(f"loguniform bounds of '{name}' must be positive")
+        self.ranges = dict(ranges)
+        self.nominal = {}
+
+    def attach(self, env):
+        """Turns the randomized attributes of ``env`` into (N,) arrays of their nominal value."""
+        for name in self.ranges:
+            if not hasattr(env, name):
+                raise ValueError(f"{type(env).__name__} has no physical parameter '{name}'")
+            self.nominal[name] = float(getattr(env, name))
+            setattr(env, name, np.full(env.num_envs, self.nominal[name]))
+
+    def sample(self, rng, n):
+        """Draws ``n`` values of every parameter: {attribute: (n,) array}."""
+        values = {}
+        for name, (kind, a, b) in self.ranges.items():
+            if kind == "uniform":
+                values[name] = rng.uniform(a, b, n)
+            elif kind == "loguniform":
+                values[name] = np.exp(rng.uniform(np.log(a), np.log(b), n))
+            elif kind == "normal":
+                values[name] = np.clip(rng.normal(a, b, n), a - 3 * b, a + 3 * b)
+            else:
+                values[name] = self.nominal[name] * rng.uniform(a, b, n)
+        return values
+
+    def resample(self, env, indices):
+        """New parameters for the envs ``indices`` (array of indices or slice(None))."""
+        n = len(indices) if isinstance(indices, np.ndarray) else env.num_envs
+        for name, values in self.sample(env.np_random, n).items():
+            getattr(env, name)[indices] = values
+
+
+def make_randomizer(randomization):
+    # None, a DomainRandomizer or a dict of ranges
+    if randomization is None or isinstance(randomization, DomainRandomizer):
+        return randomization
+    return DomainRandomizer(randomization)
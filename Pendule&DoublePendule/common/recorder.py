@@ -0,0 +1,257 @@
+# Trajectory recording of the pendulum envs.
+#
+# TrajectoryRecorder wraps any VecEnv (batched env or DummyVecEnv of a single
+# env) and streams, for every step t and every env i:
+#     obs (seen by the policy), action, reward, done, state (raw physics state)
+# into a folder of fixed-size shards. Only one shard (chunk_size steps) is kept
+# in RAM; each full shard is written to disk and the index is updated.
+#
+# Layout of a recording:
+#     <path>/index.json                 columns, shards, number of steps/envs
+#     <path>/shard_00000/obs.npy ...    one .npy per column (memory-mappable)
+#     <path>/shard_00000.npz            or one compressed .npz (compress=True)
+#     <path>/shard_00000_episodes.npy   (E, 3) int64: env, first step, end step
+#                                       of the episodes ending in the shard
+#
+# Arrays are time-major, shape (steps, num_envs, ...). TrajectoryReader opens
+# a recording and slices steps or episodes, loading only the shards it needs.
+#
+# Usage (from the Pendule&DoublePendule folder), record a checkpoint:
+#     python -m common.recorder v6 V6/models/PPO_SwingUp_V6/run_xxx/1000000.zip --steps 100000
+import argparse
+import json
+import os
+
+import numpy as np
+from stable_baselines3.common.vec_env import VecEnvWrapper
+
+from common.checkpoints import write_json
+
+
+def _raw_state(venv):
+    # (num_envs, state_dim) physics state of the wrapped env
+    env = venv.unwrapped if hasattr(venv, "unwrapped") else venv
+    state = getattr(env, "state", None)
+    if isinstance(state, np.ndarray) and state.ndim == 2 and state.shape[1] == env.num_envs:
+        return state.T  # batched envs store the state as (state_dim, num_envs)
+    return np.stack([np.asarray(s) for s in venv.get_attr("state")])
+
+
+class TrajectoryWriter:
+    """
+    Appends time-major rows to a recording folder, one shard at a time.
+
+    :param path: recording folder (created)
+    :param num_envs: number of envs of each row
+    :param chunk_size: steps per shard (RAM used: one shard)
+    :param compress: write compressed .npz shards instead of memory-mappable .npy
+    """
+
+    def __init__(self, path, num_envs, chunk_size=4096, compress=False):
+        self.path = path
+        self.num_envs = num_envs
+        self.chunk_size = chunk_size
+        self.compress = compress
+        os.makedirs(path, exist_ok=True)
+
+        self.buffers = None
+        self.fill = 0
+        self.shards = []
+        self.n_steps = 0
+        self.episodes = []
+        self.episode_start = np.zeros(num_envs, dtype=np.int64)
+
+    def _allocate(self, row):
+        self.buffers = {
+            name: np.empty((self.chunk_size, self.num_envs) + np.shape(value)[1:], dtype=np.asarray(value).dtype)
+            for name, value in row.items()
+        }
+
+    def append(self, **row):
+        if self.buffers is None:
+            self._allocate(row)
+        for name, value in row.items():
+            self.buffers[name][self.fill] = value
+        self.fill += 1
+
+        t = self.n_steps + self.fill - 1
+        for i in np.flatnonzero(row["done"]):
+            self.episodes.append((i, self.episode_start[i], t + 1))
+            self.episode_start[i] = t + 1
+
+        if self.fill == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.fill:
+            return
+        name = f"shard_{len(self.shards):05d}"
+        if self.compress:
+            np.savez_compressed(os.path.join(self.path, name + ".npz"),
+                                **{col: buf[:self.fill] for col, buf in self.buffers.items()})
+        else:
+            os.makedirs(os.path.join(self.path, name), exist_ok=True)
+            for col, buf in self.buffers.items():
+                np.save(os.path.join(self.path, name, col + ".npy"), buf[:self.fill])
+        # Episodes that ended in this shard: written once, then dropped from RAM
+        np.save(os.path.join(self.path, name + "_episodes.npy"),
+                np.array(self.episodes, dtype=np.int64).reshape(-1, 3))
+        self.episodes = []
+        self.shards.append({"name": name, "start": self.n_steps, "length": self.fill})
+        self.n_steps += self.fill
+        self.fill = 0
+        self._write_index()
+
+    def _write_index(self):
+        columns = {col: {"dtype": buf.dtype.str, "shape": list(buf.shape[2:])} for col, buf in self.buffers.items()}
+        write_json(os.path.join(self.path, "index.json"), {
+            "num_envs": self.num_envs,
+            "n_steps": self.n_steps,
+            "compressed": self.compress,
+            "columns": columns,
+            "shards": self.shards,
+        })
+
+    def close(self):
+        self.flush()
+
+
+class TrajectoryRecorder(VecEnvWrapper):
+    """
+    VecEnv wrapper that records every step with a ``TrajectoryWriter``.
+
+    Wrap the raw env (below VecNormalize) to record unnormalized observations.
+    """
+
+    def __init__(self, venv, path, chunk_size=4096, compress=False):
+        super().__init__(venv)
+        self.writer = TrajectoryWriter(path, venv.num_envs, chunk_size, compress)
+        self._obs = None
+
+    def reset(self):
+        self._obs = self.venv.reset()
+        return self._obs
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions)
+        self._state = _raw_state(self.venv).copy()
+        self.venv.step_async(actions)
+
+    def step_wait(self):
+        obs, rewards, dones, infos = self.venv.step_wait()
+        self.writer.append(
+            obs=self._obs,
+            action=self._actions.reshape((self.num_envs,) + self._actions.shape[1:]),
+            reward=rewards.astype(np.float32),
+            done=dones.astype(bool),
+            state=self._state,
+        )
+        self._obs = obs
+        return obs, rewards, dones, infos
+
+    def close(self):
+        self.writer.close()
+        self.venv.close()
+
+
+class TrajectoryReader:
+    """
+    Read access to a recording. Shards are opened lazily (memory-mapped for
+    .npy shards, decompressed one at a time for .npz shards).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "index.json")) as f:
+            self.index = json.load(f)
+        self.num_envs = self.index["num_envs"]
+        self.n_steps = self.index["n_steps"]
+        self.columns = list(self.index["columns"])
+        self.shards = self.index["shards"]
+        self._starts = np.array([s["start"] for s in self.shards], dtype=np.int64)
+        # Episodes of all the shards, in end order
+        self.episodes = np.concatenate(
+            [np.empty((0, 3), dtype=np.int64)]
+            + [np.load(os.path.join(path, s["name"] + "_episodes.npy")) for s in self.shards]
+        )
+        self._cache = (None, None)
+
+    def __len__(self):
+        return self.n_steps
+
+    def _shard(self, k):
+        if self._cache[0] == k:
+            return self._cache[1]
+        name = self.shards[k]["name"]
+        if self.index["compressed"]:
+            with np.load(os.path.join(self.path, name + ".npz")) as data:
+                shard = {col: data[col] for col in self.columns}
+        else:
+            shard = {col: np.load(os.path.join(self.path, name, col + ".npy"), mmap_mode="r")
+                     for col in self.columns}
+        self._cache = (k, shard)
+        return shard
+
+    def slice(self, start, stop, env=None, columns=None):
+        """Steps [start, stop) of every env (or of one env) as a dict of arrays."""
+        columns = columns or self.columns
+        stop = min(stop, self.n_steps)
+        parts = {col: [] for col in columns}
+        k = int(np.searchsorted(self._starts, start, side="right") - 1)
+        t = start
+        while t < stop:
+            shard, info = self._shard(k), self.shards[k]
+            lo, hi = t - info["start"], min(stop, info["start"] + info["length"]) - info["start"]
+            for col in columns:
+                rows = shard[col][lo:hi]
+                parts[col].append(rows if env is None else rows[:, env])
+            t = info["start"] + hi
+            k += 1
+        return {col: np.concatenate(p) if p else np.empty(0) for col, p in parts.items()}
+
+    def episode(self, k, columns=None):
+        """k-th finished episode (in end order) as a dict of arrays of shape (length, ...)."""
+        env, start, stop = self.episodes[k]
+        return self.slice(int(start), int(stop), int(env), columns)
+
+    def iter_episodes(self, columns=None):
+        for k in range(len(self.episodes)):
+            yield self.episode(k, columns)
+
+
+if __name__ == "__main__":
+    from stable_baselines3.common.vec_env import VecNormalize
+
+    from common.evaluate import make_eval_env, policy_actions
+    from common.export import load_policy
+
+    parser = argparse.ArgumentParser(description="Record the rollouts of a checkpoint")
+    parser.add_argument("variant", choices=["v3", "v4", "v5", "v6", "double"])
+    parser.add_argument("model", help="checkpoint .zip or exported .npz")
+    parser.add_argument("--out", default=None, help="recording folder (default: <model>_traj)")
+    parser.add_argument("--steps", type=int, default=100_000, help="steps per env")
+    parser.add_argument("--envs", type=int, default=16)
+    parser.add_argument("--chunk-size", type=int, default=4096)
+    parser.add_argument("--compress", action="store_true")
+    parser.add_argument("--stochastic", action="store_true", help="sample actions instead of the mean")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    model = load_policy(args.model)
+    out = args.out or args.model[:-len(".zip")] + "_traj"
+    env = TrajectoryRecorder(make_eval_env(args.variant, args.envs, args.seed, policy_actions(model)), out,
+                             args.chunk_size, args.compress)
+    norm_stats = args.model[:-len(".zip")] + "_env.pkl"
+    if os.path.exists(norm_stats) and not args.model.endswith(".npz"):
+        env = VecNormalize.load(norm_stats, env)
+        env.training = False
+        env.norm_reward = False
+
+    obs = env.reset()
+    for _ in range(args.steps):
+        action, _ = model.predict(obs, deterministic=not args.stochastic)
+        obs, _, _, _ = env.step(action)
+    env.close()
+
+    reader = TrajectoryReader(out)
+    print(f"{len(reader)} steps x {reader.num_envs} envs, {len(reader.episodes)} épisodes terminés -> {out}")
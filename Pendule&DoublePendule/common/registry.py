@@ -0,0 +1,139 @@
+# Gymnasium registry of every variant of the project.
+#
+# The variants live in their own folders with their own env classes and
+# action spaces: V1 / V2 train on Gymnasium's CartPole-v1, V3 - V5 on a
+# bang-bang Discrete(2) force, V6 and the double pendulum on a Box(-1, 1)
+# force. Importing this module registers the swing-up family on the batched
+# backend (common/vec_env.py, common/double_vec_env.py) under one ID each:
+#     v1, v2    CartPole-v1 (Gymnasium's own)
+#     v3 - v6   SwingUpCartPole-V3-v0 ... SwingUpCartPole-V6-v0
+#     double    DoubleSwingUpCartPole-v0
+#
+# The action parameterization is an argument of the ID, so any variant can be
+# trained with any of them:
+#     actions=None            the variant's own
+#     actions="continuous"    Box(-1, 1), force = action * force_mag
+#     actions=K               Discrete(K), K force levels evenly spaced in
+#                             [-force_mag, force_mag] (K = 2 is bang-bang)
+# For the original single envs with a Box force (V6 SwingUpCartPoleEnvV6,
+# V3 DoubleSwingUpCartPoleEnv), DiscreteForces does the same conversion.
+#
+# gym.make(env_id) gives a single Gymnasium env; make_vec(env_id, N) the
+# batched SB3 VecEnv of N envs (DummyVecEnv of gym.make for CartPole-v1).
+#
+# Usage:
+#     from common.registry import make_vec
+#     env = make_vec("SwingUpCartPole-V6-v0", 64, actions=5)
+#     python -m common.registry                    # list the IDs and their spaces
+import gymnasium as gym
+import numpy as np
+from gymnasium import spaces
+
+from common.double_vec_env import DoubleSwingUpCartPoleVecEnv
+from common.vec_env import SwingUpCartPoleVecEnv
+
+ENTRY_POINT = "common.registry:SingleEnv"
+
+# variant -> Gymnasium ID
+VARIANT_IDS = {
+    "v1": "CartPole-v1",
+    "v2": "CartPole-v1",
+    "v3": "SwingUpCartPole-V3-v0",
+    "v4": "SwingUpCartPole-V4-v0",
+    "v5": "SwingUpCartPole-V5-v0",
+    "v6": "SwingUpCartPole-V6-v0",
+    "double": "DoubleSwingUpCartPole-v0",
+}
+
+
+def parse_actions(text):
+    # Command line value of an action parameterization: "default", "continuous" or K
+    if text in (None, "default"):
+        return None
+    return text if text == "continuous" else int(text)
+
+
+def make_batched(variant, num_envs, seed=None, **kwargs):
+    """Batched env of a swing-up variant (kwargs: actions, reward, randomization, ...)."""
+    if variant == "double":
+        return DoubleSwingUpCartPoleVecEnv(num_envs=num_envs, seed=seed, **kwargs)
+    return SwingUpCartPoleVecEnv(num_envs=num_envs, version=variant, seed=seed, **kwargs)
+
+
+class SingleEnv(gym.Env):
+    """
+    One env of the batched backend behind the Gymnasium API.
+
+    The batched env resets a finished env by itself; ``step`` returns the
+    terminal observation instead, and the episode ends as Gymnasium expects.
+    """
+
+    metadata = {"render_modes": []}
+
+    def __init__(self, variant, **kwargs):
+        self.variant = variant
+        self.vec_env = make_batched(variant, 1, **kwargs)
+        self.observation_space = self.vec_env.observation_space
+        self.action_space = self.vec_env.action_space
+
+    def reset(self, *, seed=None, options=None):
+        super().reset(seed=seed)
+        if seed is not None:
+            self.vec_env.seed(seed)
+        return self.vec_env.reset()[0], {}
+
+    def step(self, action):
+        action = np.asarray(action).reshape((1,) + self.action_space.shape)
+        obs, rewards, dones, infos = self.vec_env.step(action)
+        info = infos[0]
+        truncated = bool(info.pop("TimeLimit.truncated", False))
+        if dones[0]:
+            return info.pop("terminal_observation"), float(rewards[0]), not truncated, truncated, info
+        return obs[0], float(rewards[0]), False, False, info
+
+
+class DiscreteForces(gym.ActionWrapper):
+    """
+    Discrete(K) force levels on an env with a Box(-1, 1) force.
+
+    :param levels: number K of levels, evenly spaced in [-1, 1]
+    """
+
+    def __init__(self, env, levels):
+        super().__init__(env)
+        if levels < 2:
+            raise ValueError(f"Expected at least 2 force levels, got {levels}")
+        self.levels = np.linspace(env.action_space.low, env.action_space.high, levels).astype(np.float32)
+        self.action_space = spaces.Discrete(levels)
+
+    def action(self, action):
+        return self.levels[int(action)]
+
+
+def register():
+    # Idempotent: the module is imported by every process that makes an env
+    for variant, env_id in VARIANT_IDS.items():
+        if env_id not in gym.registry:
+            gym.register(env_id, entry_point=ENTRY_POINT, kwargs={"variant": variant})
+
+
+def make_vec(env_id, num_envs=1, seed=None, **kwargs):
+    """SB3 VecEnv of ``num_envs`` envs of a registered ID, batched when the backend allows it."""
+    spec = gym.spec(env_id)
+    if spec.entry_point == ENTRY_POINT:
+        kwargs = {**spec.kwargs, **kwargs}
+        return make_batched(kwargs.pop("variant"), num_envs, seed=seed, **kwargs)
+
+    from stable_baselines3.common.env_util import make_vec_env
+
+    return make_vec_env(env_id, n_envs=num_envs, seed=seed, env_kwargs=kwargs)
+
+
+register()
+
+
+if __name__ == "__main__":
+    for variant, env_id in VARIANT_IDS.items():
+        env = gym.make(env_id)
+        print(f"{variant:>6}  {env_id:<26} obs {env.observation_space.shape}  actions {env.action_space}")
+        env.close()
@@ -0,0 +1,187 @@
+# Headless rendering of rollouts to MP4 / GIF.
+#
+# Frames are drawn with the pygame functions of common/drawing.py into an
+# offscreen Surface (SDL "dummy" video driver, no window, no display needed)
+# and written as fast as they are drawn, without clock.tick.
+#
+# Source of the frames:
+# - a checkpoint: the policy is played on a single env of the variant;
+# - a recording of common/recorder.py: the recorded states are drawn.
+# A run folder renders every checkpoint of its manifest in a process pool.
+#
+# GIF (the default) only needs Pillow. MP4 (--format mp4) needs imageio with
+# its ffmpeg plugin (pip install imageio[ffmpeg]), not installed with the rest.
+#
+# Usage (from the Pendule&DoublePendule folder):
+#     python -m common.render_video v6 V6/models/PPO_SwingUp_V6/run_xxx/1000000.zip
+#     python -m common.render_video v6 V6/models/PPO_SwingUp_V6/run_xxx --format mp4 --every 2
+#     python -m common.render_video v6 V6/models/PPO_SwingUp_V6/run_xxx/1000000_traj --env 3
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pygame
+
+from common.checkpoints import list_checkpoints
+from common.drawing import BLACK, BLUE, GREEN, GREY, RED, WHITE, draw_state, force_ratio
+
+WIDTH, HEIGHT = 1200, 600
+FPS = 50  # one frame per env step (dt = 0.02 s)
+
+
+def policy_rollout(model_path, variant, n_steps, seed=0):
+    """Yields (state, force input in [-1, 1], reward) of a deterministic rollout of a checkpoint."""
+    from common.evaluate import make_eval_env, policy_actions
+    from common.export import load_policy
+
+    model = load_policy(model_path)
+    env = make_eval_env(variant, 1, seed, policy_actions(model))
+    venv = env
+    norm_stats = model_path[:-len(".zip")] + "_env.pkl"
+    # An exported .npz normalizes its observations itself
+    if not model_path.endswith(".npz"):
+        import torch
+        from stable_baselines3.common.vec_env import VecNormalize
+
+        torch.set_num_threads(1)
+        if os.path.exists(norm_stats):
+            venv = VecNormalize.load(norm_stats, env)
+            venv.training = False
+            venv.norm_reward = False
+
+    obs = venv.reset()
+    for _ in range(n_steps):
+        action, _ = model.predict(obs, deterministic=True)
+        state = env.state[:, 0].copy()
+        # Force levels of a discrete policy, as drawn for the continuous ones
+        force = env._force_input(action)[:1]
+        obs, rewards, _, _ = venv.step(action)
+        yield state, force, float(rewards[0])
+
+
+def recording_rollout(path, n_steps, env=0):
+    from common.recorder import TrajectoryReader
+
+    reader = TrajectoryReader(path)
+    for start in range(0, min(n_steps, len(reader)), 4096):
+        data = reader.slice(start, min(start + 4096, n_steps), env, columns=["state", "action", "reward"])
+        for state, action, reward in zip(data["state"], data["action"], data["reward"]):
+            yield state, action, float(reward)
+
+
+def open_writer(out_path, fps):
+    if out_path.endswith(".gif"):
+        return GifWriter(out_path, fps)
+    try:
+        import imageio.v2 as imageio
+    except ImportError:
+        raise ImportError("MP4 export needs imageio: pip install imageio[ffmpeg] (or use --format gif)")
+    return imageio.get_writer(out_path, fps=fps, macro_block_size=8)
+
+
+class GifWriter:
+    """
+    Minimal imageio-like writer on top of Pillow. Frames are mapped to a fixed
+    palette (the scene colors and grays for the text), much faster than an
+    adaptive quantization per frame. Pillow keeps every frame until the file
+    is written, so GIF frames are stored at half resolution.
+    """
+
+    def __init__(self, path, fps):
+        from PIL import Image
+
+        self.path = path
+        self.duration = 1000 / fps
+        self.frames = []
+        colors = [WHITE, BLACK, RED, GREY, BLUE, GREEN, (0, 200, 0)] + [(g, g, g) for g in range(0, 256, 16)]
+        self.palette = Image.new("P", (1, 1))
+        self.palette.putpalette([c for color in colors for c in color])
+
+    def append_data(self, frame):
+        from PIL import Image
+
+        image = Image.fromarray(frame).reduce(2)
+        self.frames.append(image.quantize(palette=self.palette, dither=Image.Dither.NONE))
+
+    def close(self):
+        if self.frames:
+            self.frames[0].save(self.path, save_all=True, append_images=self.frames[1:],
+                                duration=self.duration, loop=0, optimize=False)
+
+
+def render(frames, out_path, every=1, width=WIDTH, height=HEIGHT, title=None):
+    """Draws (state, action, reward) triples offscreen and writes one video frame every ``every`` steps."""
+    pygame.font.init()
+    font = pygame.font.SysFont("Arial", 18)
+    surface = pygame.Surface((width, height))
+    writer = open_writer(out_path, FPS / every)
+    n_frames = 0
+    try:
+        for t, (state, action, reward) in enumerate(frames):
+            if t % every:
+                continue
+            draw_state(surface, state, force_ratio(np.asarray(action)))
+            lines = ([title] if title else []) + [f"t = {t / FPS:.2f} s | Reward: {reward:.3f}"]
+            for i, line in enumerate(lines):
+                surface.blit(font.render(line, True, BLACK), (20, 20 + i * 25))
+            frame = np.frombuffer(pygame.image.tobytes(surface, "RGB"), dtype=np.uint8)
+            writer.append_data(frame.reshape(height, width, 3))
+            n_frames += 1
+    finally:
+        writer.close()
+    return n_frames
+
+
+def render_checkpoint(model_path, variant, out_path, n_steps=500, every=1, seed=0):
+    title = os.path.relpath(model_path, os.path.dirname(os.path.dirname(model_path)))
+    n_frames = render(policy_rollout(model_path, variant, n_steps, seed), out_path, every, title=title)
+    return out_path, n_frames
+
+
+def render_run(run_dir, variant, fmt="gif", n_steps=500, every=1, num_workers=None, seed=0):
+    """Renders every checkpoint of a run in parallel into <run_dir>/videos/<step>.<fmt>."""
+    out_dir = os.path.join(run_dir, "videos")
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoints = list_checkpoints(run_dir)
+    num_workers = num_workers or max(1, os.cpu_count() or 1)
+    ctx = mp.get_context("forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn")
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=ctx) as pool:
+        futures = [
+            pool.submit(render_checkpoint, c["path"], variant,
+                        os.path.join(out_dir, f"{c['step']}.{fmt}"), n_steps, every, seed)
+            for c in checkpoints
+        ]
+        return [future.result() for future in futures]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless video export of rollouts")
+    parser.add_argument("variant", choices=["v3", "v4", "v5", "v6", "double"])
+    parser.add_argument("path", help="checkpoint .zip, exported .npz, run folder or recording folder")
+    parser.add_argument("--out", default=None, help="output file (single checkpoint or recording)")
+    parser.add_argument("--format", choices=["gif", "mp4"], default="gif")
+    parser.add_argument("--steps", type=int, default=500, help="steps to render (500 = 10 s)")
+    parser.add_argument("--every", type=int, default=1, help="keep one frame every N steps")
+    parser.add_argument("--env", type=int, default=0, help="env of a recording")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    path = os.path.normpath(args.path)
+    if path.endswith((".zip", ".npz")):
+        out = args.out or f"{path[:-len('.zip')]}.{args.format}"
+        print(render_checkpoint(path, args.variant, out, args.steps, args.every, args.seed))
+    elif os.path.exists(os.path.join(path, "index.json")):
+        out = args.out or f"{path}_env{args.env}.{args.format}"
+        n_frames = render(recording_rollout(path, args.steps, args.env), out, args.every,
+                          title=os.path.basename(path))
+        print((out, n_frames))
+    else:
+        for out, n_frames in render_run(path, args.variant, args.format, args.steps, args.every,
+                                        args.workers, args.seed):
+            print(f"{out} ({n_frames} images)")
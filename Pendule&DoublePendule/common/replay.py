@@ -0,0 +1,157 @@
+# Offline replay of recorded trajectories (see common/recorder.py).
+#
+# Frames are drawn from the recorded physics states: no env, no policy, so
+# playing back hours of behaviour only costs the drawing. Above 1x, steps
+# between two frames are skipped (the window stays at 50 FPS).
+#
+# Two recordings are shown side by side, in sync, to compare two checkpoints
+# (e.g. recorded from the same seed).
+#
+# Controls:
+#     SPACE           pause / play
+#     UP / DOWN       speed x0.25 ... x100
+#     LEFT / RIGHT    seek -1 s / +1 s (with SHIFT: 10 s)
+#     HOME / END      start / end of the recording
+#     N / P           next / previous episode of the env
+#     TAB             next env of the recording
+#     click on bar    seek
+#
+# Usage (from the Pendule&DoublePendule folder):
+#     python -m common.replay V6/models/PPO_SwingUp_V6/run_xxx/1000000_traj
+#     python -m common.replay run_a/500000_traj run_b/1000000_traj --env 3
+import argparse
+import os
+
+import numpy as np
+import pygame
+
+from common.drawing import BLACK, BLUE, GREY, draw_state, force_ratio
+from common.recorder import TrajectoryReader
+
+WIDTH, HEIGHT = 1200, 600
+FPS = 50
+SPEEDS = [0.25, 0.5, 1, 2, 5, 10, 25, 50, 100]
+BLOCK = 4096  # steps read at once from a recording
+BAR_HEIGHT = 30
+
+
+class Track:
+    """One recording, one env: reads blocks of steps around the play head."""
+
+    def __init__(self, path, env):
+        self.reader = TrajectoryReader(path)
+        self.name = os.path.basename(os.path.normpath(path))
+        self.env = env % self.reader.num_envs
+        self._block = (None, None)
+
+    def __len__(self):
+        return len(self.reader)
+
+    def set_env(self, env):
+        self.env = env % self.reader.num_envs
+        self._block = (None, None)
+
+    def step(self, t):
+        start = t - t % BLOCK
+        if self._block[0] != start:
+            data = self.reader.slice(start, start + BLOCK, self.env, columns=["state", "action", "reward"])
+            self._block = (start, data)
+        data = self._block[1]
+        i = t - start
+        return data["state"][i], data["action"][i], float(data["reward"][i])
+
+    def episode_starts(self):
+        # First steps of the episodes of the current env
+        episodes = self.reader.episodes
+        ends = episodes[episodes[:, 0] == self.env, 2]
+        return np.concatenate([[0], ends[ends < len(self)]])
+
+
+def replay(paths, env=0, speed=1):
+    tracks = [Track(path, env) for path in paths]
+    n_steps = min(len(track) for track in tracks)
+    if n_steps == 0:
+        print("Enregistrement vide.")
+        return
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Replay - " + " | ".join(track.name for track in tracks))
+    clock = pygame.time.Clock()
+    font = pygame.font.SysFont("Arial", 18)
+
+    view_width = WIDTH // len(tracks)
+    views = [screen.subsurface((k * view_width, 0, view_width, HEIGHT - BAR_HEIGHT)) for k in range(len(tracks))]
+    bar = pygame.Rect(0, HEIGHT - BAR_HEIGHT, WIDTH, BAR_HEIGHT)
+
+    t = 0.0
+    speed_index = SPEEDS.index(speed) if speed in SPEEDS else SPEEDS.index(1)
+    paused = False
+    running = True
+
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.MOUSEBUTTONDOWN and bar.collidepoint(event.pos):
+                t = event.pos[0] / WIDTH * (n_steps - 1)
+            elif event.type == pygame.KEYDOWN:
+                jump = 10 * FPS if event.mod & pygame.KMOD_SHIFT else FPS
+                if event.key == pygame.K_SPACE: paused = not paused
+                elif event.key == pygame.K_UP: speed_index = min(speed_index + 1, len(SPEEDS) - 1)
+                elif event.key == pygame.K_DOWN: speed_index = max(speed_index - 1, 0)
+                elif event.key == pygame.K_RIGHT: t += jump
+                elif event.key == pygame.K_LEFT: t -= jump
+                elif event.key == pygame.K_HOME: t = 0
+                elif event.key == pygame.K_END: t = n_steps - 1
+                elif event.key in (pygame.K_n, pygame.K_p):
+                    starts = tracks[0].episode_starts()
+                    current = np.searchsorted(starts, int(t), side="right") - 1
+                    if event.key == pygame.K_n:
+                        target = current + 1
+                    else:  # previous episode, or start of this one if it began more than 1 s ago
+                        target = current if int(t) - starts[current] > FPS else current - 1
+                    t = starts[min(max(target, 0), len(starts) - 1)]
+                elif event.key == pygame.K_TAB:
+                    env += 1
+                    for track in tracks:
+                        track.set_env(env)
+
+        t = min(max(t, 0), n_steps - 1)
+        step = int(t)
+
+        for track, view in zip(tracks, views):
+            state, action, reward = track.step(step)
+            draw_state(view, state, force_ratio(action))
+            lines = [track.name, f"Env {track.env} | Reward: {reward:.3f}"]
+            for i, line in enumerate(lines):
+                view.blit(font.render(line, True, BLACK), (20, 20 + i * 25))
+        for k in range(1, len(tracks)):
+            pygame.draw.line(screen, BLACK, (k * view_width, 0), (k * view_width, HEIGHT - BAR_HEIGHT), 2)
+
+        # Timeline
+        pygame.draw.rect(screen, GREY, bar)
+        pygame.draw.rect(screen, BLUE, (0, bar.y, int(WIDTH * step / max(n_steps - 1, 1)), BAR_HEIGHT))
+        status = "PAUSE" if paused else f"x{SPEEDS[speed_index]:g}"
+        txt = font.render(f"{step / FPS:.1f} s / {(n_steps - 1) / FPS:.1f} s  {status}", True, BLACK)
+        screen.blit(txt, (WIDTH - txt.get_width() - 10, bar.y + 5))
+
+        pygame.display.flip()
+        if not paused:
+            t += SPEEDS[speed_index]
+        clock.tick(FPS)
+
+    pygame.quit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay of recorded trajectories")
+    parser.add_argument("recordings", nargs="+", help="one recording, or two to compare side by side")
+    parser.add_argument("--env", type=int, default=0, help="env of the recording to show")
+    parser.add_argument("--speed", type=float, default=1)
+    args = parser.parse_args(argv)
+    replay(args.recordings[:2], args.env, args.speed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,572 @@
+# Declarative reward shaping: the single definition of the rewards.
+#
+# A reward is declared once as a RewardSpec: named features and terms written
+# as array expressions of the state variables, e.g.
+#
+#     RewardSpec(
+#         features={"cos_t": "cos(theta)"},
+#         terms={
+#             "angle": "cos_t",
+#             "pos": "-0.05 * x**2",
+#             "stability": "where((cos_t > 0.95) & (abs(theta_dot) < 1.5), 5.0, 0.0)",
+#         },
+#         bonus=1.0, crash=-10.0,
+#     )
+#
+# and compiled to the form each caller needs:
+# - compile_reward: for a batch size. With Numba (backend "numba", see
+#   common/jit.py), the spec becomes the source of one fused kernel: a loop
+#   over the envs computing every feature and term of an env as scalars,
+#   `where` as a branch, written straight into the reward array. Without
+#   Numba, it becomes straight-line NumPy code instead: every operation is one
+#   ufunc call writing into a buffer allocated at compile time (out=), `where`
+#   becomes two masked copies and constant sub-expressions are folded. Either
+#   way evaluating the reward of a step allocates no array. The value of each
+#   term stays readable in CompiledReward.terms (reward breakdown for logging).
+# - scalar_reward: a function of one env's scalar inputs, Numba-compiled when
+#   available. The physics kernels of common/physics.py call it inside their
+#   loop (batched and single cart-pole envs, MPC rollouts).
+#
+# Syntax: numbers, the env variables (see CARTPOLE_INPUTS / DOUBLE_INPUTS),
+# the features, + - * / ** (constant exponent), comparisons, & | ~, and the
+# functions of FUNCTIONS plus where(cond, a, b) and clip(a, lo, hi).
+#
+# SPECS holds the rewards of V3 to V6 and of the double pendulum: every env
+# computes its default reward from them. They are also the starting points
+# for new shapings:
+#     SwingUpCartPoleVecEnv(version="v6", reward=SPECS["v6"].replace(bonus=0.5))
+#
+# Usage (from the Pendule&DoublePendule folder):
+#     python -m common.reward_spec            # check + timing of the compiled forms
+#     python -m common.reward_spec --check    # check only
+import ast
+import math
+import operator
+
+import numpy as np
+
+from common.jit import get_backend, njit
+
+# Names of the arrays a spec can read: state rows, normalized force, crash flags
+CARTPOLE_INPUTS = ("x", "x_dot", "theta", "theta_dot", "force_input", "terminated")
+DOUBLE_INPUTS = ("x", "x_dot", "th1", "th1_dot", "th2", "th2_dot", "force_input", "terminated")
+
+FUNCTIONS = {
+    "cos": np.cos, "sin": np.sin, "tanh": np.tanh, "exp": np.exp, "sqrt": np.sqrt,
+    "abs": np.abs, "maximum": np.maximum, "minimum": np.minimum,
+}
+BINARY = {
+    ast.Add: (np.add, operator.add), ast.Sub: (np.subtract, operator.sub),
+    ast.Mult: (np.multiply, operator.mul), ast.Div: (np.divide, operator.truediv),
+}
+LOGICAL = {ast.BitAnd: np.logical_and, ast.BitOr: np.logical_or, ast.And: np.logical_and, ast.Or: np.logical_or}
+COMPARE = {
+    ast.Gt: np.greater, ast.GtE: np.greater_equal, ast.Lt: np.less, ast.LtE: np.less_equal,
+    ast.Eq: np.equal, ast.NotEq: np.not_equal,
+}
+
+
+class RewardSpec:
+    """
+    Declaration of a reward: sum of named terms (+ bonus), replaced by
+    ``crash`` on terminated steps.
+
+    :param terms: {name: expression}, summed in this order
+    :param features: {name: expression} of intermediate values shared by the terms
+    :param bonus: constant added at every step (survival bonus)
+    :param crash: reward of the terminated steps, None to keep the sum
+    :param inputs: names of the arrays passed at evaluation (state rows, force_input, terminated)
+    """
+
+    def __init__(self, terms, features=None, bonus=0.0, crash=None, inputs=CARTPOLE_INPUTS):
+        self.terms = dict(terms)
+        self.features = dict(features or {})
+        self.bonus = bonus
+        self.crash = crash
+        self.inputs = tuple(inputs)
+        self._scalar = None  # scalar_reward, compiled on first use
+
+    def replace(self, terms=None, features=None, **kwargs):
+        """Copy with some terms / features added or overridden (a value of None removes a term)."""
+        new_terms = {**self.terms, **(terms or {})}
+        args = {"bonus": self.bonus, "crash": self.crash, "inputs": self.inputs, **kwargs}
+        return RewardSpec(
+            {k: v for k, v in new_terms.items() if v is not None},
+            {**self.features, **(features or {})},
+            **args,
+        )
+
+    def compile(self, num_envs, dtype=np.float64):
+        return CompiledReward(self, num_envs, dtype)
+
+    def __repr__(self):
+        return f"RewardSpec(terms={self.terms}, features={self.features}, bonus={self.bonus}, crash={self.crash})"
+
+
+class _Compiler:
+    # Translates expressions into lines "np.ufunc(a, b, out=_f[k])".
+    # An operand is (code, kind) with kind "const" (code is a Python number),
+    # "float" or "bool" (code names an array).
+
+    def __init__(self, inputs):
+        self.lines = []
+        self.n_float = 0
+        self.n_bool = 0
+        self.names = {name: (name, "bool" if name == "terminated" else "float") for name in inputs}
+
+    def _buffer(self, kind):
+        if kind == "bool":
+            self.n_bool += 1
+            return f"_b[{self.n_bool - 1}]"
+        self.n_float += 1
+        return f"_f[{self.n_float - 1}]"
+
+    def _emit(self, ufunc, args, kind="float"):
+        out = self._buffer(kind)
+        self.lines.append(f"np.{ufunc.__name__}({', '.join(a[0] for a in args)}, out={out})")
+        return out, kind
+
+    def materialize(self, operand):
+        # Copy into a buffer owned by the reward (constants and raw inputs)
+        out = self._buffer("float")
+        self.lines.append(f"np.copyto({out}, {operand[0]})")
+        return out, "float"
+
+    def compile(self, source):
+        try:
+            tree = ast.parse(source, mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Invalid reward expression '{source}': {e.msg}") from None
+        return self.expr(tree.body)
+
+    def expr(self, node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            return repr(float(node.value)), "const"
+
+        if isinstance(node, ast.Name):
+            if node.id not in self.names:
+                raise ValueError(f"Unknown name '{node.id}' in reward expression, expected one of {list(self.names)}")
+            return self.names[node.id]
+
+        if isinstance(node, ast.UnaryOp):
+            a = self.expr(node.operand)
+            if isinstance(node.op, ast.UAdd):
+                return a
+            if isinstance(node.op, ast.USub):
+                if a[1] == "const":
+                    return repr(-float(a[0])), "const"
+                return self._emit(np.negative, [a])
+            if isinstance(node.op, (ast.Invert, ast.Not)):
+                return self._emit(np.logical_not, [a], "bool")
+
+        if isinstance(node, ast.BinOp):
+            a, b = self.expr(node.left), self.expr(node.right)
+            if type(node.op) in LOGICAL:
+                return self._emit(LOGICAL[type(node.op)], [a, b], "bool")
+            if isinstance(node.op, ast.Pow):
+                if b[1] != "const":
+                    raise ValueError(f"Exponent must be a constant: '{ast.unparse(node)}'")
+                if a[1] == "const":
+                    return repr(float(a[0]) ** float(b[0])), "const"
+                if float(b[0]) == 2.0:
+                    return self._emit(np.square, [a])
+                return self._emit(np.power, [a, b])
+            if type(node.op) in BINARY:
+                ufunc, op = BINARY[type(node.op)]
+                if a[1] == "const" and b[1] == "const":
+                    return repr(op(float(a[0]), float(b[0]))), "const"
+                return self._emit(ufunc, [a, b])
+
+        if isinstance(node, ast.BoolOp):
+            result = self.expr(node.values[0])
+            for value in node.values[1:]:
+                result = self._emit(LOGICAL[type(node.op)], [result, self.expr(value)], "bool")
+            return result
+
+        if isinstance(node, ast.Compare):
+            # a < b < c -> (a < b) & (b < c)
+            result, left = None, self.expr(node.left)
+            for op, comparator in zip(node.ops, node.comparators):
+                right = self.expr(comparator)
+                mask = self._emit(COMPARE[type(op)], [left, right], "bool")
+                result = mask if result is None else self._emit(np.logical_and, [result, mask], "bool")
+                left = right
+            return result
+
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            name, args = node.func.id, node.args
+            if name == "where" and len(args) == 3:
+                cond, a, b = (self.expr(arg) for arg in args)
+                if a[1] == "const" and b == ("0.0", "const"):
+                    # where(c, k, 0) = c * k, one ufunc instead of two masked copies
+                    return self._emit(np.multiply, [cond, a])
+                out = self._buffer("float")
+                self.lines.append(f"np.copyto({out}, {b[0]})")
+                self.lines.append(f"np.copyto({out}, {a[0]}, where={cond[0]})")
+                return out, "float"
+            if name == "clip" and len(args) == 3:
+                result = self.expr(args[0])
+                for bound, ufunc in ((args[1], np.maximum), (args[2], np.minimum)):
+                    if not (isinstance(bound, ast.Constant) and bound.value is None):
+                        result = self._emit(ufunc, [result, self.expr(bound)])
+                return result
+            if name in FUNCTIONS:
+                values = [self.expr(arg) for arg in args]
+                if all(v[1] == "const" for v in values):
+                    return repr(float(FUNCTIONS[name](*(float(v[0]) for v in values)))), "const"
+                return self._emit(FUNCTIONS[name], values)
+
+        raise ValueError(f"Unsupported reward expression: '{ast.unparse(node)}'")
+
+
+# Scalar code of the fused kernel
+SCALAR_FUNCTIONS = {
+    "cos": "math.cos", "sin": "math.sin", "tanh": "math.tanh", "exp": "math.exp", "sqrt": "math.sqrt",
+    "abs": "abs", "maximum": "max", "minimum": "min",
+}
+SCALAR_BINARY = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Div: "/"}
+SCALAR_LOGICAL = {ast.BitAnd: "and", ast.BitOr: "or", ast.And: "and", ast.Or: "or"}
+SCALAR_COMPARE = {ast.Gt: ">", ast.GtE: ">=", ast.Lt: "<", ast.LtE: "<=", ast.Eq: "==", ast.NotEq: "!="}
+
+# Kernels already compiled in this process, by source (envs rebuilt by sweeps / PBT)
+_KERNELS = {}
+
+
+class _KernelCompiler:
+    # Translates expressions into scalar Python code for one env, compiled by Numba
+
+    def __init__(self, inputs):
+        self.names = set(inputs)
+
+    def compile(self, source):
+        try:
+            tree = ast.parse(source, mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Invalid reward expression '{source}': {e.msg}") from None
+        return self.expr(tree.body)
+
+    def expr(self, node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            return repr(float(node.value))
+
+        if isinstance(node, ast.Name):
+            if node.id not in self.names:
+                raise ValueError(f"Unknown name '{node.id}' in reward expression, expected one of {sorted(self.names)}")
+            return node.id
+
+        if isinstance(node, ast.UnaryOp):
+            a = self.expr(node.operand)
+            if isinstance(node.op, ast.UAdd):
+                return a
+            if isinstance(node.op, ast.USub):
+                return f"(-{a})"
+            if isinstance(node.op, (ast.Invert, ast.Not)):
+                return f"(not {a})"
+
+        if isinstance(node, ast.BinOp):
+            a, b = self.expr(node.left), self.expr(node.right)
+            if type(node.op) in SCALAR_LOGICAL:
+                return f"({a} {SCALAR_LOGICAL[type(node.op)]} {b})"
+            if isinstance(node.op, ast.Pow):
+                if not (isinstance(node.right, ast.Constant) or
+                        (isinstance(node.right, ast.UnaryOp) and isinstance(node.right.operand, ast.Constant))):
+                    raise ValueError(f"Exponent must be a constant: '{ast.unparse(node)}'")
+                exponent = float(b.strip("()"))
+                # Integer exponent: multiplications instead of pow()
+                return f"({a} ** {int(exponent) if exponent.is_integer() else exponent!r})"
+            if type(node.op) in SCALAR_BINARY:
+                return f"({a} {SCALAR_BINARY[type(node.op)]} {b})"
+
+        if isinstance(node, ast.BoolOp):
+            op = f" {SCALAR_LOGICAL[type(node.op)]} "
+            return "(" + op.join(self.expr(value) for value in node.values) + ")"
+
+        if isinstance(node, ast.Compare):
+            parts, left = [], self.expr(node.left)
+            for op, comparator in zip(node.ops, node.comparators):
+                right = self.expr(comparator)
+                parts.append(f"{left} {SCALAR_COMPARE[type(op)]} {right}")
+                left = right
+            return "(" + " and ".join(parts) + ")"
+
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            name, args = node.func.id, node.args
+            if name == "where" and len(args) == 3:
+                cond, a, b = (self.expr(arg) for arg in args)
+                return f"({a} if {cond} else {b})"
+            if name == "clip" and len(args) == 3:
+                result = self.expr(args[0])
+                for bound, func in ((args[1], "max"), (args[2], "min")):
+                    if not (isinstance(bound, ast.Constant) and bound.value is None):
+                        result = f"{func}({result}, {self.expr(bound)})"
+                return result
+            if name in SCALAR_FUNCTIONS:
+                return f"{SCALAR_FUNCTIONS[name]}({', '.join(self.expr(arg) for arg in args)})"
+
+        raise ValueError(f"Unsupported reward expression: '{ast.unparse(node)}'")
+
+
+def _jit(source, name):
+    # Compiled once per process and per source (envs rebuilt by sweeps / PBT)
+    if source not in _KERNELS:
+        namespace = {"math": math}
+        exec(compile(source, name, "exec"), namespace)
+        _KERNELS[source] = njit(namespace["_reward"])
+    return _KERNELS[source]
+
+
+def _scalar_body(spec):
+    # Lines computing the features and the terms _t0, _t1... of one env, and their sum
+    compiler = _KernelCompiler(spec.inputs)
+    lines = []
+    for name, source in spec.features.items():
+        lines.append(f"{name} = {compiler.compile(source)}")
+        compiler.names.add(name)
+    for k, source in enumerate(spec.terms.values()):
+        lines.append(f"_t{k} = float({compiler.compile(source)})")
+    # Sum in declaration order
+    total = " + ".join(f"_t{k}" for k in range(len(spec.terms))) or "0.0"
+    if spec.bonus:
+        total = f"({total}) + {float(spec.bonus)!r}"
+    return lines, total
+
+
+def _kernel_source(spec):
+    # for i: read the inputs of env i, features, terms, sum, crash -> _rewards[i], _terms[:, i]
+    state_names = spec.inputs[:-2]
+    force_name, terminated_name = spec.inputs[-2:]
+    lines, total = _scalar_body(spec)
+    body = [f"{name} = float(_state[{k}, i])" for k, name in enumerate(state_names)]
+    body += [f"{force_name} = float(_force_input[i])", f"{terminated_name} = _terminated[i]"]
+    body += lines
+    body += [f"_terms[{k}, i] = _t{k}" for k in range(len(spec.terms))]
+    body.append(f"_total = {total}")
+    if spec.crash is not None:
+        body += [f"if {terminated_name}:", f"    _total = {float(spec.crash)!r}"]
+    body.append("_rewards[i] = _total")
+    lines = ["for i in range(_rewards.shape[0]):"] + [f"    {line}" for line in body]
+    return "def _reward(_state, _force_input, _terminated, _rewards, _terms):\n    {}\n".format("\n    ".join(lines))
+
+
+def _scalar_source(spec):
+    # Reward of one env: crash value first, then features and terms
+    lines, total = _scalar_body(spec)
+    if spec.crash is not None:
+        lines = [f"if {spec.inputs[-1]}:", f"    return {float(spec.crash)!r}"] + lines
+    lines.append(f"return {total}")
+    return "def _reward({}):\n    {}\n".format(", ".join(spec.inputs), "\n    ".join(lines))
+
+
+class CompiledReward:
+    """
+    A RewardSpec compiled for ``num_envs`` envs. Calling it with the (D, N)
+    state, the (N,) force input and the (N,) terminated flags fills and
+    returns ``out`` (a float32 array of the caller, e.g. the reward array of
+    the step) or ``self.rewards`` (overwritten at the next call; copy it to
+    keep it). ``self.terms`` maps each term name to its (N,) values.
+
+    With Numba the whole reward is one fused kernel, computed in float64.
+    Otherwise the NumPy code computes its intermediate values in ``dtype``:
+    float32 for the float32 cart-pole state (half the memory traffic),
+    float64 for the double pendulum.
+    """
+
+    def __init__(self, spec, num_envs, dtype=np.float64):
+        self.spec = spec
+        self.num_envs = num_envs
+        self.rewards = np.empty(num_envs, dtype=np.float32)
+        self.fused = get_backend() == "numba"
+        if self.fused:
+            self.source = _kernel_source(spec)
+            self._kernel = _jit(self.source, f"<reward kernel {list(spec.terms)}>")
+            self._terms = np.zeros((len(spec.terms), num_envs))
+            self.terms = dict(zip(spec.terms, self._terms))
+            return
+
+        compiler = _Compiler(spec.inputs)
+        for name, source in spec.features.items():
+            compiler.names[name] = compiler.compile(source)
+        term_codes = {}
+        for name, source in spec.terms.items():
+            operand = compiler.compile(source)
+            if operand[1] != "float" or operand[0] in spec.inputs:
+                operand = compiler.materialize(operand)
+            term_codes[name] = operand[0]
+
+        # Sum in declaration order (same rounding as the hand-written rewards)
+        total = compiler._buffer("float")
+        codes = list(term_codes.values())
+        lines = compiler.lines
+        lines.append(f"np.copyto({total}, {codes[0] if codes else 0.0})")
+        lines += [f"np.add({total}, {code}, out={total})" for code in codes[1:]]
+        if spec.bonus:
+            lines.append(f"np.add({total}, {float(spec.bonus)!r}, out={total})")
+        if spec.crash is not None:
+            lines.append(f"np.copyto({total}, {float(spec.crash)!r}, where=terminated)")
+        lines.append(f"np.copyto(_rewards, {total})")
+
+        self.source = "def _reward({}, _rewards):\n    {}\n".format(", ".join(spec.inputs), "\n    ".join(lines))
+        self._f = [np.empty(num_envs, dtype=dtype) for _ in range(compiler.n_float)]
+        self._b = [np.empty(num_envs, dtype=np.bool_) for _ in range(compiler.n_bool)]
+        namespace = {"np": np, "_f": self._f, "_b": self._b}
+        exec(compile(self.source, f"<reward {list(spec.terms)}>", "exec"), namespace)
+        self._fn = namespace["_reward"]
+        self.terms = {name: eval(code, namespace) for name, code in term_codes.items()}
+
+    def __call__(self, state, force_input, terminated, out=None):
+        out = self.rewards if out is None else out
+        if state.shape[1] != self.num_envs or out.shape != (self.num_envs,):
+            raise ValueError(f"Reward compiled for {self.num_envs} envs, got a state of shape {state.shape}")
+        if self.fused:
+            self._kernel(state, force_input, terminated, out, self._terms)
+        else:
+            self._fn(*state, force_input, terminated, out)
+        return out
+
+
+def get_spec(reward):
+    """The RewardSpec ``reward``, or the spec of SPECS named ``reward``."""
+    if isinstance(reward, str):
+        if reward not in SPECS:
+            raise ValueError(f"Unknown reward '{reward}', expected one of {list(SPECS)}")
+        return SPECS[reward]
+    return reward
+
+
+def compile_reward(reward, num_envs, dtype=np.float64):
+    """Compiles a RewardSpec, or the spec of SPECS named ``reward``, for ``num_envs`` envs."""
+    return get_spec(reward).compile(num_envs, dtype)
+
+
+def scalar_reward(reward):
+    """
+    Reward of one env as a function of scalars, arguments in the order of the
+    spec inputs: f(x, x_dot, theta, theta_dot, force_input, terminated) -> float
+    for the cart-pole. Numba-compiled when available (callable from the
+    kernels of common/physics.py), plain Python otherwise.
+
+    :param reward: a RewardSpec or the name of one of SPECS
+    """
+    spec = get_spec(reward)
+    if spec._scalar is None:
+        spec._scalar = _jit(_scalar_source(spec), f"<scalar reward {list(spec.terms)}>")
+    return spec._scalar
+
+
+# --- REWARDS OF THE EXISTING VERSIONS ---
+
+SPECS = {
+    # V3.2 HIGH POWER: big bonus when almost vertical, spin penalty only near the top
+    "v3": RewardSpec(
+        features={"cos_t": "cos(theta)"},
+        terms={
+            "theta": "cos_t + where(cos_t > 0.95, 10.0, 0.0)",
+            "x": "-0.2 * x**2",
+            "vel": "where(cos_t > 0.8, -0.5 * theta_dot**2, 0.0)",
+        },
+    ),
+    # V4: "zone of death" > 4 m, "wrong way" > 3 m, stability bonus near the center
+    "v4": RewardSpec(
+        features={"cos_t": "cos(theta)", "abs_x": "abs(x)"},
+        terms={
+            "theta": "cos_t",
+            "x": "-0.2 * x**2 - where(abs_x > 4.0, 5.0, 0.0) - where((abs_x > 3.0) & (x * x_dot > 0), 5.0, 0.0)",
+            "cart_vel": "-0.01 * x_dot**2",
+            "vel": "where(cos_t > 0.0, -0.5 * theta_dot**2 * cos_t, 0.0)",
+            "stability": "where((cos_t > 0.95) & (abs(theta_dot) < 2.0) & (abs_x < 2.0), 10.0, 0.0)",
+        },
+    ),
+    # V5: multiplicative upright * centered score, +1 when solved, -10 on crash
+    "v5": RewardSpec(
+        features={"upright": "(cos(theta) + 1.0) / 2.0", "centered": "exp(-(x / 2.0)**2)"},
+        terms={
+            "score": "upright * centered",
+            "penalties": "-(0.05 * abs(theta_dot) + 0.05 * abs(x_dot)) * 0.1",
+            "solved": "where((upright > 0.98) & (centered > 0.9) & (abs(theta_dot) < 0.1), 1.0, 0.0)",
+        },
+        crash=-10.0,
+    ),
+    # V6: anti-helicopter + vertical magnet (cos^20), action penalty, survival bonus
+    "v6": RewardSpec(
+        features={"cos_t": "cos(theta)", "upper": "cos_t > 0.0"},
+        terms={
+            "angle": "cos_t",
+            "magnet": "where(upper, 5.0 * clip(cos_t, 0.0, None)**20, 0.0)",
+            "omega": "where(cos_t > 0.8, -0.5, where(upper, -0.1, 0.0)) * theta_dot**2",
+            "pos": "-0.05 * x**2",
+            "action": "-0.01 * force_input**2",
+            "stability": "where((cos_t > 0.95) & (abs(theta_dot) < 1.5), 5.0, 0.0)",
+        },
+        bonus=1.0,
+        crash=-10.0,
+    ),
+    # Double pendulum (common/double_vec_env.py): height, precision, static bonus
+    "double": RewardSpec(
+        features={"d1": "1.0 - cos(th1)", "d2": "1.0 - cos(th2)"},
+        terms={
+            "height": "2.0 * (cos(th1) + cos(th2))",
+            "precision": "10.0 * exp(-2.0 * (d1 + d2))",
+            "spin": "-0.05 * th1_dot**2 - 0.1 * th2_dot**2",
+            "cart": "-0.1 * x**2 - 0.05 * x_dot**2",
+            "static": "where((d1 < 0.1) & (d2 < 0.1) & (abs(th1_dot) < 1.0) & (abs(th2_dot) < 1.0), 5.0, 0.0)",
+        },
+        inputs=DOUBLE_INPUTS,
+    ),
+}
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from common.jit import set_backend
+
+    parser = argparse.ArgumentParser(description="Check the compiled forms of SPECS against each other, and time them")
+    parser.add_argument("--check", action="store_true", help="check only, no timing")
+    args = parser.parse_args()
+
+    # Batched forms: fused Numba kernel when available, NumPy ufunc code
+    backends = (["numba"] if get_backend() == "numba" else []) + ["numpy"]
+
+    def timing(fn, steps=2000):
+        fn()  # JIT compilation
+        start = time.perf_counter()
+        for _ in range(steps):
+            fn()
+        return (time.perf_counter() - start) / steps * 1e6
+
+    rng = np.random.default_rng(0)
+    for n in (256, 4096):
+        cart = np.stack([rng.uniform(-6, 6, n), rng.uniform(-3, 3, n),
+                         rng.uniform(-np.pi, np.pi, n), rng.uniform(-3, 3, n)]).astype(np.float32)
+        cart[2, : n // 4] = rng.uniform(-0.3, 0.3, n // 4)  # some carts near the top
+        cart[3, : n // 8] = rng.uniform(-0.05, 0.05, n // 8)
+        double = rng.uniform(-np.pi, np.pi, (6, n))
+        double[2:5:2, : n // 4] = rng.uniform(-0.2, 0.2, (2, n // 4))
+        force_input = rng.uniform(-1, 1, n)
+        terminated = rng.random(n) < 0.05
+        out = np.empty(n, dtype=np.float32)
+
+        for name, spec in SPECS.items():
+            state = double if spec.inputs == DOUBLE_INPUTS else cart
+            # Reference: the scalar function run by the interpreter, env by env
+            scalar = scalar_reward(spec)
+            scalar_py = getattr(scalar, "py_func", scalar)
+            inputs = [(*state[:, i].tolist(), float(force_input[i]), bool(terminated[i])) for i in range(n)]
+            reference = np.array([scalar_py(*row) for row in inputs], dtype=np.float32)
+            forms = {"scalar": lambda: np.array([scalar(*row) for row in inputs], dtype=np.float32)}
+            for backend in backends:
+                set_backend(backend)
+                compiled = compile_reward(spec, n, state.dtype)
+                forms[backend] = lambda compiled=compiled: compiled(state, force_input, terminated, out)
+            set_backend(backends[0])
+
+            line, times = f"{name:6s} | {n:5d} envs", ""
+            for form, fn in forms.items():
+                error = np.abs(fn() - reference).max()
+                if error > 1e-3:
+                    raise SystemExit(f"{name} ({form}): max error {error:.1e} vs the scalar reward")
+                line += f" | {form} err {error:.1e}"
+                if not args.check and form != "scalar":
+                    times += f" | {form} {timing(fn):7.1f} us"
+            print(line + times)
@@ -0,0 +1,240 @@
+import multiprocessing as mp
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnv
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper
+
+# Keys of info dicts that travel through shared memory instead of the pipe
+_SHARED_INFO_KEYS = ("terminal_observation", "TimeLimit.truncated")
+
+
+def _buffer_layout(num_envs, observation_space, action_space):
+    # name -> (shape, dtype) of every array stored in the shared block
+    if isinstance(action_space, spaces.Discrete):
+        action_layout = ((num_envs,), np.dtype(np.int64))
+    else:
+        action_layout = ((num_envs,) + action_space.shape, np.dtype(action_space.dtype))
+    obs_layout = ((num_envs,) + observation_space.shape, np.dtype(observation_space.dtype))
+    return {
+        "obs": obs_layout,
+        "terminal_obs": obs_layout,
+        "rewards": ((num_envs,), np.dtype(np.float32)),
+        "dones": ((num_envs,), np.dtype(np.bool_)),
+        "truncated": ((num_envs,), np.dtype(np.bool_)),
+        "actions": action_layout,
+    }
+
+
+def _buffer_offsets(layout):
+    offsets, size = {}, 0
+    for name, (shape, dtype) in layout.items():
+        offsets[name] = size
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        size += (nbytes + 63) // 64 * 64  # cache-line aligned
+    return offsets, size
+
+
+def _buffer_views(shm, layout):
+    offsets, _ = _buffer_offsets(layout)
+    return {
+        name: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offsets[name])
+        for name, (shape, dtype) in layout.items()
+    }
+
+
+def _attach(name):
+    # Workers share the resource tracker of the parent, which owns (and
+    # unlinks) the block: they must not unregister it themselves
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _worker(remote, parent_remote, env_fn_wrapper, worker_index):
+    parent_remote.close()
+    env = env_fn_wrapper.var(worker_index)
+    remote.send((env.num_envs, env.observation_space, env.action_space))
+
+    shm_name, layout, start = remote.recv()
+    shm = _attach(shm_name)
+    buffers = _buffer_views(shm, layout)
+    local = slice(start, start + env.num_envs)
+    obs_buf, terminal_buf = buffers["obs"][local], buffers["terminal_obs"][local]
+    rewards_buf, dones_buf = buffers["rewards"][local], buffers["dones"][local]
+    truncated_buf, actions_buf = buffers["truncated"][local], buffers["actions"][local]
+
+    while True:
+        try:
+            cmd, data = remote.recv()
+            if cmd == "step":
+                obs, rewards, dones, infos = env.step(actions_buf.copy())
+                obs_buf[:] = obs
+                rewards_buf[:] = rewards
+                dones_buf[:] = dones
+                extra_infos = []
+                for i, info in enumerate(infos):
+                    if dones[i]:
+                        terminal_buf[i] = info.get("terminal_observation", obs[i])
+                        truncated_buf[i] = info.get("TimeLimit.truncated", False)
+                    others = {k: v for k, v in info.items() if k not in _SHARED_INFO_KEYS}
+                    if others:
+                        extra_infos.append((i, others))
+                # Only the (usually empty) leftover infos go through the pipe
+                remote.send(extra_infos)
+            elif cmd == "reset":
+                seed = data
+                if seed is not None:
+                    env.seed(seed)
+                obs_buf[:] = env.reset()
+                remote.send(None)
+            elif cmd == "get_attr":
+                remote.send(env.get_attr(data))
+            elif cmd == "set_attr":
+                env.set_attr(data[0], data[1], data[2])
+                remote.send(None)
+            elif cmd == "env_method":
+                name, args, kwargs, indices = data
+                remote.send(env.env_method(name, *args, indices=indices, **kwargs))
+            elif cmd == "close":
+                env.close()
+                del obs_buf, terminal_buf, rewards_buf, dones_buf, truncated_buf, actions_buf, buffers
+                shm.close()
+                remote.close()
+                break
+            else:
+                raise NotImplementedError(f"`{cmd}` is not implemented in the worker")
+        except (EOFError, KeyboardInterrupt):
+            break
+
+
+class SharedMemoryVecEnv(VecEnv):
+    """
+    Runs ``num_workers`` processes, each one hosting a whole VecEnv
+    (e.g. a SwingUpCartPoleVecEnv of 64 carts).
+
+    Actions, observations, rewards, dones and terminal observations live in
+    one shared memory block: each worker reads its actions and writes its
+    results in place, the pipes only carry the commands and the rare extra
+    infos. Nothing is pickled on the hot path, unlike SubprocVecEnv.
+
+    :param env_fn: ``env_fn(worker_index) -> VecEnv``, called inside each worker
+    :param num_workers: number of worker processes
+    :param start_method: multiprocessing start method (forkserver by default)
+    """
+
+    def __init__(self, env_fn, num_workers, start_method=None):
+        self.waiting = False
+        self.closed = False
+
+        if start_method is None:
+            forkserver_available = "forkserver" in mp.get_all_start_methods()
+            start_method = "forkserver" if forkserver_available else "spawn"
+        ctx = mp.get_context(start_method)
+
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(num_workers)])
+        self.processes = []
+        for index, (work_remote, remote) in enumerate(zip(self.work_remotes, self.remotes)):
+            args = (work_remote, remote, CloudpickleWrapper(env_fn), index)
+            # daemon=True: if the main process crashes, we should not cause things to hang
+            process = ctx.Process(target=_worker, args=args, daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        specs = [remote.recv() for remote in self.remotes]
+        self.envs_per_worker = [n for n, _, _ in specs]
+        observation_space, action_space = specs[0][1], specs[0][2]
+        num_envs = sum(self.envs_per_worker)
+        self.worker_starts = np.concatenate([[0], np.cumsum(self.envs_per_worker)[:-1]]).astype(int)
+
+        layout = _buffer_layout(num_envs, observation_space, action_space)
+        _, size = _buffer_offsets(layout)
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._buffers = _buffer_views(self._shm, layout)
+        for remote, start in zip(self.remotes, self.worker_starts):
+            remote.send((self._shm.name, layout, int(start)))
+
+        super().__init__(num_envs, observation_space, action_space)
+
+    def _worker_indices(self, indices):
+        # global indices -> {worker: [local indices]}
+        per_worker = {}
+        for i in self._get_indices(indices):
+            worker = int(np.searchsorted(self.worker_starts, i, side="right") - 1)
+            per_worker.setdefault(worker, []).append(int(i - self.worker_starts[worker]))
+        return per_worker
+
+    def step_async(self, actions):
+        self._buffers["actions"][:] = np.asarray(actions).reshape(self._buffers["actions"].shape)
+        for remote in self.remotes:
+            remote.send(("step", None))
+        self.waiting = True
+
+    def step_wait(self):
+        extra = [remote.recv() for remote in self.remotes]
+        self.waiting = False
+
+        dones = self._buffers["dones"].copy()
+        infos = [{} for _ in range(self.num_envs)]
+        for i in np.flatnonzero(dones):
+            infos[i]["terminal_observation"] = self._buffers["terminal_obs"][i].copy()
+            infos[i]["TimeLimit.truncated"] = bool(self._buffers["truncated"][i])
+        for start, worker_infos in zip(self.worker_starts, extra):
+            for i, info in worker_infos:
+                infos[start + i].update(info)
+
+        return self._buffers["obs"].copy(), self._buffers["rewards"].copy(), dones, infos
+
+    def reset(self):
+        for remote, start in zip(self.remotes, self.worker_starts):
+            remote.send(("reset", self._seeds[start]))
+        for remote in self.remotes:
+            remote.recv()
+        self._reset_seeds()
+        self._reset_options()
+        return self._buffers["obs"].copy()
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self._buffers = None
+        self._shm.close()
+        self._shm.unlink()
+        self.closed = True
+
+    def get_attr(self, attr_name, indices=None):
+        values = []
+        for remote in self.remotes:
+            remote.send(("get_attr", attr_name))
+        for remote in self.remotes:
+            values.extend(remote.recv())
+        return [values[i] for i in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        per_worker = self._worker_indices(indices)
+        for worker, local in per_worker.items():
+            self.remotes[worker].send(("set_attr", (attr_name, value, local)))
+        for worker in per_worker:
+            self.remotes[worker].recv()
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        per_worker = self._worker_indices(indices)
+        for worker, local in per_worker.items():
+            self.remotes[worker].send(("env_method", (method_name, method_args, method_kwargs, local)))
+        results = []
+        for worker in per_worker:
+            results.extend(self.remotes[worker].recv())
+        return results
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
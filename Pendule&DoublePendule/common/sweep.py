@@ -0,0 +1,234 @@
+# Hyperparameter sweep of PPO on the swing-up family, with early stopping.
+#
+# Trials (random configs drawn from SEARCH_SPACE) run concurrently in a process
+# pool. Each trial is evaluated every EVAL_EVERY steps on a fixed set of starting
+# states, and its learning curve goes to a SQLite file:
+#     sweeps/<sweep_id>/results.db
+#
+# Early stopping follows asynchronous successive halving (ASHA): rungs are placed
+# at min_steps, min_steps * eta, min_steps * eta^2, ... When a trial reaches a
+# rung, it only continues if its score is in the top 1/eta of the scores already
+# recorded at that rung. Stopped trials free their worker for the next config.
+#
+# Usage (from the Pendule&DoublePendule folder):
+#     python -m common.sweep v6 --trials 32
+#     python -m common.sweep v6 --actions continuous 3 5   # also compares action parameterizations
+#     python -m common.sweep v6 --report sweeps/v6_20250101_120000
+import argparse
+import datetime
+import json
+import multiprocessing as mp
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from common.registry import make_batched, parse_actions
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Carts simulated by the batched env of a trial (n_steps counts transitions, as in the trainers)
+NUM_ENVS = 16
+EVAL_ENVS = 32
+EVAL_STEPS = 500
+EVAL_EVERY = 25000
+
+# name -> ("log", low, high) | ("choice", values)
+SEARCH_SPACE = {
+    "learning_rate": ("log", 1e-4, 1e-3),
+    "n_steps": ("choice", [512, 1024, 2048, 4096]),
+    "ent_coef": ("choice", [0.0, 0.001, 0.01, 0.05]),
+    "clip_range": ("choice", [0.1, 0.2, 0.3]),
+    "use_sde": ("choice", [False, True]),  # continuous action spaces only (v6)
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trials (
+    trial_id INTEGER PRIMARY KEY,
+    variant TEXT,
+    params TEXT,
+    status TEXT,
+    steps INTEGER,
+    score REAL,
+    started REAL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS curves (
+    trial_id INTEGER,
+    step INTEGER,
+    score REAL,
+    rung INTEGER
+);
+"""
+
+
+def connect(db_path):
+    # Short transactions + WAL: several trial processes write to the same file
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def sample_params(variant, rng, actions=None):
+    # actions: action parameterizations to draw from (common/registry.py), None for the variant's own
+    params = {}
+    for name, spec in SEARCH_SPACE.items():
+        if spec[0] == "log":
+            value = float(np.exp(rng.uniform(np.log(spec[1]), np.log(spec[2]))))
+        else:
+            value = spec[1][rng.integers(len(spec[1]))]
+            value = value.item() if hasattr(value, "item") else value
+        params[name] = value
+    if actions:
+        params["actions"] = actions[rng.integers(len(actions))]
+    if variant != "v6" or params.get("actions") not in (None, "continuous"):
+        params["use_sde"] = False
+    return params
+
+
+def rungs(min_steps, max_steps, eta):
+    budgets = []
+    budget = min_steps
+    while budget < max_steps:
+        budgets.append(budget)
+        budget *= eta
+    return budgets
+
+
+def make_env(variant, num_envs, seed=None, actions=None):
+    return make_batched(variant, num_envs, seed, actions=actions)
+
+
+def evaluate(model, variant, obs_rms=None, actions=None):
+    # Mean return over EVAL_STEPS steps, same starting states for every trial
+    env = make_env(variant, EVAL_ENVS, seed=12345, actions=actions)
+    obs = env.reset()
+    total = np.zeros(EVAL_ENVS)
+    for _ in range(EVAL_STEPS):
+        if obs_rms is not None:
+            obs = np.clip((obs - obs_rms.mean) / np.sqrt(obs_rms.var + 1e-8), -10.0, 10.0)
+        action, _ = model.predict(obs, deterministic=True)
+        obs, rewards, _, _ = env.step(action)
+        total += rewards
+    return float(total.mean())
+
+
+def keep_going(conn, rung, score, eta):
+    # ASHA rule: continue only if in the top 1/eta of the scores seen at this rung
+    scores = [row[0] for row in conn.execute("SELECT score FROM curves WHERE rung = ?", (rung,))]
+    k = max(1, len(scores) // eta)
+    return score >= sorted(scores, reverse=True)[k - 1]
+
+
+def run_trial(db_path, trial_id, variant, params, min_steps, max_steps, eta, seed, eval_every=EVAL_EVERY):
+    # Runs in a pool worker: imports torch/SB3 there, with one thread per trial
+    import torch
+    from stable_baselines3 import PPO
+    from stable_baselines3.common.vec_env import VecNormalize
+
+    torch.set_num_threads(1)
+    conn = connect(db_path)
+    conn.execute("UPDATE trials SET status = 'running', started = ? WHERE trial_id = ?",
+                 (time.time(), trial_id))
+
+    kwargs = dict(params)
+    actions = kwargs.pop("actions", None)
+    env = make_env(variant, NUM_ENVS, seed=seed, actions=actions)
+    if variant == "double":
+        env = VecNormalize(env, norm_obs=True, norm_reward=True, clip_obs=10.)
+
+    kwargs["n_steps"] = params["n_steps"] // NUM_ENVS
+    model = PPO("MlpPolicy", env, verbose=0, batch_size=64, seed=seed, **kwargs)
+
+    budgets = rungs(min_steps, max_steps, eta)
+    checkpoints = sorted(set(list(range(eval_every, max_steps + 1, eval_every)) + budgets + [max_steps]))
+    status, score = "completed", None
+    for target in checkpoints:
+        model.learn(total_timesteps=target - model.num_timesteps, reset_num_timesteps=False)
+        score = evaluate(model, variant, env.obs_rms if variant == "double" else None, actions)
+        rung = budgets.index(target) if target in budgets else None
+        conn.execute("INSERT INTO curves VALUES (?, ?, ?, ?)", (trial_id, model.num_timesteps, score, rung))
+        conn.execute("UPDATE trials SET steps = ?, score = ? WHERE trial_id = ?",
+                     (model.num_timesteps, score, trial_id))
+        if rung is not None and not keep_going(conn, rung, score, eta):
+            status = "stopped"
+            break
+
+    model.save(os.path.join(os.path.dirname(db_path), f"trial_{trial_id}"))
+    conn.execute("UPDATE trials SET status = ?, finished = ? WHERE trial_id = ?",
+                 (status, time.time(), trial_id))
+    conn.close()
+    env.close()
+    return trial_id, status, model.num_timesteps, score
+
+
+def sweep(variant, n_trials=32, num_workers=None, min_steps=50_000, max_steps=1_000_000, eta=3, seed=0,
+          eval_every=EVAL_EVERY, actions=None):
+    sweep_id = datetime.datetime.now().strftime(f"{variant}_%Y%m%d_%H%M%S")
+    sweep_dir = os.path.join(ROOT, "sweeps", sweep_id)
+    os.makedirs(sweep_dir, exist_ok=True)
+    db_path = os.path.join(sweep_dir, "results.db")
+
+    conn = connect(db_path)
+    conn.executescript(SCHEMA)
+    rng = np.random.default_rng(seed)
+    trials = []
+    for trial_id in range(n_trials):
+        params = sample_params(variant, rng, actions)
+        conn.execute("INSERT INTO trials (trial_id, variant, params, status) VALUES (?, ?, ?, 'pending')",
+                     (trial_id, variant, json.dumps(params)))
+        trials.append((trial_id, params))
+    conn.close()
+
+    num_workers = num_workers or max(1, os.cpu_count() or 1)
+    print(f"Sweep {sweep_id}: {n_trials} trials, {num_workers} workers, rungs {rungs(min_steps, max_steps, eta)}")
+
+    ctx = mp.get_context("forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn")
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=ctx) as pool:
+        futures = [
+            pool.submit(run_trial, db_path, trial_id, variant, params, min_steps, max_steps, eta,
+                        seed + trial_id, eval_every)
+            for trial_id, params in trials
+        ]
+        for future in as_completed(futures):
+            trial_id, status, steps, score = future.result()
+            print(f"Trial {trial_id}: {status} à {steps} steps, score {score:.1f}")
+
+    report(sweep_dir)
+    return sweep_dir
+
+
+def report(sweep_dir, top=10):
+    conn = connect(os.path.join(sweep_dir, "results.db"))
+    rows = conn.execute(
+        "SELECT trial_id, status, steps, score, params FROM trials "
+        "WHERE score IS NOT NULL ORDER BY steps DESC, score DESC LIMIT ?", (top,)
+    ).fetchall()
+    conn.close()
+    print(f"\n{'trial':>6}{'status':>11}{'steps':>10}{'score':>10}  params")
+    for trial_id, status, steps, score, params in rows:
+        print(f"{trial_id:>6}{status:>11}{steps:>10}{score:>10.1f}  {params}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PPO hyperparameter sweep with successive halving")
+    parser.add_argument("variant", choices=["v3", "v4", "v5", "v6", "double"])
+    parser.add_argument("--trials", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=None, help="concurrent trials (default: cores)")
+    parser.add_argument("--min-steps", type=int, default=50_000, help="budget of the first rung")
+    parser.add_argument("--max-steps", type=int, default=1_000_000)
+    parser.add_argument("--eta", type=int, default=3, help="reduction factor between rungs")
+    parser.add_argument("--eval-every", type=int, default=EVAL_EVERY, help="steps between two evaluations")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--actions", nargs="+", type=parse_actions, default=None,
+                        help="action parameterizations to compare: 'continuous' and/or numbers of force levels")
+    parser.add_argument("--report", metavar="SWEEP_DIR", help="only print the leaderboard of a sweep")
+    args = parser.parse_args()
+
+    if args.report:
+        report(args.report)
+    else:
+        sweep(args.variant, args.trials, args.workers, args.min_steps, args.max_steps, args.eta, args.seed,
+              args.eval_every, args.actions)
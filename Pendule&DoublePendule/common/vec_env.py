@@ -0,0 +1,243 @@
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnv
+
+from common.physics import cartpole_params, cartpole_step
+from common.randomization import make_randomizer
+from common.reward_spec import get_spec
+
+# Per-version settings of the swing-up family.
+# Physics constants are shared, only force, track width, action space,
+# starting distribution and reward change between V3, V4, V5 and V6.
+VERSIONS = {
+    "v3": {
+        "force_mag": 20.0,
+        "x_threshold": 5.0,
+        "continuous": False,
+        "obs_trig_bound": 1.0,
+        "reset_low": [-0.05, -0.05, -0.05, -0.05],
+        "reset_high": [0.05, 0.05, 0.05, 0.05],
+    },
+    "v4": {
+        "force_mag": 20.0,
+        "x_threshold": 15.0,
+        "continuous": False,
+        "obs_trig_bound": 1.2,
+        "reset_low": [-0.1, -0.1, np.pi - 0.1, -0.1],
+        "reset_high": [0.1, 0.1, np.pi + 0.1, 0.1],
+    },
+    "v5": {
+        "force_mag": 10.0,
+        "x_threshold": 10.0,
+        "continuous": False,
+        "obs_trig_bound": 1.0,
+        "reset_low": [-0.1, -0.1, np.pi - 0.1, -0.1],
+        "reset_high": [0.1, 0.1, np.pi + 0.1, 0.1],
+    },
+    "v6": {
+        "force_mag": 20.0,
+        "x_threshold": 12.0,
+        "continuous": True,
+        "obs_trig_bound": 1.0,
+        "reset_low": [-0.1, -0.1, np.pi - 1.0, -0.1],
+        "reset_high": [0.1, 0.1, np.pi + 1.0, 0.1],
+    },
+}
+
+
+def make_action_space(actions, continuous):
+    """
+    Action space and force levels of an action parameterization.
+
+    ``actions`` is None (the version's own: Box(-1, 1) if ``continuous``,
+    bang-bang Discrete(2) otherwise), "continuous", or a number of force
+    levels K >= 2: Discrete(K), action k pushes with force_mag times the k-th
+    of K values evenly spaced in [-1, 1]. Returns (space, levels), levels is
+    None for a Box.
+    """
+    if actions is None:
+        actions = "continuous" if continuous else 2
+    if actions == "continuous":
+        return spaces.Box(low=-1.0, high=1.0, shape=(1,), dtype=np.float32), None
+    if int(actions) < 2:
+        raise ValueError(f"Expected 'continuous' or a number of force levels >= 2, got {actions!r}")
+    return spaces.Discrete(int(actions)), np.linspace(-1.0, 1.0, int(actions)).astype(np.float32)
+
+
+class BatchedVecEnv(VecEnv):
+    """
+    Base for the envs that simulate every copy inside one object.
+
+    Attribute and method calls are answered by the single underlying
+    object, so ``get_attr`` returns the same value for every index.
+    """
+
+    def step_async(self, actions):
+        self._actions = actions
+
+    def close(self):
+        pass
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name) for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        method = getattr(self, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
+
+
+class SwingUpCartPoleVecEnv(BatchedVecEnv):
+    """
+    N cart-poles of the swing-up family simulated together.
+
+    The state is kept as a structure of arrays: ``self.state`` has shape
+    (4, num_envs) and its rows are x, x_dot, theta, theta_dot. One call to
+    ``step`` advances every cart with a single vectorized physics and reward
+    update. Finished carts are reset automatically, as with DummyVecEnv.
+
+    ``reward`` replaces the reward of the version (SPECS[version]) by a
+    RewardSpec or the name of one of common.reward_spec.SPECS, computed in
+    the same kernel as the dynamics.
+    ``randomization`` draws gravity, masses, length and force per cart at
+    each reset (common/randomization.py); these attributes then have shape (N,).
+    ``reset_low`` / ``reset_high`` have shape (4, 1), or (4, N) for one
+    starting distribution per cart (common/curriculum.py).
+    ``max_episode_steps`` truncates the episodes (none by default: an
+    episode only ends when the cart leaves the track).
+    ``actions`` replaces the action space of the version: "continuous" or a
+    number of discrete force levels (see make_action_space).
+    """
+
+    def __init__(self, num_envs=256, version="v6", seed=None, integrator="euler", substeps=1, reward=None,
+                 randomization=None, max_episode_steps=None, actions=None):
+        if version not in VERSIONS:
+            raise ValueError(f"Unknown version '{version}', expected one of {list(VERSIONS)}")
+        config = VERSIONS[version]
+        self.version = version
+
+        self.gravity = 9.8
+        self.masscart = 1.0
+        self.masspole = 0.1
+        self.total_mass = (self.masspole + self.masscart)
+        self.length = 0.5
+        self.polemass_length = (self.masspole * self.length)
+        self.force_mag = config["force_mag"]
+        self.tau = 0.02
+        self.integrator = integrator
+        self.substeps = substeps
+        self.x_threshold = config["x_threshold"]
+        self.max_episode_steps = max_episode_steps
+        self.render_mode = None
+
+        self.reset_low = np.array(config["reset_low"], dtype=np.float32)[:, None]
+        self.reset_high = np.array(config["reset_high"], dtype=np.float32)[:, None]
+
+        action_space, self.force_levels = make_action_space(actions, config["continuous"])
+        self.continuous = self.force_levels is None
+
+        trig = config["obs_trig_bound"]
+        high = np.array([
+            self.x_threshold * 2,
+            np.finfo(np.float32).max,
+            trig,
+            trig,
+            np.finfo(np.float32).max
+        ], dtype=np.float32)
+        observation_space = spaces.Box(-high, high, dtype=np.float32)
+
+        super().__init__(num_envs, observation_space, action_space)
+
+        # Structure of arrays: one row per state variable, one column per cart
+        self.state = np.zeros((4, num_envs), dtype=np.float32)
+        self._obs = np.zeros((num_envs, 5), dtype=np.float32)
+        self.episode_steps = np.zeros(num_envs, dtype=np.int64)
+        self._actions = None
+        self.np_random = np.random.default_rng(seed)
+        self.reward = get_spec(version if reward is None else reward)
+        self.randomizer = make_randomizer(randomization)
+        if self.randomizer is not None:
+            self.randomizer.attach(self)
+
+    # --- PHYSICS ---
+
+    def _force_input(self, actions):
+        actions = np.asarray(actions)
+        if self.continuous:
+            return np.clip(actions.reshape(self.num_envs), -1.0, 1.0).astype(np.float32)
+        return self.force_levels[actions.reshape(self.num_envs).astype(np.intp)]
+
+    def _fill_obs(self, indices=slice(None)):
+        x, x_dot, theta, theta_dot = self.state[:, indices]
+        self._obs[indices, 0] = x
+        self._obs[indices, 1] = x_dot
+        self._obs[indices, 2] = np.cos(theta)
+        self._obs[indices, 3] = np.sin(theta)
+        self._obs[indices, 4] = theta_dot
+
+    def _reset_indices(self, indices):
+        if self.randomizer is not None:
+            self.randomizer.resample(self, indices)
+            self.total_mass = self.masspole + self.masscart
+            self.polemass_length = self.masspole * self.length
+        size = (4, len(indices)) if isinstance(indices, np.ndarray) else (4, self.num_envs)
+        low = np.broadcast_to(self.reset_low, (4, self.num_envs))[:, indices]
+        high = np.broadcast_to(self.reset_high, (4, self.num_envs))[:, indices]
+        self.state[:, indices] = self.np_random.uniform(low, high, size=size)
+        self.episode_steps[indices] = 0
+        self._fill_obs(indices)
+
+    # --- VECENV API ---
+
+    def reset(self):
+        if self._seeds[0] is not None:
+            self.np_random = np.random.default_rng(self._seeds[0])
+        self._reset_seeds()
+        self._reset_options()
+        self._reset_indices(slice(None))
+        return self._obs.copy()
+
+    def step_wait(self):
+        # Dynamics + reward of every cart in one call (common/physics.py)
+        force_input = self._force_input(self._actions)
+        rewards, terminated = cartpole_step(
+            self.state, force_input, cartpole_params(self), self.reward, self.integrator, self.substeps
+        )
+
+        self.episode_steps += 1
+        dones = terminated
+        if self.max_episode_steps is not None:
+            dones = terminated | (self.episode_steps >= self.max_episode_steps)
+
+        self._fill_obs()
+        infos = [{} for _ in range(self.num_envs)]
+        done_idx = np.flatnonzero(dones)
+        if done_idx.size:
+            for i in done_idx:
+                infos[i]["terminal_observation"] = self._obs[i].copy()
+                infos[i]["TimeLimit.truncated"] = not terminated[i]
+            self._reset_indices(done_idx)
+
+        return self._obs.copy(), rewards, dones, infos
+
+
+if __name__ == "__main__":
+    import time
+
+    # Quick throughput check: random actions, auto-reset included
+    for version in VERSIONS:
+        for n in (1, 256, 4096):
+            env = SwingUpCartPoleVecEnv(num_envs=n, version=version, seed=0)
+            env.reset()
+            actions = np.stack([env.action_space.sample() for _ in range(n)])
+            steps = max(2000, 200000 // n)
+            start = time.perf_counter()
+            for _ in range(steps):
+                env.step(actions)
+            elapsed = time.perf_counter() - start
+            print(f"{version} | {n:5d} envs | {n * steps / elapsed:12,.0f} steps/s")